@@ -1,49 +1,275 @@
 import logging
 
 from backend.Solver import Solver
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.Presolve import find_infeasibility
+from backend.utils import iter_bits
 
 logger = logging.getLogger(__name__)
 
 
+class DancingLinks:
+    """
+    Knuth's Dancing Links (DLX) structure for exact cover with secondary columns.
+
+    Columns are numbered ``1..n_primary + n_secondary``; the first
+    ``n_primary`` must be covered exactly once, the remaining (secondary)
+    columns at most once.  Each row is a list of column numbers.  The links
+    live in flat integer lists rather than node objects, which keeps the
+    cover/uncover inner loops cheap in CPython.
+    """
+
+    CHECK_INTERVAL = 1024  # search steps between should_continue polls
+
+    def __init__(self, n_primary, n_secondary, rows):
+        n_cols = n_primary + n_secondary
+        # Node 0 is the root; nodes 1..n_cols are column headers.
+        self.L = list(range(-1, n_cols))
+        self.R = list(range(1, n_cols + 2))
+        self.U = list(range(n_cols + 1))
+        self.D = list(range(n_cols + 1))
+        self.C = list(range(n_cols + 1))
+        self.S = [0] * (n_cols + 1)
+        self.row_of = [-1] * (n_cols + 1)
+
+        # Close the primary ring: root <-> 1 <-> ... <-> n_primary <-> root.
+        self.L[0] = n_primary
+        self.R[n_primary] = 0
+        # Secondary headers are self-linked so they are never chosen.
+        for c in range(n_primary + 1, n_cols + 1):
+            self.L[c] = c
+            self.R[c] = c
+
+        for row_index, columns in enumerate(rows):
+            self._append_row(row_index, columns)
+
+    def _append_row(self, row_index, columns):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        first = None
+        for c in columns:
+            node = len(C)
+            C.append(c)
+            self.row_of.append(row_index)
+            # Vertical insert at the bottom of column c.
+            U.append(U[c])
+            D.append(c)
+            D[U[c]] = node
+            U[c] = node
+            S[c] += 1
+            # Horizontal insert at the end of the row ring.
+            if first is None:
+                first = node
+                L.append(node)
+                R.append(node)
+            else:
+                L.append(L[first])
+                R.append(first)
+                R[L[first]] = node
+                L[first] = node
+
+    def _cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _choose_column(self):
+        """Minimum-remaining-values heuristic: the primary column with fewest rows."""
+        R, S = self.R, self.S
+        best = R[0]
+        best_size = S[best]
+        c = R[best]
+        while c != 0 and best_size > 1:
+            if S[c] < best_size:
+                best = c
+                best_size = S[c]
+            c = R[c]
+        return best
+
+    def iter_exact_covers(self, should_continue=None):
+        """
+        Yield every exact cover as a list of row indices.
+
+        The search is iterative (an explicit stack of chosen rows) so that deep
+        boards do not run into Python's recursion limit.  *should_continue*,
+        if given, is polled every ``CHECK_INTERVAL`` search steps; the search
+        stops as soon as it returns False.
+        """
+        R, L, D, C = self.R, self.L, self.D, self.C
+        columns = []  # column covered at each level
+        chosen = []   # row node chosen at each level
+        steps = self.CHECK_INTERVAL - 1  # poll before the first step too
+
+        while True:
+            if should_continue is not None:
+                steps += 1
+                if steps >= self.CHECK_INTERVAL:
+                    steps = 0
+                    if not should_continue():
+                        return
+            descend = False
+            if R[0] == 0:
+                yield sorted(self.row_of[r] for r in chosen)
+            else:
+                c = self._choose_column()
+                if self.S[c] > 0:
+                    self._cover(c)
+                    r = D[c]
+                    columns.append(c)
+                    chosen.append(r)
+                    j = R[r]
+                    while j != r:
+                        self._cover(C[j])
+                        j = R[j]
+                    descend = True
+
+            if descend:
+                continue
+
+            # Backtrack: try the next row in the deepest column, popping levels
+            # whose rows are exhausted.
+            while columns:
+                c = columns[-1]
+                r = chosen[-1]
+                j = L[r]
+                while j != r:
+                    self._uncover(C[j])
+                    j = L[j]
+                r = D[r]
+                if r != c:
+                    chosen[-1] = r
+                    j = R[r]
+                    while j != r:
+                        self._cover(C[j])
+                        j = R[j]
+                    break
+                self._uncover(c)
+                columns.pop()
+                chosen.pop()
+            else:
+                return
+
+
 class BacktrackingSolver(Solver):
     """
-    Stub backtracking solver for tiling puzzles.
+    Exact-cover solver for tiling puzzles using Dancing Links (Algorithm X).
 
-    This is a placeholder implementation that demonstrates the Solver
-    interface.  Replace the body of `solve` with a real backtracking
-    algorithm when ready.
+    Every free board cell is a primary column.  Under
+    ``PieceUsagePolicy.EXACTLY_ONE`` every piece is a primary column too;
+    under ``AT_MOST_ONE`` pieces become secondary columns, so each piece is
+    used at most once but need not be used.  Each ``CandidatePlacement`` is a
+    row covering its cells and its piece.  A piece with ``count`` copies gets
+    one column per copy and its candidates one row per copy.  Column selection uses the
+    minimum-remaining-values heuristic and solutions are produced lazily, so
+    no CNF has to be built.
     """
 
-    def solve(self, puzzle, max_solutions=1, **kwargs):
+    def iter_solutions(self, puzzle, **kwargs):
         """
-        Stub implementation — always returns no solution.
+        Lazily yield every solution as a list of ``CandidatePlacement``.
 
-        A real implementation would iterate over board cells, try placing
-        candidates, recurse, and backtrack on conflicts.
+        Candidates within a solution keep the order of ``puzzle.candidates``,
+        matching the output of ``PySatSolver``.  A ``limits`` keyword
+        (``SolveLimits``) bounds the search by time and cancellation; the
+        SAT search budgets do not apply here.
         """
-        logger.info("BacktrackingSolver.solve called (stub — returning no solutions)")
+        limits = kwargs.get('limits', None)
+        if limits is not None:
+            limits.start()
+        self.infeasibility = find_infeasibility(puzzle)
+        if self.infeasibility is not None:
+            logger.info("Puzzle is infeasible (%s): %s",
+                        self.infeasibility.check, self.infeasibility.message)
+            return
+
+        # Compact puzzles key cells by linear index and rows come from bitmasks.
+        cells = puzzle.board.cells()
+        column_of = {}
+        for cell in cells:
+            key = puzzle.cell_index(cell) if puzzle.compact else cell
+            column_of[('cell', key)] = len(column_of) + 1
+
+        # Mirror PySatSolver: pieces without any placement are not constrained.
+        piece_map = puzzle.piece_to_indices if puzzle.compact else puzzle.piece_to_cands
+        slots = {}  # piece id -> number of copy columns
+        for piece_id, cands in piece_map.items():
+            if cands:
+                slots[piece_id] = puzzle.piece_count(piece_id)
+            else:
+                logger.warning("No candidate placement for piece %s", piece_id)
 
-        # Normalise max_solutions
-        unlimited = False
-        if max_solutions is None:
-            unlimited = True
+        # One column per copy of a piece; a candidate of a piece with several
+        # copies becomes one row per copy.
+        for piece_id, n in slots.items():
+            for copy in range(n):
+                column_of[('piece', piece_id, copy)] = len(column_of) + 1
+
+        if puzzle.piece_usage_policy == PieceUsagePolicy.EXACTLY_ONE:
+            n_primary, n_secondary = len(column_of), 0
+        else:  # AT_MOST_ONE (default)
+            n_primary, n_secondary = len(cells), len(column_of) - len(cells)
+
+        rows = []
+        row_candidate = []  # row -> (candidate number, copy)
+        if puzzle.compact:
+            masks = puzzle.iter_candidate_masks()
+            cell_rows = (
+                ([column_of[('cell', index)] for index in iter_bits(mask)], puzzle.candidate_piece(k))
+                for k, mask in enumerate(masks)
+            )
         else:
-            try:
-                unlimited = int(max_solutions) <= 0
-            except Exception:
-                unlimited = False
-        if not unlimited and max_solutions < 1:
-            max_solutions = 1
-
-        # TODO: implement real backtracking search here
-        # Available data from puzzle:
-        #   puzzle.board          — the Board object
-        #   puzzle.piece_library  — dict of piece_id → Piece
-        #   puzzle.candidates     — list of CandidatePlacement
-        #   puzzle.cell_to_cands  — cell → [CandidatePlacement, ...]
-        #   puzzle.piece_to_cands — piece_id → [CandidatePlacement, ...]
-        #   puzzle.piece_usage_policy — AT_MOST_ONE or EXACTLY_ONE
-
-        if not unlimited and max_solutions == 1:
-            return None
-        return []
+            cell_rows = (
+                ([column_of[('cell', cell)] for cell in cand.cells], cand.piece_id)
+                for cand in puzzle.candidates
+            )
+        for k, (columns, piece_id) in enumerate(cell_rows):
+            for copy in range(slots[piece_id]):
+                rows.append(columns + [column_of[('piece', piece_id, copy)]])
+                row_candidate.append((k, copy))
+
+        dlx = DancingLinks(n_primary, n_secondary, rows)
+        for row_indices in dlx.iter_exact_covers(limits.check if limits is not None else None):
+            chosen = [row_candidate[i] for i in row_indices]
+            if not self._copies_in_order(puzzle, chosen):
+                continue
+            yield [puzzle.candidates[k] for k in sorted(k for k, _ in chosen)]
+
+    @staticmethod
+    def _copies_in_order(puzzle, chosen):
+        """
+        Whether the copies of every piece were assigned canonically.
+
+        Interchangeable copies make the same placements reachable under every
+        permutation of copy columns; only the assignment that uses copies
+        ``0, 1, ...`` in increasing candidate order is kept, so each solution
+        is produced once.
+        """
+        next_copy = {}
+        for k, copy in sorted(chosen):
+            piece_id = puzzle.candidate_piece(k) if puzzle.compact else puzzle.candidates[k].piece_id
+            if next_copy.get(piece_id, 0) != copy:
+                return False
+            next_copy[piece_id] = copy + 1
+        return True
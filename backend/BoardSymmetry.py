@@ -0,0 +1,142 @@
+from backend.utils import normalize
+
+# The eight symmetries of the square as (name, linear map on (i, j)).  The
+# last four swap the axes and only apply to square boards.
+_DIHEDRAL = (
+    ('identity', lambda i, j: (i, j)),
+    ('rotate180', lambda i, j: (-i, -j)),
+    ('flip_rows', lambda i, j: (-i, j)),
+    ('flip_cols', lambda i, j: (i, -j)),
+    ('transpose', lambda i, j: (j, i)),
+    ('anti_transpose', lambda i, j: (-j, -i)),
+    ('rotate90', lambda i, j: (j, -i)),
+    ('rotate270', lambda i, j: (-j, i)),
+)
+
+
+class BoardSymmetry:
+    """
+    The symmetry group of a tiling puzzle and helpers to break it.
+
+    A symmetry is a rotation/reflection of the board that maps the free cells
+    onto themselves (obstacles included) and maps every piece's set of
+    allowed orientations onto itself, so it sends solutions to solutions.
+
+    Breaking works in two steps:
+
+    * Fixed anchor: for one *anchor piece*, only the lexicographically
+      smallest placement in each orbit of its placements is allowed
+      (``forbidden_candidates``).  Every class of symmetric solutions that
+      uses the piece keeps a member with the piece on an allowed placement.
+    * Canonical filter: placements fixed by some symmetry, and solutions
+      that do not use the anchor piece, can still produce symmetric copies;
+      ``canonical_key`` identifies those so a solver can skip them.
+    """
+
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        board = puzzle.board
+        self.height = board.height
+        self.width = board.width
+        self.transforms = [
+            (name, linear) for name, linear in _DIHEDRAL[:4 if board.height != board.width else 8]
+            if self._maps_board(linear) and self._maps_pieces(linear)
+        ]
+        self.anchor_piece = self._choose_anchor_piece() if self.order > 1 else None
+
+    @property
+    def order(self):
+        """Number of symmetries, identity included."""
+        return len(self.transforms)
+
+    # ── group construction ──────────────────────────────────────────────────
+
+    def _cell_map(self, linear):
+        """Turn a linear map into one on board cells by re-anchoring the image."""
+        h, w = self.height, self.width
+        oi, oj = linear(h - 1, w - 1)
+        shift_i = -min(0, oi)
+        shift_j = -min(0, oj)
+
+        def apply(cell):
+            i, j = linear(*cell)
+            return i + shift_i, j + shift_j
+        return apply
+
+    def _maps_board(self, linear):
+        apply = self._cell_map(linear)
+        obstacles = self.puzzle.board.obstacles
+        return all(apply(cell) in obstacles for cell in obstacles)
+
+    def _maps_pieces(self, linear):
+        for piece in self.puzzle.piece_library.values():
+            orientations = set(piece.get_orientations())
+            for orient in orientations:
+                if normalize(tuple(linear(i, j) for i, j in orient)) not in orientations:
+                    return False
+        return True
+
+    def _choose_anchor_piece(self):
+        """
+        Pick the piece to pin: the largest one (the most likely to appear in
+        a solution under AT_MOST_ONE), then the one with most placements.
+        Pieces with several copies are skipped, since pinning would force
+        every copy onto an orbit representative.
+        """
+        best = None
+        best_score = None
+        for piece_id, piece in self.puzzle.piece_library.items():
+            if self.puzzle.piece_count(piece_id) != 1:
+                continue
+            count = len(self._piece_candidate_numbers(piece_id))
+            if not count:
+                continue
+            score = (len(piece.get_offsets()), count)
+            if best_score is None or score > best_score:
+                best, best_score = piece_id, score
+        return best
+
+    # ── fixed-anchor constraints ────────────────────────────────────────────
+
+    def _piece_candidate_numbers(self, piece_id):
+        if self.puzzle.compact:
+            return self.puzzle.piece_to_indices.get(piece_id, range(0))
+        return [cand.index for cand in self.puzzle.piece_to_cands.get(piece_id, [])]
+
+    def _placement_key(self, cells):
+        return tuple(sorted(cells))
+
+    def forbidden_candidates(self):
+        """
+        Candidate numbers of the anchor piece that are not the representative
+        of their orbit; forbidding them removes symmetric solutions.
+        """
+        if self.anchor_piece is None:
+            return []
+        maps = [self._cell_map(linear) for _, linear in self.transforms[1:]]
+        forbidden = []
+        for k in self._piece_candidate_numbers(self.anchor_piece):
+            cells = self.puzzle.candidates[k].cells
+            own = self._placement_key(cells)
+            if any(self._placement_key(apply(c) for c in cells) < own for apply in maps):
+                forbidden.append(k)
+        return forbidden
+
+    # ── solution classes ────────────────────────────────────────────────────
+
+    def _images(self, solution):
+        for _, linear in self.transforms:
+            apply = self._cell_map(linear)
+            yield tuple(sorted(
+                (cand.piece_id, tuple(sorted(apply(c) for c in cand.cells))) for cand in solution
+            ))
+
+    def canonical_key(self, solution):
+        """A key shared by exactly the solutions symmetric to *solution*."""
+        return min(self._images(solution))
+
+    def orbit_size(self, solution):
+        """How many distinct symmetric variants *solution* stands for (itself included)."""
+        images = list(self._images(solution))
+        stabilizer = sum(1 for image in images if image == images[0])
+        return len(images) // stabilizer
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+
+from backend.CardinalityEncoding import DEFAULT_ENCODING
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.TilingPuzzle import TilingPuzzle
+from backend.utils import atomic_write_bytes, evict_lru_files, piece_count
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'TPCNF'
+_FORMAT_VERSION = 1
+_SUFFIX = '.cnf.z'
+
+
+def puzzle_fingerprint(board, piece_library: dict,
+                       piece_usage_policy: PieceUsagePolicy = PieceUsagePolicy.AT_MOST_ONE,
+                       encoding: str = DEFAULT_ENCODING):
+    """
+    Content hash of everything that determines a puzzle's candidates and CNF.
+
+    Covers the board dimensions, the sorted obstacles, the usage policy and,
+    for each piece in library order, its id, its count and the orientations
+    it generates (which captures both its canonical shape and its
+    rotation/reflection flags), plus the name of the cardinality encoding.
+    Colors and other display data are deliberately excluded.
+    """
+    pieces = []
+    for piece_id, piece in piece_library.items():
+        orientations = [[list(cell) for cell in orient] for orient in piece.get_orientations()]
+        pieces.append([str(piece_id), piece_count(piece), orientations])
+    payload = {
+        'v': _FORMAT_VERSION,
+        'board': [board.width, board.height],
+        'obstacles': sorted([i, j] for i, j in board.obstacles),
+        'policy': piece_usage_policy.value,
+        'encoding': encoding,
+        'pieces': pieces,
+    }
+    blob = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest()
+
+
+class CompiledCNF:
+    """
+    A puzzle's CNF together with its variable → candidate table.
+
+    Candidate number k is variable k + 1 and is described, as in a compact
+    ``TilingPuzzle``, by an orientation number and a linear anchor index into
+    ``orientation_table`` rows of ``(piece_id, orientation)``.
+    """
+
+    def __init__(self, clauses, nv, orientation_table, candidate_orientation_ids, candidate_anchors):
+        self.clauses = clauses
+        self.nv = nv
+        self.orientation_table = orientation_table
+        self.candidate_orientation_ids = candidate_orientation_ids
+        self.candidate_anchors = candidate_anchors
+
+    @property
+    def num_cands(self):
+        return len(self.candidate_anchors)
+
+    @classmethod
+    def from_puzzle(cls, puzzle, cnf):
+        """Capture *cnf* and the candidate table of *puzzle* (either mode)."""
+        if puzzle.compact:
+            table = [(piece_id, orient) for piece_id, orient, _ in puzzle.orientation_table]
+            return cls(cnf.clauses, cnf.nv, table,
+                       array('I', puzzle.candidate_orientation_ids),
+                       array('I', puzzle.candidate_anchors))
+
+        table = []
+        oid_of = {}
+        oids = array('I')
+        anchors = array('I')
+        for cand in puzzle.candidates:
+            key = (cand.piece_id, cand.orientation)
+            if key not in oid_of:
+                oid_of[key] = len(table)
+                table.append(key)
+            oids.append(oid_of[key])
+            anchors.append(puzzle.cell_index(cand.position))
+        return cls(cnf.clauses, cnf.nv, table, oids, anchors)
+
+    def to_puzzle(self, board, piece_library, piece_usage_policy=PieceUsagePolicy.AT_MOST_ONE):
+        """Rebuild a compact ``TilingPuzzle`` without regenerating candidates."""
+        return TilingPuzzle.from_candidate_table(
+            board, piece_library, piece_usage_policy,
+            self.orientation_table, self.candidate_orientation_ids, self.candidate_anchors,
+        )
+
+    # ── binary format ───────────────────────────────────────────────────────
+    #
+    # zlib( MAGIC | u8 version | u32 header length | JSON header
+    #       | u32[num_cands] orientation ids | u32[num_cands] anchors
+    #       | i32[...] clause literals, each clause terminated by 0 )
+
+    def to_bytes(self):
+        header = json.dumps({
+            'nv': self.nv,
+            'num_cands': self.num_cands,
+            'table': [[piece_id, [list(c) for c in orient]] for piece_id, orient in self.orientation_table],
+        }, separators=(',', ':')).encode('utf-8')
+        literals = array('i')
+        for clause in self.clauses:
+            literals.extend(clause)
+            literals.append(0)
+        parts = [
+            _MAGIC, struct.pack('<BI', _FORMAT_VERSION, len(header)), header,
+            _little_endian(array('I', self.candidate_orientation_ids)),
+            _little_endian(array('I', self.candidate_anchors)),
+            _little_endian(literals),
+        ]
+        return zlib.compress(b''.join(parts), 6)
+
+    @classmethod
+    def from_bytes(cls, data):
+        raw = zlib.decompress(data)
+        if not raw.startswith(_MAGIC):
+            raise ValueError("not a compiled CNF blob")
+        offset = len(_MAGIC)
+        version, header_len = struct.unpack_from('<BI', raw, offset)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"unsupported compiled CNF version {version}")
+        offset += struct.calcsize('<BI')
+        header = json.loads(raw[offset:offset + header_len].decode('utf-8'))
+        offset += header_len
+
+        num_cands = header['num_cands']
+        oids = _read_array('I', raw, offset, num_cands)
+        offset += num_cands * oids.itemsize
+        anchors = _read_array('I', raw, offset, num_cands)
+        offset += num_cands * anchors.itemsize
+        literals = _read_array('i', raw, offset, (len(raw) - offset) // 4)
+
+        clauses = []
+        clause = []
+        for lit in literals:
+            if lit == 0:
+                clauses.append(clause)
+                clause = []
+            else:
+                clause.append(lit)
+
+        table = [(piece_id, tuple(tuple(c) for c in orient)) for piece_id, orient in header['table']]
+        return cls(clauses, header['nv'], table, oids, anchors)
+
+
+def _little_endian(arr):
+    if sys.byteorder != 'little':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _read_array(typecode, raw, offset, count):
+    arr = array(typecode)
+    arr.frombytes(raw[offset:offset + count * arr.itemsize])
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr
+
+
+class CNFCache:
+    """
+    Content-addressed on-disk cache of ``CompiledCNF`` blobs.
+
+    Entries live in *directory* as ``<fingerprint>.cnf.z`` and are written via
+    a temporary file and ``os.replace`` so concurrent workers never see a
+    partial blob.  A hit bumps the file's mtime; after every write the oldest
+    entries are evicted until the directory holds at most *max_bytes*.  The
+    last few loaded entries are also kept in memory, so a lookup followed by
+    the solver's own lookup reads the disk once.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, memory_entries=4):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def key_for(self, puzzle, encoding=DEFAULT_ENCODING):
+        return puzzle_fingerprint(puzzle.board, puzzle.piece_library, puzzle.piece_usage_policy, encoding)
+
+    def _remember(self, key, compiled):
+        self._memory[key] = compiled
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached ``CompiledCNF`` for *key*, or ``None``."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                compiled = CompiledCNF.from_bytes(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zlib.error, struct.error) as exc:
+            logger.warning("Discarding unreadable CNF cache entry %s: %s", path, exc)
+            self._remove(path)
+            return None
+        self._remember(key, compiled)
+        return compiled
+
+    def put(self, key, compiled):
+        """Store *compiled* under *key* and evict least-recently-used entries."""
+        self._remember(key, compiled)
+        data = compiled.to_bytes()
+        if len(data) > self.max_bytes:
+            return
+        try:
+            atomic_write_bytes(self._path(key), data)
+        except OSError as exc:
+            logger.warning("Failed to write CNF cache entry %s: %s", key, exc)
+            return
+        self._evict()
+
+    def _evict(self):
+        evict_lru_files(self.directory, _SUFFIX, self.max_bytes)
+
+    def load_puzzle(self, board, piece_library, piece_usage_policy=PieceUsagePolicy.AT_MOST_ONE,
+                    encoding=DEFAULT_ENCODING):
+        """Return a compact puzzle rebuilt from the cache, or ``None`` on a miss."""
+        compiled = self.get(puzzle_fingerprint(board, piece_library, piece_usage_policy, encoding))
+        if compiled is None:
+            return None
+        return compiled.to_puzzle(board, piece_library, piece_usage_policy)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -8,6 +8,7 @@ class CandidatePlacement:
       - position: a (base_i, base_j) position on the board where the piece is anchored.
       - cells: a tuple of board cells (i,j) that are covered; computed as:
            (base_i + offset_i, base_j + offset_j) for each offset in the orientation.
+      - index: position in the owning puzzle's candidate list (set by TilingPuzzle).
     """
 
     def __init__(self, piece_id, orientation, position):
@@ -15,6 +16,7 @@ class CandidatePlacement:
         self.orientation = orientation  # tuple of (i,j)
         self.position = position  # (base_i, base_j)
         self.cells = self.compute_cells()
+        self.index = None
 
     def compute_cells(self):
         base_i, base_j = self.position
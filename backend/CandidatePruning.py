@@ -0,0 +1,361 @@
+import copy
+import logging
+
+from backend.board import Board
+from backend.CardinalityEncoding import CardinalityEncoding
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.Presolve import Infeasibility, find_infeasibility
+from backend.PySatSolver import PySatSolver
+from backend.Solver import SolutionFilter, Solver
+
+logger = logging.getLogger(__name__)
+
+# Name of the check reported when pruning itself proves a puzzle infeasible.
+CHECK_PRUNING = 'pruning'
+
+
+class PruneResult:
+    """
+    The outcome of ``prune_candidates``.
+
+    ``puzzle`` is the reduced puzzle (``None`` when ``infeasibility`` is
+    set): its board has the forced placements' cells as obstacles, its
+    library only the copies still to be placed, and candidate k of it is
+    candidate ``kept[k]`` of the original puzzle.  ``forced`` lists the
+    original candidates every solution contains, and ``stats`` the sizes
+    before and after (see ``prune_candidates``).
+    """
+
+    def __init__(self, puzzle, kept, forced, stats, infeasibility=None):
+        self.puzzle = puzzle
+        self.kept = kept
+        self.forced = forced
+        self.stats = stats
+        self.infeasibility = infeasibility
+
+    def solution(self, numbers):
+        """Original candidate numbers of a solution given as candidate numbers of ``puzzle``."""
+        return sorted([self.kept[k] for k in numbers] + self.forced)
+
+
+def _formula_size(cell_degrees, piece_sizes, counts, exact, encoding):
+    """Clause count of the CNF ``PySatSolver.build_cnf`` would build."""
+    clauses = sum(encoding.clause_count(n, 1, True) for n in cell_degrees if n)
+    for piece_id, n in piece_sizes.items():
+        count = counts[piece_id]
+        if n and (exact or count < n):
+            clauses += encoding.clause_count(n, count, exact)
+    return clauses
+
+
+def _grid_neighbours(width, height, free):
+    """4-neighbours in *free* of each cell of *free*, by linear index."""
+    return {
+        index: [n for n in (index - width if index >= width else None,
+                            index + width if index + width < width * height else None,
+                            index - 1 if index % width else None,
+                            index + 1 if (index + 1) % width else None)
+                if n is not None and n in free]
+        for index in free
+    }
+
+
+def _leaves_pocket(cells, neighbours, covered, min_area):
+    """Whether covering *cells* cuts off fewer than *min_area* uncovered cells next to them."""
+    checked = set()
+    for index in cells:
+        for start in neighbours[index]:
+            if start in cells or start in covered or start in checked:
+                continue
+            pocket = {start}
+            stack = [start]
+            while stack and len(pocket) < min_area:
+                for n in neighbours[stack.pop()]:
+                    if n not in pocket and n not in cells and n not in covered:
+                        pocket.add(n)
+                        stack.append(n)
+            if len(pocket) < min_area:
+                return True
+            checked |= pocket
+    return False
+
+
+class _Pruner:
+    """The fixed-point state of one ``prune_candidates`` run, on linear cell indices."""
+
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        board = puzzle.board
+        width, height = board.width, board.height
+        self.exact = puzzle.piece_usage_policy == PieceUsagePolicy.EXACTLY_ONE
+        self.free = {i * width + j for i, j in board.cells()}
+        self.neighbours = _grid_neighbours(width, height, self.free)
+        self.cells = []    # candidate -> linear cell indices
+        self.pieces = []   # candidate -> piece
+        self.shapes = []   # candidate -> orientation
+        self.cell_cands = {index: set() for index in self.free}
+        self.piece_cands = {}
+        for k, (piece_id, orient, (base_i, base_j)) in enumerate(puzzle.iter_placements()):
+            cells = [(base_i + di) * width + base_j + dj for di, dj in orient]
+            self.cells.append(cells)
+            self.pieces.append(piece_id)
+            self.shapes.append(orient)
+            for index in cells:
+                self.cell_cands[index].add(k)
+            self.piece_cands.setdefault(piece_id, set()).add(k)
+        self.alive = set(range(len(self.cells)))
+        self.remaining = {piece_id: puzzle.piece_count(piece_id) for piece_id in self.piece_cands}
+        self.areas = {piece_id: len(puzzle.piece_library[piece_id].get_offsets())
+                      for piece_id in self.piece_cands}
+        self.covered = set()
+        self.encloses = {}  # (orientation, min_area) -> whether it cuts off a pocket by itself
+        self.forced = []
+        self.rounds = 0
+        self.infeasibility = None
+
+    def _fail(self, message):
+        if self.infeasibility is None:
+            self.infeasibility = Infeasibility(CHECK_PRUNING, message)
+
+    def _remove(self, k, touched):
+        self.alive.discard(k)
+        for index in self.cells[k]:
+            self.cell_cands[index].discard(k)
+            touched.add(index)
+        self.piece_cands[self.pieces[k]].discard(k)
+
+    def _force(self, k, touched):
+        """Place candidate *k*: its cells and, once all copies are used, its piece go."""
+        piece_id = self.pieces[k]
+        self.forced.append(k)
+        self._remove(k, touched)
+        for index in self.cells[k]:
+            self.covered.add(index)
+            for other in list(self.cell_cands[index]):
+                self._remove(other, touched)
+        self.remaining[piece_id] -= 1
+        if self.remaining[piece_id] == 0:
+            for other in list(self.piece_cands[piece_id]):
+                self._remove(other, touched)
+
+    def _smallest_area(self):
+        return min((self.areas[p] for p, cands in self.piece_cands.items()
+                    if cands and self.remaining[p] > 0), default=0)
+
+    def _exposed(self, radius):
+        """Uncovered cells within *radius* steps of a cell that is not free or is covered."""
+        frontier = {index for index in self.free - self.covered
+                    if len(self.neighbours[index]) < 4
+                    or any(n in self.covered for n in self.neighbours[index])}
+        seen = set(frontier)
+        for _ in range(radius):
+            frontier = {n for index in frontier for n in self.neighbours[index]
+                        if n not in self.covered} - seen
+            seen |= frontier
+        return seen
+
+    def _encloses(self, orient, min_area):
+        """Whether *orient* cuts off a pocket smaller than *min_area* even in open space."""
+        key = (orient, min_area)
+        if key not in self.encloses:
+            margin = min_area + 1
+            rows = max(di for di, _ in orient) + 2 * margin + 1
+            cols = max(dj for _, dj in orient) + 2 * margin + 1
+            neighbours = _grid_neighbours(cols, rows, set(range(rows * cols)))
+            cells = {(margin + di) * cols + margin + dj for di, dj in orient}
+            self.encloses[key] = _leaves_pocket(cells, neighbours, set(), min_area)
+        return self.encloses[key]
+
+    def _near(self, cells, radius):
+        """Alive candidates covering a cell within *radius* steps of *cells*."""
+        frontier = set(cells) & self.free
+        seen = set(frontier)
+        for _ in range(radius):
+            frontier = {n for index in frontier for n in self.neighbours[index]} - seen
+            seen |= frontier
+        return {k for index in seen for k in self.cell_cands[index]}
+
+    def run(self):
+        """Prune to a fixed point; returns ``self``."""
+        touched = set(self.free)      # cells whose candidate sets changed
+        to_check = set(self.alive)    # candidates whose pocket test may have changed
+        min_area = self._smallest_area()
+        while touched or to_check:
+            self.rounds += 1
+            covered_before = len(self.covered)
+            newly_covered = []
+            current, touched = touched, set()
+            # Dead cells, and cells left with a single candidate.
+            for index in sorted(current):
+                if index in self.covered:
+                    continue
+                cands = self.cell_cands[index]
+                if not cands:
+                    self._fail(f"Once the forced pieces are placed, no piece can cover cell "
+                               f"{divmod(index, self.puzzle.board.width)}.")
+                    return self
+                if len(cands) == 1:
+                    k = next(iter(cands))
+                    newly_covered.extend(self.cells[k])
+                    self._force(k, touched)
+            # Under EXACTLY_ONE, pieces that need every placement they have left.
+            if self.exact:
+                for piece_id, cands in self.piece_cands.items():
+                    if len(cands) < self.remaining[piece_id]:
+                        self._fail(f"Piece {piece_id} has {self.remaining[piece_id]} copies to place "
+                                   f"but only {len(cands)} placements left.")
+                        return self
+                    if cands and len(cands) == self.remaining[piece_id]:
+                        for k in sorted(cands):
+                            if k in self.alive:
+                                newly_covered.extend(self.cells[k])
+                                self._force(k, touched)
+            smallest = self._smallest_area()
+            if smallest != min_area:
+                min_area = smallest
+                to_check = set(self.alive)
+            elif len(self.covered) > covered_before:
+                to_check |= self._near(newly_covered, min_area)
+            # Placements that leave a pocket too small for any remaining piece.
+            # Away from edges, obstacles and covered cells only a shape that
+            # encloses a hole by itself can do that.
+            exposed = self._exposed(min_area + 1) if len(to_check) > len(newly_covered) else None
+            for k in sorted(to_check & self.alive):
+                cells = self.cells[k]
+                if exposed is not None and exposed.isdisjoint(cells) \
+                        and not self._encloses(self.shapes[k], min_area):
+                    continue
+                if _leaves_pocket(set(cells), self.neighbours, self.covered, min_area):
+                    self._remove(k, touched)
+            to_check = set()
+        return self
+
+
+def prune_candidates(puzzle, encoding=None):
+    """
+    Remove candidates of *puzzle* that cannot be part of any solution.
+
+    Runs to a fixed point over three rules:
+
+    * a free cell with no candidate left proves the puzzle infeasible;
+    * a free cell with a single candidate forces it (unit propagation): the
+      candidates overlapping it are removed, and once all copies of its
+      piece are forced, the piece's other candidates too;
+    * a candidate that would cut off a pocket of uncovered cells smaller
+      than the smallest piece still to be placed is removed.
+
+    Under ``EXACTLY_ONE`` a piece with fewer placements left than copies to
+    place also proves infeasibility.  Returns a ``PruneResult``; its
+    ``stats`` give candidate variables and clauses (as ``PySatSolver``
+    would encode them with *encoding*) before and after, the number removed
+    and forced, and the rounds until the fixed point.
+    """
+    if not isinstance(encoding, CardinalityEncoding):
+        encoding = CardinalityEncoding(encoding)
+    pruner = _Pruner(puzzle).run()
+    exact = pruner.exact
+    counts = {piece_id: puzzle.piece_count(piece_id) for piece_id in pruner.piece_cands}
+
+    degrees = {}
+    piece_sizes = {}
+    for k, cells in enumerate(pruner.cells):
+        piece_sizes[pruner.pieces[k]] = piece_sizes.get(pruner.pieces[k], 0) + 1
+        for index in cells:
+            degrees[index] = degrees.get(index, 0) + 1
+    stats = {
+        'variables_before': len(pruner.cells),
+        'clauses_before': _formula_size(degrees.values(), piece_sizes, counts, exact, encoding),
+        'forced': len(pruner.forced),
+        'rounds': pruner.rounds,
+    }
+    if pruner.infeasibility is not None:
+        stats.update(variables_after=0, clauses_after=0)
+        stats['variables_removed'] = stats['variables_before']
+        stats['clauses_removed'] = stats['clauses_before']
+        return PruneResult(None, [], sorted(pruner.forced), stats, pruner.infeasibility)
+
+    # The reduced puzzle: forced cells become obstacles, forced copies leave the library.
+    width = puzzle.board.width
+    board = Board(width, puzzle.board.height)
+    board.add_obstacles(list(puzzle.board.obstacles))
+    board.add_obstacles([divmod(index, width) for index in sorted(pruner.covered)])
+    library = {}
+    for piece_id, piece in puzzle.piece_library.items():
+        left = pruner.remaining.get(piece_id, 0)
+        if left > 0 and pruner.piece_cands.get(piece_id):
+            piece = copy.copy(piece)
+            piece.count = left
+            library[piece_id] = piece
+    kept = sorted(pruner.alive)  # each piece's candidates stay together
+    reduced = puzzle.restrict(board, library, kept)
+
+    after_cells = [len(cands) for index, cands in pruner.cell_cands.items() if index not in pruner.covered]
+    after_sizes = {piece_id: len(pruner.piece_cands[piece_id]) for piece_id in library}
+    stats['variables_after'] = len(kept)
+    stats['clauses_after'] = _formula_size(after_cells, after_sizes, pruner.remaining, exact, encoding)
+    stats['variables_removed'] = stats['variables_before'] - stats['variables_after']
+    stats['clauses_removed'] = stats['clauses_before'] - stats['clauses_after']
+    return PruneResult(reduced, kept, sorted(pruner.forced), stats)
+
+
+class PruningSolver(Solver):
+    """
+    Runs ``prune_candidates`` before handing the puzzle to another solver.
+
+    The *solver_factory* solver searches the reduced puzzle; its solutions
+    are mapped back, forced placements added, so that candidates are those
+    of the original puzzle in candidate order.  After a solve
+    ``prune_stats`` holds the pruning statistics.
+    """
+
+    def __init__(self, solver_factory=PySatSolver):
+        self.solver_factory = solver_factory
+        self.prune_stats = None
+
+    def iter_solutions(self, puzzle, **kwargs):
+        """
+        Lazily yield every solution of *puzzle*.
+
+        Accepts the inner solver's options; ``blocked_solutions`` and
+        ``symmetry`` are applied to the mapped solutions, and ``cnf_cache``
+        is not used (the reduced puzzle differs from request to request).
+        """
+        self.infeasibility = find_infeasibility(puzzle)
+        if self.infeasibility is not None:
+            logger.info("Puzzle is infeasible (%s): %s",
+                        self.infeasibility.check, self.infeasibility.message)
+            return
+        limits = kwargs.get('limits', None)
+        if limits is not None:
+            limits.start()
+            if not limits.check():
+                return
+        pruned = prune_candidates(puzzle, kwargs.get('encoding', None))
+        self.prune_stats = pruned.stats
+        logger.info("Pruning removed %d of %d candidates and %d of %d clauses, forced %d, in %d rounds",
+                    pruned.stats['variables_removed'], pruned.stats['variables_before'],
+                    pruned.stats['clauses_removed'], pruned.stats['clauses_before'],
+                    pruned.stats['forced'], pruned.stats['rounds'])
+        if pruned.infeasibility is not None:
+            self.infeasibility = pruned.infeasibility
+            return
+
+        accepted = SolutionFilter(puzzle, kwargs.get('blocked_solutions', None), kwargs.get('symmetry', None))
+        inner_kwargs = {key: value for key, value in kwargs.items()
+                        if key not in ('cnf_cache', 'blocked_solutions', 'symmetry')}
+        if not pruned.kept:
+            # Forcing covered the whole board.
+            solution = accepted.accept(pruned.forced)
+            if solution is not None:
+                yield solution
+            return
+        inner = self.solver_factory()
+        iterator = inner.iter_solutions(pruned.puzzle, **inner_kwargs)
+        try:
+            for solution in iterator:
+                solution = accepted.accept(pruned.solution([cand.index for cand in solution]))
+                if solution is not None:
+                    yield solution
+        finally:
+            iterator.close()
+            self.infeasibility = inner.infeasibility
@@ -0,0 +1,107 @@
+from functools import lru_cache
+
+from pysat.card import CardEnc, EncType
+
+# Encodings selectable by name.  ``native`` is left out: it only works with
+# the minicard engine, which the solvers here never pick.
+ENCODINGS = {
+    'pairwise': EncType.pairwise,
+    'seqcounter': EncType.seqcounter,
+    'ladder': EncType.ladder,
+    'bitwise': EncType.bitwise,
+    'sortnetwrk': EncType.sortnetwrk,
+    'cardnetwrk': EncType.cardnetwrk,
+    'totalizer': EncType.totalizer,
+    'mtotalizer': EncType.mtotalizer,
+    'kmtotalizer': EncType.kmtotalizer,
+}
+
+# These only encode bounds of 1; larger bounds fall back to seqcounter.
+_BOUND_ONE_ONLY = {EncType.pairwise, EncType.ladder, EncType.bitwise}
+
+DEFAULT_ENCODING = 'auto'
+
+# "auto" thresholds.  Pairwise needs no auxiliary variables and is the
+# smallest encoding up to five literals; beyond that the sequential counter
+# is the smallest at-most/exactly-one encoding by clauses + variables.  For
+# larger bounds the sequential counter grows with n * bound, while the
+# k-modulo totalizer stays well below it once that product is large.
+AUTO_PAIRWISE_MAX_LITERALS = 5
+AUTO_TOTALIZER_MIN_PRODUCT = 4096
+
+
+class CardinalityEncoding:
+    """
+    Chooses the ``pysat.card.EncType`` for each cardinality constraint.
+
+    *name* is ``'auto'`` or one of ``ENCODINGS``.  A fixed encoding is used
+    for every constraint it supports.  ``'auto'`` picks one per constraint
+    from its number of literals and its bound (see the thresholds above).
+    ``usage`` counts how many constraints each encoding was chosen for.
+    """
+
+    def __init__(self, name=DEFAULT_ENCODING):
+        name = (name or DEFAULT_ENCODING).lower()
+        if name != 'auto' and name not in ENCODINGS:
+            raise ValueError(
+                f"Unknown cardinality encoding '{name}'. "
+                f"Expected 'auto' or one of: {', '.join(ENCODINGS)}."
+            )
+        self.name = name
+        self.usage = {}
+
+    def choose(self, n_literals, bound):
+        """Return the ``EncType`` value to encode a bound over *n_literals*."""
+        if self.name == 'auto':
+            if bound == 1 and n_literals <= AUTO_PAIRWISE_MAX_LITERALS:
+                encoding = EncType.pairwise
+            elif bound > 1 and n_literals * bound >= AUTO_TOTALIZER_MIN_PRODUCT:
+                encoding = EncType.kmtotalizer
+            else:
+                encoding = EncType.seqcounter
+        else:
+            encoding = ENCODINGS[self.name]
+            if bound > 1 and encoding in _BOUND_ONE_ONLY:
+                encoding = EncType.seqcounter
+        self.usage[encoding] = self.usage.get(encoding, 0) + 1
+        return encoding
+
+    def usage_by_name(self):
+        """``usage`` keyed by encoding name, for reporting."""
+        names = {value: name for name, value in ENCODINGS.items()}
+        return {names[encoding]: count for encoding, count in sorted(self.usage.items())}
+
+    def clause_count(self, n_literals, bound, exact):
+        """
+        Number of clauses ``choose`` would produce for a constraint over
+        *n_literals* (``equals`` when *exact*, else ``atmost``), without
+        building the formula it belongs to.
+        """
+        return _clause_count(n_literals, bound, exact, self.choose(n_literals, bound))
+
+
+def _seqcounter_atmost_clauses(n, bound):
+    """Clauses of pysat's sequential counter for ``atmost(n, bound)``."""
+    if bound == 0:
+        return n
+    if bound >= n:
+        return 0
+    if bound == n - 1:
+        return 1
+    return (2 * bound + 1) * n - 2 * bound * (bound + 1)
+
+
+@lru_cache(maxsize=4096)
+def _clause_count(n_literals, bound, exact, encoding):
+    # Closed forms for the encodings "auto" picks for small bounds, which
+    # are also the ones whose formulas get large; the others are built.
+    if encoding == EncType.pairwise and bound == 1:
+        return n_literals * (n_literals - 1) // 2 + (1 if exact else 0)
+    if encoding == EncType.seqcounter and bound > 0:
+        clauses = _seqcounter_atmost_clauses(n_literals, bound)
+        if exact:  # atleast(bound) is atmost(n - bound) over the negations
+            clauses += _seqcounter_atmost_clauses(n_literals, n_literals - bound)
+        return clauses
+    lits = list(range(1, n_literals + 1))
+    encode = CardEnc.equals if exact else CardEnc.atmost
+    return len(encode(lits=lits, bound=bound, encoding=encoding, top_id=n_literals).clauses)
@@ -0,0 +1,244 @@
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.board import Board
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.Presolve import find_infeasibility
+from backend.PySatSolver import PySatSolver
+from backend.SolveLimits import SolveLimits
+from backend.Solver import SolutionFilter, Solver
+
+logger = logging.getLogger(__name__)
+
+
+class _SolutionStream:
+    """
+    A solution generator whose items are kept, so it can be iterated again.
+
+    The cross-product of several regions re-reads every region but the
+    first once per combination; each region is still searched only once,
+    and only as far as the product has got.
+    """
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self.items = []
+        self.done = False
+
+    def get(self, n):
+        """Solution number *n*, searching further if needed; ``None`` past the end."""
+        while len(self.items) <= n and not self.done:
+            try:
+                self.items.append(next(self._iterator))
+            except StopIteration:
+                self.done = True
+        return self.items[n] if n < len(self.items) else None
+
+    def __iter__(self):
+        n = 0
+        while True:
+            item = self.get(n)
+            if item is None:
+                return
+            yield item
+            n += 1
+
+    def close(self):
+        self._iterator.close()
+
+
+class DecomposedSolver(Solver):
+    """
+    Solves each connected region of the board on its own.
+
+    When obstacles cut the free cells into several regions, a piece placed
+    in one region has no effect on another except through the piece
+    budget.  An outer search allocates pieces to regions -- a multiset per
+    region whose areas add up to its size, within each piece's ``count``
+    (and using every copy under ``EXACTLY_ONE``) -- and every region is then
+    an ``EXACTLY_ONE`` sub-puzzle over its own candidates, solved by a
+    separate *solver_factory* solver.  Region solutions are combined lazily
+    as a cross-product, so a board of k regions with n solutions each costs
+    about k * n searches rather than an n ** k enumeration in one formula.
+
+    With *max_workers* > 1 the regions of an allocation are started in
+    parallel threads (PySAT releases the GIL while searching under
+    ``SolveLimits``).  Boards with a single region, and pieces that are not
+    connected (they could straddle regions), go straight to the inner solver.
+    Candidates in the solutions are those of the original puzzle, in
+    candidate order.
+    """
+
+    def __init__(self, solver_factory=PySatSolver, max_workers=1):
+        self.solver_factory = solver_factory
+        self.max_workers = max_workers
+        self.allocations = 0  # allocations tried in the last enumeration
+
+    # ── regions and allocations ─────────────────────────────────────────────
+
+    @staticmethod
+    def _region_candidates(puzzle, components):
+        """
+        Per region, the candidate numbers of each piece inside it, or
+        ``None`` if some candidate straddles two regions.
+        """
+        region_at = {cell: r for r, cells in enumerate(components) for cell in cells}
+        by_region = [{} for _ in components]
+        for k, (piece_id, orient, (base_i, base_j)) in enumerate(puzzle.iter_placements()):
+            regions = {region_at[(base_i + di, base_j + dj)] for di, dj in orient}
+            if len(regions) > 1:
+                return None
+            by_region[regions.pop()].setdefault(piece_id, []).append(k)
+        return by_region
+
+    @staticmethod
+    def _fillings(size, pieces, areas, remaining):
+        """Multisets (``{piece: copies}``) of *pieces* whose areas add up to *size*."""
+        def fill(i, left, chosen):
+            if left == 0:
+                yield dict(chosen)
+                return
+            if i == len(pieces):
+                return
+            if sum(areas[p] * remaining[p] for p in pieces[i:]) < left:
+                return
+            piece_id = pieces[i]
+            most = min(remaining[piece_id], left // areas[piece_id])
+            for n in range(most, -1, -1):
+                if n:
+                    chosen[piece_id] = n
+                yield from fill(i + 1, left - n * areas[piece_id], chosen)
+                chosen.pop(piece_id, None)
+        return fill(0, size, {})
+
+    def _allocations(self, sizes, region_pieces, areas, counts, exact):
+        """Yield one multiset of pieces per region, as a list."""
+        def allocate(r, remaining):
+            left = sum(sizes[r:])
+            available = sum(areas[p] * n for p, n in remaining.items())
+            if available < left or (exact and available != left):
+                return
+            if r == len(sizes):
+                yield []
+                return
+            for filling in self._fillings(sizes[r], region_pieces[r], areas, remaining):
+                rest = dict(remaining)
+                for piece_id, n in filling.items():
+                    rest[piece_id] -= n
+                for tail in allocate(r + 1, rest):
+                    yield [filling] + tail
+        return allocate(0, dict(counts))
+
+    # ── solving ─────────────────────────────────────────────────────────────
+
+    def _region_stream(self, puzzle, cells, filling, candidates, kwargs):
+        """Lazy solutions of the region *cells* with the pieces in *filling*."""
+        board = Board(puzzle.board.width, puzzle.board.height)
+        inside = set(cells)
+        board.add_obstacles(list(puzzle.board.obstacles))
+        board.add_obstacles([cell for cell in puzzle.board.cells() if cell not in inside])
+        library = {}
+        numbers = []
+        for piece_id, n in filling.items():
+            piece = copy.copy(puzzle.piece_library[piece_id])
+            piece.count = n
+            library[piece_id] = piece
+            numbers.extend(candidates[piece_id])
+        sub = puzzle.restrict(board, library, numbers, PieceUsagePolicy.EXACTLY_ONE)
+
+        def solutions():
+            iterator = self.solver_factory().iter_solutions(sub, **kwargs)
+            try:
+                for solution in iterator:
+                    yield [numbers[cand.index] for cand in solution]
+            finally:
+                iterator.close()
+        return _SolutionStream(solutions())
+
+    def _product(self, streams, limits):
+        """Lazy cross-product of region solutions, as merged candidate-number lists."""
+        def combine(i, prefix):
+            if i == len(streams):
+                yield prefix
+                return
+            for part in streams[i]:
+                if limits is not None and limits.stop_reason is not None:
+                    return
+                yield from combine(i + 1, prefix + part)
+        return combine(0, [])
+
+    def _prime(self, streams, pool):
+        """Find the first solution of every region (in parallel with a *pool*); False if one has none."""
+        if pool is not None:
+            return all(found is not None for found in pool.map(lambda s: s.get(0), streams))
+        return all(stream.get(0) is not None for stream in streams)
+
+    def iter_solutions(self, puzzle, **kwargs):
+        """
+        Lazily yield every solution, region by region.
+
+        Accepts the inner solver's options; ``limits`` is shared by all
+        regions, ``blocked_solutions`` and ``symmetry`` are applied to the
+        combined solutions, and ``cnf_cache`` is only used when the board is
+        not decomposed (region sub-puzzles are not cached).
+        """
+        limits = kwargs.get('limits', None)
+        components = puzzle.board.connected_components()
+        by_region = self._region_candidates(puzzle, components) if len(components) > 1 else None
+        if by_region is None:
+            inner = self.solver_factory()
+            try:
+                yield from inner.iter_solutions(puzzle, **kwargs)
+            finally:
+                self.infeasibility = inner.infeasibility
+            return
+
+        self.infeasibility = find_infeasibility(puzzle)
+        if self.infeasibility is not None:
+            logger.info("Puzzle is infeasible (%s): %s",
+                        self.infeasibility.check, self.infeasibility.message)
+            return
+
+        if limits is None and self.max_workers > 1:
+            limits = SolveLimits()  # solve_limited lets region threads run concurrently
+        if limits is not None:
+            limits.start()
+        accepted = SolutionFilter(puzzle, kwargs.get('blocked_solutions', None), kwargs.get('symmetry', None))
+        inner_kwargs = {key: value for key, value in kwargs.items()
+                        if key not in ('cnf_cache', 'blocked_solutions', 'symmetry')}
+        inner_kwargs['limits'] = limits
+
+        exact = puzzle.piece_usage_policy == PieceUsagePolicy.EXACTLY_ONE
+        areas = {piece_id: len(piece.get_offsets()) for piece_id, piece in puzzle.piece_library.items()}
+        placeable = {piece_id for region in by_region for piece_id in region}
+        counts = {piece_id: puzzle.piece_count(piece_id) for piece_id in placeable}
+        region_pieces = [sorted(region, key=lambda p: (-areas[p], str(p))) for region in by_region]
+        sizes = [len(cells) for cells in components]
+
+        streams = {}  # (region, allocated pieces) -> _SolutionStream
+        pool = ThreadPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        self.allocations = 0
+        try:
+            for allocation in self._allocations(sizes, region_pieces, areas, counts, exact):
+                if limits is not None and not limits.check():
+                    return
+                self.allocations += 1
+                regions = []
+                for r, filling in enumerate(allocation):
+                    key = (r, tuple(sorted(filling.items(), key=lambda item: str(item[0]))))
+                    if key not in streams:
+                        streams[key] = self._region_stream(
+                            puzzle, components[r], filling, by_region[r], inner_kwargs)
+                    regions.append(streams[key])
+                if not self._prime(regions, pool):
+                    continue
+                for numbers in self._product(regions, limits):
+                    solution = accepted.accept(numbers)
+                    if solution is not None:
+                        yield solution
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            for stream in streams.values():
+                stream.close()
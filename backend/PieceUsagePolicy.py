@@ -2,5 +2,12 @@ from enum import Enum
 
 
 class PieceUsagePolicy(Enum):
+    """
+    How often each piece may appear in a solution.
+
+    For a piece with ``count`` copies, ``EXACTLY_ONE`` requires all copies to
+    be placed and ``AT_MOST_ONE`` allows up to ``count`` of them.
+    """
+
     EXACTLY_ONE = "exactly_one"
     AT_MOST_ONE = "at_most_one"
\ No newline at end of file
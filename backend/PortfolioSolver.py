@@ -0,0 +1,238 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from pysat.solvers import Solver as PySATSolverEngine
+
+from backend.PySatSolver import FALLBACK_ENGINES, PySatSolver
+from backend.SolveLimits import STOP_CONFLICT_BUDGET, STOP_PROPAGATION_BUDGET
+
+logger = logging.getLogger(__name__)
+
+# Engines raced when no portfolio is given.
+DEFAULT_PORTFOLIO = ('glucose4', 'cadical153', 'minisat22')
+
+# Per-worker race state, set by _init_worker.  The clauses travel with the
+# process arguments (inherited for free under fork) instead of with every
+# submitted task.
+_cancel_event = None
+_clauses = None
+
+
+def _init_worker(cancel_event, clauses):
+    global _cancel_event, _clauses
+    _cancel_event = cancel_event
+    _clauses = clauses
+
+
+def _interrupt_on_cancel(engine, finished):
+    """Interrupt *engine* once the race is decided elsewhere."""
+    while not finished.is_set():
+        if _cancel_event.wait(0.05):
+            try:
+                engine.interrupt()
+            except NotImplementedError:
+                pass  # e.g. CaDiCaL; the parent terminates the process instead
+            return
+
+
+def _race_engine(label, engine_kwargs, num_cands, budgets=None):
+    """
+    Worker: run one engine on the race's clauses and report its answer and timing.
+
+    Engines that support it are interrupted cooperatively when another
+    engine wins; the rest are terminated by the parent after a grace period.
+    *budgets* maps ``conf_budget``/``prop_budget`` to limits for this run;
+    an engine that exhausts one reports status ``budget``.
+    """
+    start = time.perf_counter()
+    try:
+        engine = PySATSolverEngine(bootstrap_with=_clauses, **engine_kwargs)
+    except TypeError:
+        engine_kwargs = {k: v for k, v in engine_kwargs.items() if k != 'threads'}
+        engine = PySATSolverEngine(bootstrap_with=_clauses, **engine_kwargs)
+
+    finished = threading.Event()
+    with engine as s:
+        for setter, budget in (budgets or {}).items():
+            try:
+                getattr(s, setter)(budget)
+            except NotImplementedError:
+                pass
+        watcher = threading.Thread(target=_interrupt_on_cancel, args=(s, finished), daemon=True)
+        watcher.start()
+        try:
+            status = s.solve_limited(expect_interrupt=True)
+        finally:
+            finished.set()
+        model = None
+        if status:
+            model = [v for v in s.get_model() if 0 < v <= num_cands]
+    if status is None:
+        outcome = 'cancelled' if _cancel_event.is_set() else 'budget'
+    else:
+        outcome = 'sat' if status else 'unsat'
+    return {
+        'engine': label,
+        'status': outcome,
+        'seconds': time.perf_counter() - start,
+        'model': model,
+    }
+
+
+class PortfolioSolver(PySatSolver):
+    """
+    Races several SAT engines (or configurations) on the same CNF.
+
+    Each entry of *engines* is an engine name or a dict of
+    ``pysat.solvers.Solver`` keyword arguments with a ``name`` (and an
+    optional ``label``).  The first answer is found by running every entry
+    in its own process of a ``ProcessPoolExecutor``; as soon as one of them
+    proves the formula satisfiable or unsatisfiable the others are
+    cancelled.  Further solutions are then enumerated in-process with the
+    winning engine.
+
+    After each race ``timings`` lists, per entry, its label, outcome
+    (``sat``, ``unsat``, ``cancelled``, ``budget`` or ``error``) and
+    wall-clock seconds, and ``winner`` names the entry that answered first.
+
+    ``SolveLimits`` apply to the race as well: every engine is cancelled at
+    the deadline or on the token, and each gets the search budgets.
+    """
+
+    def __init__(self, engines=DEFAULT_PORTFOLIO, grace=0.2):
+        super().__init__()
+        self.engines = [self._engine_config(entry) for entry in engines]
+        if not self.engines:
+            raise ValueError("A portfolio needs at least one engine.")
+        labels = [label for label, _ in self.engines]
+        if len(set(labels)) != len(labels):
+            raise ValueError("Portfolio entries need distinct labels.")
+        self.grace = grace
+        self.timings = []
+        self.winner = None
+
+    @staticmethod
+    def _engine_config(entry):
+        """Return ``(label, engine kwargs)`` for a portfolio entry."""
+        if isinstance(entry, str):
+            return entry, {'name': entry}
+        config = dict(entry)
+        label = config.pop('label', None) or config['name']
+        return label, config
+
+    def race(self, clauses, num_cands, threads=None, limits=None):
+        """
+        Run every engine on *clauses* and return the first decisive result.
+
+        Returns the winning worker's result dict (``status`` ``'sat'`` with a
+        ``model`` of selected candidate variables, or ``'unsat'``), or
+        ``None`` if every engine failed or *limits* stopped the race (then
+        ``limits.stop_reason`` says why).
+        """
+        budgets = {}
+        if limits is not None:
+            if limits.conflict_budget is not None:
+                budgets['conf_budget'] = limits.conflict_budget
+            if limits.propagation_budget is not None:
+                budgets['prop_budget'] = limits.propagation_budget
+        cancel = multiprocessing.Event()
+        executor = ProcessPoolExecutor(max_workers=len(self.engines),
+                                       initializer=_init_worker, initargs=(cancel, clauses))
+        start = time.perf_counter()
+        futures = {}
+        for label, config in self.engines:
+            engine_kwargs = dict(config)
+            if isinstance(threads, int) and threads > 1:
+                engine_kwargs.setdefault('threads', threads)
+            futures[executor.submit(_race_engine, label, engine_kwargs, num_cands, budgets)] = label
+
+        results = {}
+        winner = None
+        try:
+            pending = set(futures)
+            while pending and winner is None:
+                if limits is not None and not limits.check():
+                    break
+                done, pending = wait(pending, timeout=0.05 if limits is not None else None,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = result = self._result_of(future, futures[future], start)
+                    if winner is None and result['status'] in ('sat', 'unsat'):
+                        winner = result
+
+            # Cancel the losers: cooperative interrupt first, then terminate.
+            cancel.set()
+            if pending:
+                done, pending = wait(pending, timeout=self.grace)
+                for future in done:
+                    results[futures[future]] = self._result_of(future, futures[future], start)
+            for future in pending:
+                results[futures[future]] = {
+                    'engine': futures[future], 'status': 'cancelled',
+                    'seconds': time.perf_counter() - start, 'model': None,
+                }
+            if pending:
+                for process in list(getattr(executor, '_processes', {}).values()):
+                    if process.is_alive():
+                        process.terminate()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self.timings = [
+            {key: results[label][key] for key in ('engine', 'status', 'seconds')}
+            for label, _ in self.engines
+        ]
+        self.winner = winner['engine'] if winner else None
+        if winner is None and limits is not None and any(t['status'] == 'budget' for t in self.timings):
+            limits.stop(STOP_CONFLICT_BUDGET if 'conf_budget' in budgets else STOP_PROPAGATION_BUDGET)
+        logger.info("Portfolio race won by %s: %s", self.winner,
+                    ", ".join(f"{t['engine']}={t['status']}/{t['seconds']:.3f}s" for t in self.timings))
+        return winner
+
+    @staticmethod
+    def _result_of(future, label, start):
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Portfolio engine %s failed: %s", label, e)
+            return {'engine': label, 'status': 'error', 'seconds': time.perf_counter() - start, 'model': None}
+
+    def iter_solutions(self, puzzle, **kwargs):
+        threads = kwargs.get('threads', None)
+
+        search = self._prepare_search(puzzle, kwargs)
+        if search is None:
+            return
+
+        limits = search.limits
+        first = self.race(search.clauses + search.blocking, search.num_cands, threads, limits)
+        if first is None:
+            if limits is not None and limits.stop_reason is not None:
+                return
+            raise RuntimeError("Every portfolio engine failed.")
+        if first['status'] == 'unsat':
+            return
+
+        selected = [puzzle.candidates[v - 1] for v in first['model']]
+        if first['model']:
+            search.blocking.append([-v for v in first['model']])
+        new = True
+        if search.symmetry is not None:
+            key = search.symmetry.canonical_key(selected)
+            new = key not in search.seen
+            search.seen.add(key)
+        if new:
+            yield selected
+        if not first['model']:
+            return
+
+        # Keep enumerating in-process with the engine that won the race.
+        label, config = next(entry for entry in self.engines if entry[0] == first['engine'])
+        solver_kwargs = dict(config, bootstrap_with=search.clauses)
+        if isinstance(threads, int) and threads > 1:
+            solver_kwargs['threads'] = threads
+        engines = [config['name']] + [n for n in FALLBACK_ENGINES if n != config['name']]
+        yield from self._search_engines(puzzle, solver_kwargs, engines, search)
@@ -0,0 +1,238 @@
+import logging
+from math import gcd
+
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.utils import iter_bits
+
+logger = logging.getLogger(__name__)
+
+# Names of the checks, as reported in ``Infeasibility.check``.
+CHECK_COVERAGE = 'coverage'
+CHECK_AREA = 'area'
+CHECK_PARITY = 'parity'
+CHECK_COMPONENT = 'component'
+CHECK_COLORING = 'coloring'
+
+# The area/coloring subset-sum runs over (piece copies) x (free cells)
+# states; beyond this many it is skipped rather than slowing the solve down.
+MAX_SUBSET_SUM_STATES = 2_000_000
+
+
+class Infeasibility:
+    """Why a puzzle has no solution: the failed ``check`` and a readable ``message``."""
+
+    def __init__(self, check, message):
+        self.check = check
+        self.message = message
+
+    def to_dict(self):
+        return {'check': self.check, 'message': self.message}
+
+    def __repr__(self):
+        return f"Infeasibility({self.check!r}, {self.message!r})"
+
+
+def _grid_masks(puzzle):
+    """``(free, black, not_first_col, not_last_col)`` masks over linear cell indices."""
+    board = puzzle.board
+    width = board.width
+    free = black = first_col = last_col = 0
+    for i in range(board.height):
+        for j in range(width):
+            bit = 1 << (i * width + j)
+            if (i, j) not in board.obstacles:
+                free |= bit
+            if (i + j) % 2 == 0:
+                black |= bit
+            if j == 0:
+                first_col |= bit
+            if j == width - 1:
+                last_col |= bit
+    full = (1 << (width * board.height)) - 1
+    return free, black, full & ~first_col, full & ~last_col
+
+
+def _components(free, width, not_first_col, not_last_col):
+    """Masks of the 4-connected components of the cells in *free*."""
+    components = []
+    remaining = free
+    while remaining:
+        component = remaining & -remaining
+        while True:
+            grown = (component
+                     | ((component << 1) & not_first_col)
+                     | ((component >> 1) & not_last_col)
+                     | (component << width)
+                     | (component >> width)) & free
+            if grown == component:
+                break
+            component = grown
+        components.append(component)
+        remaining &= ~component
+    return components
+
+
+def _imbalance(mask, black):
+    """Black minus white cells of *mask* on the checkerboard colouring."""
+    return 2 * (mask & black).bit_count() - mask.bit_count()
+
+
+def _offsets_imbalance(orient):
+    """Black minus white cells of an orientation anchored on a black cell."""
+    return sum(1 if (di + dj) % 2 == 0 else -1 for di, dj in orient)
+
+
+def _is_connected(orient):
+    cells = set(orient)
+    stack = [next(iter(cells))]
+    seen = {stack[0]}
+    while stack:
+        i, j = stack.pop()
+        for cell in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+            if cell in cells and cell not in seen:
+                seen.add(cell)
+                stack.append(cell)
+    return len(seen) == len(cells)
+
+
+def _subset_sums(items, limit, optional=True):
+    """
+    Reachable ``(area, imbalance)`` totals of *items*.
+
+    Each item is ``(area, imbalances)`` -- one piece copy and the
+    checkerboard imbalances its placements can have.  With *optional* an
+    item may be left out, otherwise every item is used.  Returns
+    ``(reach, offset)``: *reach* maps each reachable total area up to
+    *limit* to a bitmask whose bit ``offset + d`` is set when imbalance *d*
+    is reachable with it.
+    """
+    offset = sum(max(abs(d) for d in imbalances) for _, imbalances in items)
+    reach = {0: 1 << offset}
+    for area, imbalances in items:
+        step = dict(reach) if optional else {}
+        for total, mask in reach.items():
+            new_total = total + area
+            if new_total > limit:
+                continue
+            shifted = 0
+            for d in imbalances:
+                shifted |= mask << d if d >= 0 else mask >> -d
+            step[new_total] = step.get(new_total, 0) | shifted
+        reach = step
+    return reach, offset
+
+
+def _check_sums(items, target_area, target_imbalance, optional, where, area_check):
+    """
+    Subset-sum checks of one region: its area fails *area_check*, its
+    colouring ``CHECK_COLORING``.  Returns ``None`` if both pass.
+    """
+    if len(items) * (target_area + 1) > MAX_SUBSET_SUM_STATES:
+        logger.debug("Skipping subset-sum checks of %s: %d piece copies over %d cells",
+                     where, len(items), target_area)
+        return None
+    reach, offset = _subset_sums(items, target_area, optional)
+    mask = reach.get(target_area)
+    if mask is None:
+        return Infeasibility(
+            area_check,
+            f"No combination of the piece areas adds up to the {target_area} free cells of {where}.")
+    if offset + target_imbalance < 0 or not (mask >> (offset + target_imbalance)) & 1:
+        return Infeasibility(
+            CHECK_COLORING,
+            f"On a checkerboard colouring {where} has {target_imbalance:+d} more black than white "
+            f"cells, which no combination of the pieces can match.")
+    return None
+
+
+def find_infeasibility(puzzle):
+    """
+    Cheap necessary conditions for *puzzle* to have a solution.
+
+    Runs on the generated candidates, before any CNF is built, and returns
+    the first failed check as an ``Infeasibility`` (``None`` when all pass,
+    which does not prove that a solution exists):
+
+    * coverage: every free cell is covered by some candidate;
+    * area: the areas of the pieces that fit somewhere can add up to the
+      number of free cells (exactly, under ``EXACTLY_ONE``);
+    * parity: the gcd of the piece areas divides the number of free cells;
+    * component: every connected region of free cells can be filled by a
+      subset of the pieces that fit inside it;
+    * coloring: on a checkerboard colouring, the black/white imbalance of
+      the board (and of each region) is reachable from the imbalances of
+      the pieces' placements.
+    """
+    uncoverable = puzzle.uncoverable_cells()
+    if uncoverable:
+        return Infeasibility(
+            CHECK_COVERAGE,
+            f"No piece can cover cell{'s' if len(uncoverable) > 1 else ''} "
+            f"{', '.join(str(tuple(cell)) for cell in sorted(uncoverable)[:5])}"
+            f"{' ...' if len(uncoverable) > 5 else ''}.")
+
+    free, black, not_first_col, not_last_col = _grid_masks(puzzle)
+    n_free = free.bit_count()
+    exact = puzzle.piece_usage_policy == PieceUsagePolicy.EXACTLY_ONE
+
+    # Per piece: the placement imbalances on the board and per region.
+    width = puzzle.board.width
+    components = _components(free, width, not_first_col, not_last_col)
+    region_at = {}
+    for region, component in enumerate(components):
+        for index in iter_bits(component):
+            region_at[index] = region
+    shapes = {}             # orientation -> (imbalance on a black anchor, first cell)
+    imbalances = {}         # piece -> set of placement imbalances
+    region_imbalances = {}  # (piece, region) -> set of placement imbalances
+    for piece_id, orient, (base_i, base_j) in puzzle.iter_placements():
+        shape = shapes.get(orient)
+        if shape is None:
+            shape = shapes[orient] = (_offsets_imbalance(orient), orient[0])
+        d = shape[0] if (base_i + base_j) % 2 == 0 else -shape[0]
+        imbalances.setdefault(piece_id, set()).add(d)
+        region = region_at[(base_i + shape[1][0]) * width + base_j + shape[1][1]]
+        region_imbalances.setdefault((piece_id, region), set()).add(d)
+    # A disconnected piece could straddle two regions.
+    spanning = not all(_is_connected(orient) for orient in shapes)
+
+    areas = {piece_id: len(piece.get_offsets()) for piece_id, piece in puzzle.piece_library.items()}
+    # Like the solvers, pieces without any placement are left out.
+    total = sum(areas[p] * puzzle.piece_count(p) for p in imbalances)
+    if exact:
+        if total != n_free:
+            return Infeasibility(
+                CHECK_AREA, f"The pieces cover {total} cells but the board has {n_free} free cells.")
+    elif total < n_free:
+        return Infeasibility(
+            CHECK_AREA, f"The pieces cover at most {total} cells but the board has {n_free} free cells.")
+
+    divisor = 0
+    for piece_id in imbalances:
+        divisor = gcd(divisor, areas[piece_id])
+    if divisor > 1 and n_free % divisor:
+        return Infeasibility(
+            CHECK_PARITY,
+            f"Every piece covers a multiple of {divisor} cells but the board has {n_free} free cells.")
+
+    items = [
+        (areas[piece_id], sorted(ds))
+        for piece_id, ds in imbalances.items()
+        for _ in range(puzzle.piece_count(piece_id))
+    ]
+    found = _check_sums(items, n_free, _imbalance(free, black), not exact, 'the board', CHECK_AREA)
+    if found is not None or len(components) < 2 or spanning:
+        return found
+
+    for region, component in enumerate(components):
+        cell = divmod((component & -component).bit_length() - 1, puzzle.board.width)
+        items = [
+            (areas[piece_id], sorted(ds))
+            for (piece_id, r), ds in region_imbalances.items() if r == region
+            for _ in range(puzzle.piece_count(piece_id))
+        ]
+        found = _check_sums(items, component.bit_count(), _imbalance(component, black), True,
+                            f"the region at {cell}", CHECK_COMPONENT)
+        if found is not None:
+            return found
+    return None
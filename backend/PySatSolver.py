@@ -4,11 +4,48 @@ from pysat.card import CardEnc
 from pysat.formula import CNF
 from pysat.solvers import Solver as PySATSolverEngine
 
+from backend.BoardSymmetry import BoardSymmetry
+from backend.CardinalityEncoding import CardinalityEncoding
+from backend.CNFCache import CompiledCNF
 from backend.Solver import Solver
 from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.Presolve import find_infeasibility
+from backend.utils import iter_bits
 
 logger = logging.getLogger(__name__)
 
+# Engines tried, in order, when the requested one raises.
+FALLBACK_ENGINES = ('cadical153', 'minisat22')
+
+
+def cnf_stats(clauses, nv, num_cands, encoding):
+    """Size of a CNF: clause, variable and literal counts plus the encoding used."""
+    return {
+        'encoding': encoding,
+        'clauses': len(clauses),
+        'literals': sum(len(clause) for clause in clauses),
+        'variables': max(nv, num_cands),
+        'candidate_variables': num_cands,
+        'auxiliary_variables': max(nv - num_cands, 0),
+    }
+
+
+class SearchState:
+    """
+    Everything an enumeration needs besides the engine: the compiled
+    clauses, the candidate count, the blocking clauses (shared across
+    engines), the symmetry filter with the canonical keys already seen, and
+    the optional ``SolveLimits``.
+    """
+
+    def __init__(self, clauses, num_cands, blocking, symmetry, seen, limits=None):
+        self.clauses = clauses
+        self.num_cands = num_cands
+        self.blocking = blocking
+        self.symmetry = symmetry
+        self.seen = seen
+        self.limits = limits
+
 
 class PySatSolver(Solver):
     """
@@ -16,125 +53,282 @@ class PySatSolver(Solver):
 
     Translates a TilingPuzzle's candidates into a CNF formula with:
       (1) Board coverage constraints (each cell covered exactly once).
-      (2) Piece usage constraints (at-most-one or exactly-one per piece).
-    Then solves via configurable PySAT engines (glucose4, cadical, minisat22).
+      (2) Piece usage constraints (at most / exactly ``count`` placements
+          per piece, ``count`` being 1 unless the piece says otherwise).
+    Then solves via configurable PySAT engines (glucose4, cadical, minisat22),
+    yielding each model as soon as the engine finds it.
+
+    The cardinality encoding of both constraint families is configurable
+    (``encoding``: ``'auto'`` or a ``pysat.card.EncType`` name, see
+    ``CardinalityEncoding``).  After each solve ``cnf_stats`` holds the
+    size of the formula that was used, for comparing strategies.
+
+    Before encoding, ``find_infeasibility`` rules out puzzles that fail a
+    cheap necessary condition (area, parity, region sizes, checkerboard
+    colouring); ``infeasibility`` then says which one and no CNF is built.
     """
 
-    def solve(self, puzzle, max_solutions=1, **kwargs):
-        solver_name = kwargs.get('solver_name', 'glucose4')
-        threads = kwargs.get('threads', None)
+    def __init__(self):
+        self.cnf_stats = None
+        self.infeasibility = None
 
-        # ── normalise max_solutions ──────────────────────────────────────
-        unlimited = False
-        if max_solutions is None:
-            unlimited = True
-        else:
-            try:
-                unlimited = int(max_solutions) <= 0
-            except Exception:
-                unlimited = False
-        if not unlimited and max_solutions < 1:
-            max_solutions = 1
+    @staticmethod
+    def _variable_maps(puzzle):
+        """
+        Group candidate variables by cell and by piece.
 
-        # ── build variable mapping ───────────────────────────────────────
-        var_counter = 1
-        cand_to_var = {}
-        var_to_cand = {}
+        Compact puzzles are keyed by linear cell index and read straight from
+        the candidate bitmasks; regular puzzles are keyed by ``(i, j)``.
+        """
         cell_to_vars = {}
         piece_to_vars = {}
+        if puzzle.compact:
+            for k, mask in enumerate(puzzle.iter_candidate_masks()):
+                for index in iter_bits(mask):
+                    cell_to_vars.setdefault(index, []).append(k + 1)
+            for piece_id, indices in puzzle.piece_to_indices.items():
+                if indices:
+                    piece_to_vars[piece_id] = [k + 1 for k in indices]
+        else:
+            for k, cand in enumerate(puzzle.candidates):
+                for cell in cand.cells:
+                    cell_to_vars.setdefault(cell, []).append(k + 1)
+                piece_to_vars.setdefault(cand.piece_id, []).append(k + 1)
+        return cell_to_vars, piece_to_vars
 
-        for cand in puzzle.candidates:
-            cand_to_var[id(cand)] = var_counter
-            var_to_cand[var_counter] = cand
-            for cell in cand.cells:
-                cell_to_vars.setdefault(cell, []).append(var_counter)
-            piece_to_vars.setdefault(cand.piece_id, []).append(var_counter)
-            var_counter += 1
+    def build_cnf(self, puzzle, encoding=None):
+        """
+        Encode *puzzle* as CNF.
 
-        # ── check coverage feasibility ───────────────────────────────────
-        unsat_due_to_coverage = False
-        for cell in puzzle.board.cells():
-            if cell not in cell_to_vars:
-                unsat_due_to_coverage = True
-                logger.warning("No candidate covers cell %s", cell)
+        *encoding* is a ``CardinalityEncoding`` or its name (default
+        ``'auto'``) and selects how each cardinality constraint is encoded.
 
-        if unsat_due_to_coverage:
-            if max_solutions == 1 and not unlimited:
-                return None
-            return []
+        Returns ``(cnf, num_cands)`` where candidate number k is variable
+        k + 1, or ``None`` when the puzzle is trivially unsatisfiable (it
+        fails a pre-solve check, see ``infeasibility``, or under
+        ``EXACTLY_ONE`` a piece has fewer placements than copies).
+        """
+        # ── pre-solve infeasibility checks ───────────────────────────────
+        self.infeasibility = find_infeasibility(puzzle)
+        if self.infeasibility is not None:
+            logger.info("Puzzle is infeasible (%s): %s",
+                        self.infeasibility.check, self.infeasibility.message)
+            return None
+
+        # ── build variable mapping ───────────────────────────────────────
+        # Candidate number k is variable k + 1.
+        num_cands = len(puzzle.candidates)
+        var_counter = num_cands + 1
+        cell_to_vars, piece_to_vars = self._variable_maps(puzzle)
 
         # ── build CNF ────────────────────────────────────────────────────
+        if not isinstance(encoding, CardinalityEncoding):
+            encoding = CardinalityEncoding(encoding)
         cnf = CNF()
 
         # (1) Board coverage: each cell exactly one candidate
         for cell in puzzle.board.cells():
-            var_list = cell_to_vars.get(cell, [])
+            key = puzzle.cell_index(cell) if puzzle.compact else cell
+            var_list = cell_to_vars.get(key, [])
             if var_list:
-                enc = CardEnc.equals(lits=var_list, bound=1, encoding=1,
+                enc = CardEnc.equals(lits=var_list, bound=1,
+                                     encoding=encoding.choose(len(var_list), 1),
                                      top_id=var_counter)
                 cnf.extend(enc.clauses)
-                var_counter = enc.nv + 1
+                # enc.nv is 0 when no auxiliary variables were introduced
+                var_counter = max(var_counter, enc.nv + 1)
 
-        # (2) Piece usage
+        # (2) Piece usage: at most / exactly `count` placements per piece
         for piece_id, var_list in piece_to_vars.items():
             if var_list:
+                count = puzzle.piece_count(piece_id)
                 if puzzle.piece_usage_policy == PieceUsagePolicy.EXACTLY_ONE:
-                    enc = CardEnc.equals(lits=var_list, bound=1, encoding=1,
+                    if count > len(var_list):
+                        logger.warning("Piece %s has %d copies but only %d placements",
+                                       piece_id, count, len(var_list))
+                        return None
+                    enc = CardEnc.equals(lits=var_list, bound=count,
+                                         encoding=encoding.choose(len(var_list), count),
                                          top_id=var_counter)
+                elif count >= len(var_list):
+                    continue  # the bound can never be exceeded
                 else:  # AT_MOST_ONE (default)
-                    enc = CardEnc.atmost(lits=var_list, bound=1, encoding=1,
+                    enc = CardEnc.atmost(lits=var_list, bound=count,
+                                         encoding=encoding.choose(len(var_list), count),
                                          top_id=var_counter)
                 cnf.extend(enc.clauses)
-                var_counter = enc.nv + 1
+                # enc.nv is 0 when no auxiliary variables were introduced
+                var_counter = max(var_counter, enc.nv + 1)
             else:
                 logger.warning("No candidate placement for piece %s", piece_id)
 
-        # ── solve ────────────────────────────────────────────────────────
-        solutions = []
-
-        def enumerate_solutions(solver):
-            nonlocal solutions
-            while (unlimited or len(solutions) < max_solutions) and solver.solve():
-                model = solver.get_model()
-                selected = []
-                selected_vars = []
-                for v in model:
-                    if v > 0 and v in var_to_cand:
-                        selected.append(var_to_cand[v])
-                        selected_vars.append(v)
-                solutions.append(selected)
-                if selected_vars:
-                    solver.add_clause([-v for v in selected_vars])
-                else:
-                    break
-
-        solver_kwargs = {'name': solver_name, 'bootstrap_with': cnf.clauses}
-        if isinstance(threads, int) and threads > 1:
-            solver_kwargs['threads'] = threads
+        self.cnf_stats = cnf_stats(cnf.clauses, cnf.nv, num_cands, encoding.name)
+        self.cnf_stats['encodings'] = encoding.usage_by_name()
+        logger.debug("CNF for %d candidates: %d clauses, %d variables, encodings %s",
+                     num_cands, self.cnf_stats['clauses'], self.cnf_stats['variables'],
+                     self.cnf_stats['encodings'])
+        return cnf, num_cands
 
-        def run_solver(kwargs):
-            try:
-                with PySATSolverEngine(**kwargs) as s:
-                    enumerate_solutions(s)
-            except TypeError:
-                # Fallback if the underlying solver doesn't support 'threads'
-                kwargs.pop('threads', None)
-                with PySATSolverEngine(**kwargs) as s:
-                    enumerate_solutions(s)
+    @staticmethod
+    def _enumerate_models(solver_kwargs, blocking, puzzle, num_cands, symmetry=None, seen=None, limits=None):
+        """
+        Yield solutions from one engine, blocking each one before it is yielded.
 
+        *blocking* is shared across engines: a fallback engine starts with the
+        clauses of every solution already produced, so no solution is emitted
+        twice.  With a *symmetry*, solutions whose canonical key is already in
+        *seen* are blocked without being yielded.  With *limits* (a
+        ``SolveLimits``) every call is ``solve_limited`` and the enumeration
+        ends quietly, with ``limits.stop_reason`` set, once a limit is hit.
+        """
         try:
-            run_solver(solver_kwargs)
-        except Exception as e:
-            logger.warning("Solver %s failed: %s", solver_kwargs.get('name'), e)
+            engine = PySATSolverEngine(**solver_kwargs)
+        except TypeError:
+            # Fallback if the underlying solver doesn't support 'threads'
+            if solver_kwargs.pop('threads', None) is not None:
+                logger.info("Engine %s does not support threads; running single-threaded",
+                            solver_kwargs.get('name'))
+            engine = PySATSolverEngine(**solver_kwargs)
+
+        with engine as s:
+            for clause in blocking:
+                s.add_clause(clause)
+            finished = limits.watch(s) if limits is not None else None
+            try:
+                yield from PySatSolver._models(s, blocking, puzzle, num_cands, symmetry, seen, limits)
+            finally:
+                if limits is not None:
+                    finished.set()
+                    limits.engine_finished(s)
+
+    @staticmethod
+    def _models(s, blocking, puzzle, num_cands, symmetry, seen, limits):
+        """The model loop of ``_enumerate_models`` on an open engine *s*."""
+        while True:
+            if limits is None:
+                status = s.solve()
+            elif not (limits.check() and limits.apply_budgets(s)):
+                return
+            else:
+                status = s.solve_limited(expect_interrupt=True)
+                if status is None:
+                    limits.interrupted(s)
+                    return
+            if not status:
+                return
+            model = s.get_model()
+            selected = []
+            selected_vars = []
+            for v in model:
+                if 0 < v <= num_cands:
+                    selected.append(puzzle.candidates[v - 1])
+                    selected_vars.append(v)
+            if not selected_vars:
+                yield selected
+                return
+            block = [-v for v in selected_vars]
+            blocking.append(block)
+            if symmetry is not None:
+                key = symmetry.canonical_key(selected)
+                if key in seen:
+                    s.add_clause(block)
+                    continue
+                seen.add(key)
+            yield selected
+            s.add_clause(block)
+
+    def _cached_clauses(self, puzzle, cnf_cache, encoding=None):
+        """
+        Return ``(clauses, num_cands)`` for *puzzle*, consulting *cnf_cache*.
+
+        On a miss the CNF is built and stored together with the puzzle's
+        candidate table, so a later ``CNFCache.load_puzzle`` can skip
+        candidate generation as well.  Returns ``None`` if the puzzle is
+        trivially unsatisfiable.
+        """
+        if not isinstance(encoding, CardinalityEncoding):
+            encoding = CardinalityEncoding(encoding)
+        self.infeasibility = None
+        if cnf_cache is None:
+            compiled = self.build_cnf(puzzle, encoding)
+            return None if compiled is None else (compiled[0].clauses, compiled[1])
+
+        key = cnf_cache.key_for(puzzle, encoding.name)
+        cached = cnf_cache.get(key)
+        if cached is not None and cached.num_cands == len(puzzle.candidates):
+            self.cnf_stats = cnf_stats(cached.clauses, cached.nv, cached.num_cands, encoding.name)
+            return cached.clauses, cached.num_cands
+
+        compiled = self.build_cnf(puzzle, encoding)
+        if compiled is None:
+            return None
+        cnf, num_cands = compiled
+        cnf_cache.put(key, CompiledCNF.from_puzzle(puzzle, cnf))
+        return cnf.clauses, num_cands
+
+    def _prepare_search(self, puzzle, kwargs):
+        """
+        Compile *puzzle* and the blocking/symmetry state for an enumeration.
+
+        Returns a ``SearchState``, or ``None`` when the puzzle is trivially
+        unsatisfiable.
+        """
+        cnf_cache = kwargs.get('cnf_cache', None)
+        # Solutions (lists of candidate numbers) that must not be produced
+        # again, e.g. because a caller already holds them.
+        blocked_solutions = kwargs.get('blocked_solutions', None) or []
+        # A BoardSymmetry (or True to derive one): enumerate only one
+        # solution per class of rotated/reflected tilings.
+        symmetry = kwargs.get('symmetry', None)
+        # Cardinality encoding strategy: 'auto' or a pysat.card.EncType name.
+        encoding = kwargs.get('encoding', None)
+        # SolveLimits: time limit, search budgets and cancellation token.
+        limits = kwargs.get('limits', None)
+        if limits is not None:
+            limits.start()
+
+        compiled = self._cached_clauses(puzzle, cnf_cache, encoding)
+        if compiled is None:
+            return None
+        clauses, num_cands = compiled
+
+        blocking = [[-(k + 1) for k in sol] for sol in blocked_solutions if sol]
+        seen = set()
+        if symmetry is True:
+            symmetry = BoardSymmetry(puzzle)
+        if symmetry is not None and symmetry.order > 1:
+            blocking.extend([-(k + 1)] for k in symmetry.forbidden_candidates())
+            for sol in blocked_solutions:
+                seen.add(symmetry.canonical_key([puzzle.candidates[k] for k in sol]))
+        else:
+            symmetry = None
+        return SearchState(clauses, num_cands, blocking, symmetry, seen, limits)
+
+    def _search_engines(self, puzzle, solver_kwargs, engines, search):
+        """Enumerate with the first of *engines* that does not raise."""
+        for attempt, name in enumerate(engines):
+            solver_kwargs['name'] = name
             try:
-                solver_kwargs['name'] = 'cadical'
-                run_solver(solver_kwargs)
-            except Exception as e2:
-                logger.warning("Solver cadical failed: %s", e2)
-                solver_kwargs['name'] = 'minisat22'
-                run_solver(solver_kwargs)
-
-        # ── return ───────────────────────────────────────────────────────
-        if not unlimited and max_solutions == 1:
-            return solutions[0] if solutions else None
-        return solutions
+                yield from self._enumerate_models(solver_kwargs, search.blocking, puzzle, search.num_cands,
+                                                  search.symmetry, search.seen, search.limits)
+                return
+            except Exception as e:
+                if attempt == len(engines) - 1:
+                    raise
+                logger.warning("Solver %s failed: %s", name, e)
+
+    def iter_solutions(self, puzzle, **kwargs):
+        solver_name = kwargs.get('solver_name', 'glucose4')
+        threads = kwargs.get('threads', None)
+
+        search = self._prepare_search(puzzle, kwargs)
+        if search is None:
+            return
+
+        solver_kwargs = {'name': solver_name, 'bootstrap_with': search.clauses}
+        if isinstance(threads, int) and threads > 1:
+            solver_kwargs['threads'] = threads
+
+        # ── solve, falling back to other engines on failure ──────────────
+        engines = [solver_name] + [n for n in FALLBACK_ENGINES if n != solver_name]
+        yield from self._search_engines(puzzle, solver_kwargs, engines, search)
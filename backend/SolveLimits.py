@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Why a limited search stopped early.
+STOP_TIMEOUT = 'timeout'
+STOP_CANCELLED = 'cancelled'
+STOP_CONFLICT_BUDGET = 'conflict_budget'
+STOP_PROPAGATION_BUDGET = 'propagation_budget'
+
+
+class CancellationToken:
+    """
+    A flag another thread sets to ask a running solve to stop.
+
+    Solvers poll ``cancelled`` between steps and SAT engines are
+    interrupted through ``SolveLimits.watch`` as soon as it is set.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until cancelled or *timeout* seconds pass; returns ``cancelled``."""
+        return self._event.wait(timeout)
+
+
+class SolveLimits:
+    """
+    Wall-clock and search budgets for one solve, plus its cancellation token.
+
+    *time_limit* is in seconds and counts from the first ``start`` call.
+    *conflict_budget* and *propagation_budget* cap the SAT engine's
+    conflicts/propagations over the whole enumeration (across engine
+    fallbacks too); they are enforced with PySAT's ``conf_budget`` /
+    ``prop_budget`` and ``solve_limited``, where the engine supports them.
+
+    A solver that stops because of a limit sets ``stop_reason`` (one of the
+    ``STOP_*`` constants) and ends its enumeration normally, so whatever was
+    yielded so far is a valid partial result.  ``stop_reason`` stays
+    ``None`` when the search finished on its own.
+    """
+
+    def __init__(self, time_limit=None, conflict_budget=None, propagation_budget=None, token=None):
+        self.time_limit = time_limit
+        self.conflict_budget = conflict_budget
+        self.propagation_budget = propagation_budget
+        self.token = token or CancellationToken()
+        self.stop_reason = None
+        self.deadline = None
+        self._spent = {'conflicts': 0, 'propagations': 0}
+
+    def start(self):
+        """Start the clock (idempotent)."""
+        if self.deadline is None and self.time_limit is not None:
+            self.deadline = time.monotonic() + self.time_limit
+        return self
+
+    def remaining_time(self):
+        """Seconds left before the deadline, or ``None`` without a time limit."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def stop(self, reason):
+        if self.stop_reason is None:
+            self.stop_reason = reason
+        return False
+
+    def check(self):
+        """
+        Whether the search may continue; records the reason when it may not.
+
+        Solvers call this between steps (e.g. between models).
+        """
+        if self.stop_reason is not None:
+            return False
+        if self.token.cancelled:
+            return self.stop(STOP_CANCELLED)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return self.stop(STOP_TIMEOUT)
+        return True
+
+    # ── SAT engine integration ──────────────────────────────────────────────
+
+    @staticmethod
+    def _engine_stats(engine):
+        try:
+            return engine.accum_stats() or {}
+        except (AttributeError, NotImplementedError):
+            return {}
+
+    def apply_budgets(self, engine):
+        """
+        Give *engine* what is left of the search budgets before a
+        ``solve_limited`` call.  Returns False when a budget is already spent.
+        """
+        stats = self._engine_stats(engine)
+        for budget, key, setter, reason in (
+            (self.conflict_budget, 'conflicts', 'conf_budget', STOP_CONFLICT_BUDGET),
+            (self.propagation_budget, 'propagations', 'prop_budget', STOP_PROPAGATION_BUDGET),
+        ):
+            if budget is None:
+                continue
+            remaining = budget - self._spent[key] - stats.get(key, 0)
+            if remaining <= 0:
+                return self.stop(reason)
+            try:
+                getattr(engine, setter)(remaining)
+            except NotImplementedError:
+                logger.info("Engine does not support %s; %s budget not enforced", setter, key)
+        return True
+
+    def engine_finished(self, engine):
+        """Add an engine's counters to the totals before it is discarded."""
+        stats = self._engine_stats(engine)
+        for key in self._spent:
+            self._spent[key] += stats.get(key, 0)
+
+    def interrupted(self, engine):
+        """Record why ``solve_limited`` on *engine* returned ``None``."""
+        if self.check():
+            stats = self._engine_stats(engine)
+            if (self.conflict_budget is not None
+                    and self._spent['conflicts'] + stats.get('conflicts', 0) >= self.conflict_budget):
+                self.stop(STOP_CONFLICT_BUDGET)
+            else:
+                self.stop(STOP_PROPAGATION_BUDGET)
+        return False
+
+    def watch(self, engine):
+        """
+        Interrupt *engine* when the deadline passes or the token is cancelled.
+
+        Returns a ``threading.Event``; set it once the engine is done so the
+        watcher thread exits.  Engines that cannot be interrupted (CaDiCaL)
+        are then only stopped between models.
+        """
+        finished = threading.Event()
+
+        def run():
+            while not finished.is_set():
+                remaining = self.remaining_time()
+                timeout = 0.05 if remaining is None else min(remaining, 0.05)
+                if self.token.wait(timeout) or (remaining is not None and remaining <= 0):
+                    if not finished.is_set():
+                        try:
+                            engine.interrupt()
+                        except (NotImplementedError, AttributeError):
+                            pass  # cannot be interrupted, or already deleted
+                    return
+
+        threading.Thread(target=run, daemon=True).start()
+        return finished
@@ -1,16 +1,101 @@
 from abc import ABC, abstractmethod
 
 
+def normalize_max_solutions(max_solutions):
+    """
+    Interpret a ``max_solutions`` argument.
+
+    Returns ``(unlimited, max_solutions)`` where *unlimited* is True for
+    ``None`` or values ``<= 0``; otherwise *max_solutions* is at least 1.
+    """
+    unlimited = False
+    if max_solutions is None:
+        unlimited = True
+    else:
+        try:
+            unlimited = int(max_solutions) <= 0
+        except Exception:
+            unlimited = False
+    if not unlimited and max_solutions < 1:
+        max_solutions = 1
+    return unlimited, max_solutions
+
+
+class SolutionFilter:
+    """
+    Applies ``blocked_solutions`` and ``symmetry`` to finished solutions.
+
+    For solvers that assemble solutions from sub-puzzles and so cannot hand
+    these options to an engine: ``accept`` takes a solution as candidate
+    numbers of *puzzle* and returns it as ``CandidatePlacement`` objects in
+    candidate order, or ``None`` if it is blocked or symmetric to one
+    already accepted (or blocked).
+    """
+
+    def __init__(self, puzzle, blocked_solutions=None, symmetry=None):
+        self.puzzle = puzzle
+        self.blocked = {tuple(sorted(sol)) for sol in blocked_solutions or []}
+        if symmetry is True:
+            from backend.BoardSymmetry import BoardSymmetry
+            symmetry = BoardSymmetry(puzzle)
+        self.symmetry = symmetry if symmetry is not None and symmetry.order > 1 else None
+        self.seen = set()
+        if self.symmetry is not None:
+            for sol in self.blocked:
+                self.seen.add(self.symmetry.canonical_key([puzzle.candidates[k] for k in sol]))
+
+    def accept(self, numbers):
+        numbers = sorted(numbers)
+        if tuple(numbers) in self.blocked:
+            return None
+        solution = [self.puzzle.candidates[k] for k in numbers]
+        if self.symmetry is not None:
+            key = self.symmetry.canonical_key(solution)
+            if key in self.seen:
+                return None
+            self.seen.add(key)
+        return solution
+
+
 class Solver(ABC):
     """
     Abstract base class for tiling puzzle solvers.
 
-    Subclasses must implement the `solve` method, which receives a
+    Subclasses must implement `iter_solutions`, a generator that receives a
     `TilingPuzzle` (containing the board, piece library, candidates, and
-    cell/piece mappings) and returns solutions.
+    cell/piece mappings) and yields solutions one at a time as they are
+    found.  `solve` collects from it.
+
+    Solvers that rule a puzzle out before searching set `infeasibility` to
+    the ``Presolve.Infeasibility`` explaining why.
     """
 
+    infeasibility = None
+
     @abstractmethod
+    def iter_solutions(self, puzzle, **kwargs):
+        """
+        Lazily enumerate solutions of the tiling puzzle.
+
+        Parameters
+        ----------
+        puzzle : TilingPuzzle
+            A fully-initialised puzzle instance (board + candidates already
+            generated).
+        **kwargs :
+            Solver-specific options (e.g. ``threads`` for SAT solvers).
+            ``limits`` (a ``SolveLimits``) bounds the search; when a limit
+            stops it the generator ends early and ``limits.stop_reason``
+            says why.
+
+        Yields
+        ------
+        list
+            One solution at a time, as a list of CandidatePlacement.  Closing
+            the generator stops the search and releases solver resources.
+        """
+        ...
+
     def solve(self, puzzle, max_solutions=1, **kwargs):
         """
         Solve the tiling puzzle.
@@ -34,4 +119,18 @@ class Solver(ABC):
             When *max_solutions* == 1: a single solution list, or ``None``.
             Otherwise: a list of solution lists (may be empty).
         """
-        ...
+        unlimited, max_solutions = normalize_max_solutions(max_solutions)
+
+        solutions = []
+        iterator = self.iter_solutions(puzzle, **kwargs)
+        try:
+            for solution in iterator:
+                solutions.append(solution)
+                if not unlimited and len(solutions) >= max_solutions:
+                    break
+        finally:
+            iterator.close()
+
+        if not unlimited and max_solutions == 1:
+            return solutions[0] if solutions else None
+        return solutions
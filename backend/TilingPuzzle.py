@@ -1,12 +1,48 @@
 import logging
+from array import array
 
 from backend.CandidatePlacement import CandidatePlacement
 from backend.PieceUsagePolicy import PieceUsagePolicy
 from backend.board import Board
+from backend.utils import iter_bits, piece_count
+
+try:  # optional: vectorised anchor search
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
 
 logger = logging.getLogger(__name__)
 
 
+class CompactCandidateView:
+    """
+    Read-only sequence over the candidates of a compact ``TilingPuzzle``.
+
+    ``CandidatePlacement`` objects are only materialised when an element is
+    accessed, so code that merely needs ``len(puzzle.candidates)`` or a few
+    selected candidates never pays for the full object list.
+    """
+
+    def __init__(self, puzzle):
+        self._puzzle = puzzle
+
+    def __len__(self):
+        return len(self._puzzle.candidate_anchors)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self._puzzle.get_candidate(i) for i in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("candidate index out of range")
+        return self._puzzle.get_candidate(k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self._puzzle.get_candidate(k)
+
+
 class TilingPuzzle:
     """
     Represents an instance of a tiling puzzle.
@@ -16,22 +52,180 @@ class TilingPuzzle:
       - Generates all candidate placements on the board (for all orientations).
       - Exposes mappings from board cells and piece IDs to their candidates.
 
+    A piece with ``count > 1`` stands for that many identical copies; its
+    candidates are generated once and ``piece_count`` gives the bound the
+    solvers enforce for it.
+
+    With ``compact=True`` each candidate is instead an integer bitmask over
+    the linear cell index ``i * width + j`` (see ``cell_index``).  Only two
+    flat integer arrays are kept per candidate -- an orientation number and
+    an anchor index -- and the mask is ``orientation_mask << anchor``.
+    ``candidates`` then becomes a lazy view and the per-cell dict lists are
+    not built; solvers work on the masks directly.
+
     Solving is delegated to a separate Solver implementation (e.g. PySatSolver,
     BacktrackingSolver) via the Solver interface.
     """
 
     def __init__(self, board: Board, piece_library: dict,
-                 piece_usage_policy: PieceUsagePolicy = PieceUsagePolicy.AT_MOST_ONE):
+                 piece_usage_policy: PieceUsagePolicy = PieceUsagePolicy.AT_MOST_ONE,
+                 compact: bool = False):
+        self._setup(board, piece_library, piece_usage_policy, compact)
+        self._generate_candidates()
+
+    @classmethod
+    def from_candidate_table(cls, board: Board, piece_library: dict,
+                             piece_usage_policy: PieceUsagePolicy,
+                             orientation_table, orientation_ids, anchors):
+        """
+        Build a compact puzzle from a previously generated candidate table.
+
+        *orientation_table* holds ``(piece_id, orientation)`` rows and each
+        candidate is a row number plus a linear anchor index, exactly as
+        stored by a compact puzzle.  Candidate generation is skipped.
+        """
+        puzzle = cls.__new__(cls)
+        puzzle._setup(board, piece_library, piece_usage_policy, compact=True)
+        for piece_id, orient in orientation_table:
+            puzzle.orientation_table.append((piece_id, orient, puzzle._orientation_mask(orient)))
+        puzzle.candidate_orientation_ids = array('I', orientation_ids)
+        puzzle.candidate_anchors = array('I', anchors)
+
+        bounds = {}
+        for k, oid in enumerate(puzzle.candidate_orientation_ids):
+            piece_id = puzzle.orientation_table[oid][0]
+            start, _ = bounds.get(piece_id, (k, k))
+            bounds[piece_id] = (start, k + 1)
+        for piece_id in piece_library:
+            start, stop = bounds.get(piece_id, (0, 0))
+            puzzle.piece_to_indices[piece_id] = range(start, stop)
+        return puzzle
+
+    def _setup(self, board, piece_library, piece_usage_policy, compact):
         self.board = board
         self.piece_library = piece_library  # e.g., {"a": Piece(...), "b": Piece(...), ...}
         self.piece_usage_policy = piece_usage_policy
-        self.candidates = []  # List of CandidatePlacement objects.
+        self.compact = compact
+        self._free_grid = None  # numpy bool grid of free cells, built on demand
 
         # Maps for solvers to consume:
         self.cell_to_cands = {}   # board cell -> list of CandidatePlacement
         self.piece_to_cands = {}  # piece key  -> list of CandidatePlacement
 
-        self._generate_candidates()
+        if compact:
+            # One entry per (piece, orientation): (piece key, orientation, mask at index 0).
+            self.orientation_table = []
+            # Flat per-candidate arrays, indexed by candidate number.
+            self.candidate_orientation_ids = array('I')  # row in orientation_table
+            self.candidate_anchors = array('I')          # linear index of the anchor cell
+            self.piece_to_indices = {}  # piece key -> range of candidate numbers
+            self.obstacle_mask = self._mask_of(board.obstacles)
+            self.free_mask = ((1 << (board.width * board.height)) - 1) & ~self.obstacle_mask
+            self.candidates = CompactCandidateView(self)
+        else:
+            self.candidates = []  # List of CandidatePlacement objects.
+
+    def piece_count(self, piece_id):
+        """Number of copies of *piece_id* the piece usage policy applies to."""
+        return piece_count(self.piece_library[piece_id])
+
+    # ── linear cell indexing (compact mode) ─────────────────────────────────
+
+    def cell_index(self, cell):
+        """Linear index of board cell ``(i, j)``."""
+        i, j = cell
+        return i * self.board.width + j
+
+    def cell_at(self, index):
+        """Board cell ``(i, j)`` for a linear index."""
+        return divmod(index, self.board.width)
+
+    def _orientation_mask(self, orient):
+        """Mask of an orientation anchored at linear index 0."""
+        width = self.board.width
+        mask = 0
+        for di, dj in orient:
+            mask |= 1 << (di * width + dj)
+        return mask
+
+    def _mask_of(self, cells):
+        mask = 0
+        for cell in cells:
+            mask |= 1 << self.cell_index(cell)
+        return mask
+
+    def cells_of_mask(self, mask):
+        """Board cells ``(i, j)`` whose bits are set in *mask*, in index order."""
+        return [self.cell_at(k) for k in iter_bits(mask)]
+
+    def get_candidate(self, k):
+        """Return candidate number *k* as a ``CandidatePlacement``."""
+        if not self.compact:
+            return self.candidates[k]
+        piece_id, orient, _ = self.orientation_table[self.candidate_orientation_ids[k]]
+        candidate = CandidatePlacement(piece_id, orient, self.cell_at(self.candidate_anchors[k]))
+        candidate.index = k
+        return candidate
+
+    def placement(self, k):
+        """Candidate number *k* as ``(piece_id, orientation, (base_i, base_j))``."""
+        if not self.compact:
+            cand = self.candidates[k]
+            return cand.piece_id, cand.orientation, cand.position
+        piece_id, orient, _ = self.orientation_table[self.candidate_orientation_ids[k]]
+        return piece_id, orient, self.cell_at(self.candidate_anchors[k])
+
+    def iter_placements(self):
+        """Yield ``placement(k)`` for every candidate, in candidate order."""
+        if not self.compact:
+            for cand in self.candidates:
+                yield cand.piece_id, cand.orientation, cand.position
+            return
+        table = self.orientation_table
+        for oid, anchor in zip(self.candidate_orientation_ids, self.candidate_anchors):
+            piece_id, orient, _ = table[oid]
+            yield piece_id, orient, self.cell_at(anchor)
+
+    def restrict(self, board, piece_library, candidate_numbers, piece_usage_policy=None):
+        """
+        A compact puzzle on *board* whose candidates are a subset of ours.
+
+        *candidate_numbers* must list each piece's candidates together;
+        candidate k of the result is candidate ``candidate_numbers[k]`` here.
+        *board* is typically this board with extra obstacles, so that the
+        result is a sub-region of this puzzle.
+        """
+        rows = {}
+        table = []
+        orientation_ids = []
+        anchors = []
+        for k in candidate_numbers:
+            piece_id, orient, (base_i, base_j) = self.placement(k)
+            row = rows.get((piece_id, orient))
+            if row is None:
+                row = rows[(piece_id, orient)] = len(table)
+                table.append((piece_id, orient))
+            orientation_ids.append(row)
+            anchors.append(base_i * board.width + base_j)
+        return TilingPuzzle.from_candidate_table(
+            board, piece_library, piece_usage_policy or self.piece_usage_policy,
+            table, orientation_ids, anchors)
+
+    def candidate_piece(self, k):
+        """Piece key of candidate number *k* (compact mode only)."""
+        return self.orientation_table[self.candidate_orientation_ids[k]][0]
+
+    def candidate_mask(self, k):
+        """Bitmask of the cells covered by candidate number *k* (compact mode only)."""
+        return self.orientation_table[self.candidate_orientation_ids[k]][2] << self.candidate_anchors[k]
+
+    def iter_candidate_masks(self):
+        """Yield every candidate's bitmask in candidate order (compact mode only)."""
+        table = self.orientation_table
+        for oid, anchor in zip(self.candidate_orientation_ids, self.candidate_anchors):
+            yield table[oid][2] << anchor
+
+    # ── candidate generation ────────────────────────────────────────────────
 
     def _is_valid_placement(self, orient, base_i, base_j):
         """Check if placing the given orientation at (base_i, base_j) is valid."""
@@ -44,6 +238,7 @@ class TilingPuzzle:
     def _add_candidate(self, piece_id, orient, base_i, base_j):
         """Create and register a candidate placement."""
         candidate = CandidatePlacement(piece_id, orient, (base_i, base_j))
+        candidate.index = len(self.candidates)
         self.candidates.append(candidate)
         # Update board cell mapping.
         for cell in candidate.cells:
@@ -51,6 +246,27 @@ class TilingPuzzle:
         # Update piece mapping.
         self.piece_to_cands[piece_id].append(candidate)
 
+    def _valid_anchor_arrays(self, orient, max_i, max_j):
+        """
+        Find every valid anchor for *orient* in one pass with NumPy.
+
+        The free-cell grid is shifted by each offset of the orientation and the
+        shifted windows are AND-ed together; an anchor survives only if every
+        covered cell is free.  Returns row and column index arrays in row-major
+        order, i.e. the same order as the scalar anchor loop.
+        """
+        if self._free_grid is None:
+            grid = np.ones((self.board.height, self.board.width), dtype=bool)
+            for i, j in self.board.obstacles:
+                grid[i, j] = False
+            self._free_grid = grid
+        rows = self.board.height - max_i
+        cols = self.board.width - max_j
+        valid = np.ones((rows, cols), dtype=bool)
+        for di, dj in orient:
+            valid &= self._free_grid[di:di + rows, dj:dj + cols]
+        return np.nonzero(valid)
+
     def _generate_candidates_for_orientation(self, piece_id, orient):
         """Generate all valid candidate placements for a specific piece orientation."""
         if not orient:
@@ -58,6 +274,14 @@ class TilingPuzzle:
 
         max_i = max(i for i, j in orient)
         max_j = max(j for i, j in orient)
+        if max_i >= self.board.height or max_j >= self.board.width:
+            return
+
+        if np is not None:
+            base_is, base_js = self._valid_anchor_arrays(orient, max_i, max_j)
+            for base_i, base_j in zip(base_is.tolist(), base_js.tolist()):
+                self._add_candidate(piece_id, orient, base_i, base_j)
+            return
 
         # For each anchor position where the piece fits on the board...
         for base_i in range(self.board.height - max_i):
@@ -65,12 +289,76 @@ class TilingPuzzle:
                 if self._is_valid_placement(orient, base_i, base_j):
                     self._add_candidate(piece_id, orient, base_i, base_j)
 
+    def _generate_compact_candidates_for_orientation(self, piece_id, orient):
+        """Bitmask counterpart of ``_generate_candidates_for_orientation``."""
+        if not orient:
+            return
+
+        width = self.board.width
+        max_i = max(i for i, j in orient)
+        max_j = max(j for i, j in orient)
+        orient_mask = self._orientation_mask(orient)
+
+        oid = len(self.orientation_table)
+        self.orientation_table.append((piece_id, orient, orient_mask))
+        if max_i >= self.board.height or max_j >= width:
+            return
+
+        if np is not None:
+            base_is, base_js = self._valid_anchor_arrays(orient, max_i, max_j)
+            anchors = (base_is * width + base_js).tolist()
+            self.candidate_orientation_ids.extend([oid] * len(anchors))
+            self.candidate_anchors.extend(anchors)
+            return
+
+        obstacle_mask = self.obstacle_mask
+        oids = self.candidate_orientation_ids
+        anchors = self.candidate_anchors
+        for base_i in range(self.board.height - max_i):
+            for base_j in range(width - max_j):
+                anchor = base_i * width + base_j
+                if (orient_mask << anchor) & obstacle_mask:
+                    continue
+                oids.append(oid)
+                anchors.append(anchor)
+
     def _generate_candidates(self):
         """
         For each piece in the library, generate all candidate placements on the board.
         """
         for piece_id, piece in self.piece_library.items():
+            if self.compact:
+                # A piece's candidates are contiguous, so a range indexes them.
+                start = len(self.candidate_anchors)
+                for orient in piece.get_orientations():
+                    self._generate_compact_candidates_for_orientation(piece_id, orient)
+                self.piece_to_indices[piece_id] = range(start, len(self.candidate_anchors))
+                continue
             # For this piece, keep track of candidates.
             self.piece_to_cands.setdefault(piece_id, [])
             for orient in piece.get_orientations():
                 self._generate_candidates_for_orientation(piece_id, orient)
+
+    # ── bitwise helpers (compact mode) ──────────────────────────────────────
+
+    def covered_mask(self, candidate_numbers):
+        """Union mask of the given candidates (compact mode only)."""
+        mask = 0
+        for k in candidate_numbers:
+            mask |= self.candidate_mask(k)
+        return mask
+
+    def conflicts(self, a, b):
+        """Whether candidates *a* and *b* overlap on at least one cell."""
+        if self.compact:
+            return bool(self.candidate_mask(a) & self.candidate_mask(b))
+        return not set(self.candidates[a].cells).isdisjoint(self.candidates[b].cells)
+
+    def uncoverable_cells(self):
+        """Free cells that no candidate covers."""
+        if self.compact:
+            covered = 0
+            for mask in self.iter_candidate_masks():
+                covered |= mask
+            return self.cells_of_mask(self.free_mask & ~covered)
+        return [cell for cell in self.board.cells() if cell not in self.cell_to_cands]
@@ -76,5 +76,31 @@ class Board:
         """
         return len(self.obstacles)
 
+    def connected_components(self):
+        """
+        Split the free cells into 4-connected regions.
+
+        Returns:
+            A list of regions, each a list of (i, j) cells in row-major
+            order; regions are ordered by their first cell.
+        """
+        free = set(self.cells())
+        components = []
+        for cell in self.cells():
+            if cell not in free:
+                continue
+            free.discard(cell)
+            component = [cell]
+            stack = [cell]
+            while stack:
+                i, j = stack.pop()
+                for neighbour in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+                    if neighbour in free:
+                        free.discard(neighbour)
+                        component.append(neighbour)
+                        stack.append(neighbour)
+            components.append(sorted(component))
+        return components
+
     def __str__(self):
         return f"Board({self.height} x {self.width})"
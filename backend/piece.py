@@ -9,12 +9,19 @@ class Piece:
     For example, to create a domino piece (covering 2 cells):
        Piece([(0, 0), (0, 1)], color="red")
 
+    ``count`` is the number of identical copies available.  A piece with
+    ``count=3`` generates its candidates once and the solvers allow up to
+    (or, under ``EXACTLY_ONE``, exactly) three of them in a solution.
+
     The internal offsets are based on a canonical position (imagine the piece
     placed at (0, 0) on an empty board).
     """
 
-    def __init__(self, coordinates, color="white"):
+    def __init__(self, coordinates, color="white", count=1):
+        if int(count) < 1:
+            raise ValueError("Piece count must be at least 1.")
         self.color = color
+        self.count = int(count)
         self.offsetValues = [tuple(coord) for coord in coordinates]
 
     def get_offsets(self):
@@ -35,4 +42,6 @@ class Piece:
         )
 
     def __str__(self):
+        if self.count != 1:
+            return f"Piece(color={self.color}, offsets={self.get_offsets()}, count={self.count})"
         return f"Piece(color={self.color}, offsets={self.get_offsets()})"
\ No newline at end of file
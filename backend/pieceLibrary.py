@@ -8,7 +8,8 @@ from backend.piece import Piece
 # NOTE: Some pieces below have identical shapes but different colors (e.g., a/c,
 # b/d, e/f/g/h in mainPieceLibrary). This is intentional — they represent
 # distinct game pieces that happen to share a shape. The solver's
-# group_equivalent_pieces() handles deduplication automatically at solve-time.
+# group_equivalent_pieces() merges them at solve-time into one shape with a
+# count (see Piece(count=...)), so the multiset of pieces is preserved.
 mainPieceLibrary = {
     "a" : Piece([(0, 0), (0, 1), (1, 1)], color="red"),
     "b" : Piece([(0, 0), (1, 0), (1, 1)], color="blue"),
@@ -1,4 +1,6 @@
 import logging
+import os
+import tempfile
 
 from backend.board import Board
 
@@ -143,6 +145,79 @@ def compute_orientations(offsets, allow_reflections=True, allow_rotations=True):
     return orientation_list
 
 
+def piece_count(piece):
+    """
+    How many copies of *piece* are available (its ``count``, default 1).
+
+    Pieces without a ``count`` attribute are treated as single copies.
+    """
+    count = getattr(piece, 'count', 1)
+    return 1 if count is None else int(count)
+
+
+def iter_bits(mask):
+    """Yield the indices of the set bits of a non-negative integer, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# ── File utilities ──────────────────────────────────────────────────────────
+
+def atomic_write_bytes(path, data):
+    """
+    Write *data* to *path* via a temporary file and ``os.replace``, so
+    concurrent readers never observe a partially written file.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def evict_lru_files(directory, suffix, max_bytes):
+    """
+    Delete the least recently modified ``*suffix`` files in *directory* until
+    their total size is at most *max_bytes*.  Readers bump an entry's mtime
+    (``os.utime``) to mark it as recently used.
+    """
+    entries = []
+    total = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
 # ── Display utilities ───────────────────────────────────────────────────────
 
 def print_solution_board(board: Board, solution, piece_library: dict, obstacles=None):
@@ -11,8 +11,10 @@ document.addEventListener('DOMContentLoaded', () => {
         editMode: 'obstacle',
         solution: null,
         solutions: [],
+        solutionVariants: [],
         currentSolutionIndex: 0,
         isSolving: false,
+        solveRequestId: null,
         designerPiece: {
             grid: [],
             cells: [],
@@ -33,6 +35,7 @@ document.addEventListener('DOMContentLoaded', () => {
         generateButton: document.getElementById('generate-board'),
         board: document.getElementById('board'),
         solveButton: document.getElementById('solve-button'),
+        stopButton: document.getElementById('stop-button'),
         clearButton: document.getElementById('clear-button'),
         randomButton: document.getElementById('random-obstacles'),
         resultMessage: document.getElementById('result-message'),
@@ -51,6 +54,7 @@ document.addEventListener('DOMContentLoaded', () => {
         libraryName: document.getElementById('library-name'),
         pieceId: document.getElementById('piece-id'),
         pieceColor: document.getElementById('piece-color'),
+        pieceCount: document.getElementById('piece-count'),
         pieceDesigner: document.getElementById('piece-designer'),
         pieceGridSize: document.getElementById('piece-grid-size'),
         clearPieceGridBtn: document.getElementById('clear-piece-grid'),
@@ -62,6 +66,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // Set up event listeners
         elements.generateButton.addEventListener('click', generateBoard);
         elements.solveButton.addEventListener('click', solvePuzzle);
+        elements.stopButton.addEventListener('click', stopSolving);
         elements.clearButton.addEventListener('click', clearBoard);
         elements.randomButton.addEventListener('click', addRandomObstacles);
         document.getElementById('prev-solution').addEventListener('click', prevSolution);
@@ -160,6 +165,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             // saved record includes full solutions payload already serialized for UI consumption
             state.solutions = record.solutions || [];
+            state.solutionVariants = [];
             state.currentSolutionIndex = 0;
             const current = getCurrentSolution();
             state.solution = current;
@@ -581,7 +587,7 @@ document.addEventListener('DOMContentLoaded', () => {
             // Add piece ID label
             const label = document.createElement('div');
             label.className = 'piece-label';
-            label.textContent = id;
+            label.textContent = piece.count > 1 ? `${id} \u00d7${piece.count}` : id;
             
             // Add delete button only for editable libraries and not in canonical view
             const libMeta = state.libraries[libraryId];
@@ -737,6 +743,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // Update the piece designer UI
     function updateDesignerUI() {
         const color = elements.pieceColor.value;
+        const count = parseInt(elements.pieceCount.value, 10) || 1;
         const cells = state.designerPiece.cells;
         
         // Update all cells in the designer
@@ -808,6 +815,7 @@ document.addEventListener('DOMContentLoaded', () => {
     function handleSavePiece() {
         const id = elements.pieceId.value.trim();
         const color = elements.pieceColor.value;
+        const count = parseInt(elements.pieceCount.value, 10) || 1;
         const cells = state.designerPiece.cells;
         
         // Validate inputs
@@ -825,7 +833,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const normalizedCells = normalizeCells(cells);
         
         // Create the piece
-        createPiece(state.currentLibrary, id, color, normalizedCells);
+        createPiece(state.currentLibrary, id, color, normalizedCells, count);
     }
 
     // Normalize cells for saving (shift to origin)
@@ -844,7 +852,7 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // Create a new piece
-    async function createPiece(libraryId, pieceId, color, cells) {
+    async function createPiece(libraryId, pieceId, color, cells, count = 1) {
         try {
             const response = await fetch(`/api/libraries/${libraryId}/pieces`, {
                 method: 'POST',
@@ -854,7 +862,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 body: JSON.stringify({
                     name: pieceId,
                     color: color,
-                    cells: cells
+                    cells: cells,
+                    count: count
                 })
             });
             
@@ -920,6 +929,8 @@ document.addEventListener('DOMContentLoaded', () => {
             state.isSolving = true;
             elements.solveButton.textContent = 'Solving...';
             elements.solveButton.classList.add('loading');
+            state.solveRequestId = null;
+            elements.stopButton.classList.remove('d-none');
             
             // Clear previous solution
             clearSolution();
@@ -942,14 +953,16 @@ document.addEventListener('DOMContentLoaded', () => {
                     return isNaN(v) || v < 1 ? undefined : v;
                 })(),
                 dedupe_equivalent: document.getElementById('dedupe-equivalent').checked,
+                break_symmetries: document.getElementById('break-symmetries').checked,
                 allow_reflections: document.getElementById('allow-reflections').checked,
                 allow_rotations: document.getElementById('allow-rotations').checked,
                 persist: document.getElementById('persist-solutions').checked,
                 save_name: document.getElementById('save-name').value || ''
             };
             
-            // Send solve request to the server
-            const response = await fetch('/api/solve', {
+            // Stream solutions from the server: each NDJSON line is an event,
+            // so the first tiling is shown while enumeration continues.
+            const response = await fetch('/api/solve/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -958,36 +971,93 @@ document.addEventListener('DOMContentLoaded', () => {
             });
             
             if (!response.ok) {
-                throw new Error('Failed to solve puzzle');
+                let message = 'Failed to solve puzzle';
+                try {
+                    const err = await response.json();
+                    if (err && err.message) message = err.message;
+                } catch (e) { /* non-JSON error body */ }
+                throw new Error(message);
             }
-            
-            const result = await response.json();
-            
-            if (result.success) {
-                // result.solutions is an array of solution arrays
-                state.solutions = Array.isArray(result.solutions) ? result.solutions : (result.solution ? [result.solution] : []);
-                state.currentSolutionIndex = 0;
-                updateSolutionNav();
-                const current = getCurrentSolution();
-                state.solution = current; // keep backwards compatibility in renderer
-                displaySolution(current);
-                let msg = `${state.solutions.length} solution(s) found.`;
-                if (result.saved) {
-                    msg += ` Saved (id: ${result.saved_id}).`;
-                } else if (result.saved === false && result.save_error) {
-                    msg += ` Save failed: ${result.save_error}`;
-                }
-                showMessage(msg, false);
-            } else {
+
+            const contentType = response.headers.get('Content-Type') || '';
+            if (!contentType.includes('application/x-ndjson')) {
+                // Early validation failures are returned as plain JSON
+                const result = await response.json();
                 showMessage(result.message || 'No solution found.', true);
+                return;
             }
+
+            state.solutions = [];
+            state.solutionVariants = [];
+            state.currentSolutionIndex = 0;
+            const handleEvent = (event) => {
+                if (event.type === 'start') {
+                    state.solveRequestId = event.request_id;
+                } else if (event.type === 'solution') {
+                    state.solutions.push(event.solution);
+                    state.solutionVariants.push(event.variants || null);
+                    if (state.solutions.length === 1) {
+                        const current = getCurrentSolution();
+                        state.solution = current; // keep backwards compatibility in renderer
+                        displaySolution(current);
+                    } else {
+                        updateSolutionNav();
+                    }
+                    showMessage(`${state.solutions.length} solution(s) found so far...`, false);
+                } else if (event.type === 'done') {
+                    if (event.success) {
+                        let msg = `${state.solutions.length} solution(s) found.`;
+                        if (event.stop_reason) {
+                            msg += ` Search stopped early (${event.stop_reason}).`;
+                        }
+                        if (event.saved) {
+                            msg += ` Saved (id: ${event.saved_id}).`;
+                        } else if (event.saved === false && event.save_error) {
+                            msg += ` Save failed: ${event.save_error}`;
+                        }
+                        showMessage(msg, false);
+                    } else {
+                        showMessage(event.message || 'No solution found.', true);
+                    }
+                } else if (event.type === 'error') {
+                    showMessage(event.message || 'Error solving puzzle.', true);
+                }
+            };
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (value) buffer += decoder.decode(value, { stream: !done });
+                let newline;
+                while ((newline = buffer.indexOf('\n')) >= 0) {
+                    const line = buffer.slice(0, newline).trim();
+                    buffer = buffer.slice(newline + 1);
+                    if (line) handleEvent(JSON.parse(line));
+                }
+                if (done) break;
+            }
+            if (buffer.trim()) handleEvent(JSON.parse(buffer));
         } catch (error) {
             console.error('Error solving puzzle:', error);
             showMessage('Error solving puzzle: ' + error.message, true);
         } finally {
             state.isSolving = false;
+            state.solveRequestId = null;
             elements.solveButton.textContent = 'Solve Puzzle';
             elements.solveButton.classList.remove('loading');
+            elements.stopButton.classList.add('d-none');
+        }
+    }
+
+    // Ask the server to stop the running solve; it ends with what it found
+    async function stopSolving() {
+        if (!state.isSolving || !state.solveRequestId) return;
+        try {
+            await fetch(`/api/solve/${encodeURIComponent(state.solveRequestId)}/cancel`, { method: 'POST' });
+        } catch (error) {
+            console.error('Error stopping solve:', error);
         }
     }
 
@@ -999,6 +1069,12 @@ document.addEventListener('DOMContentLoaded', () => {
         elements.solutionDetails.innerHTML = '';
         
         // Create list items for solution details
+        const variants = (state.solutionVariants || [])[state.currentSolutionIndex];
+        if (variants && variants > 1) {
+            const li = document.createElement('li');
+            li.textContent = `Stands for ${variants} rotated/mirrored variants`;
+            elements.solutionDetails.appendChild(li);
+        }
         solution.forEach(piece => {
             const li = document.createElement('li');
             li.textContent = `Piece ${piece.id} (${piece.color}) covers ${piece.cells.length} cells`;
@@ -22,9 +22,11 @@ CORS(app)
 # Import and register blueprints
 from server.routes.solve_api import solve_api
 from server.routes.libraries_api import libraries_api
+from server.routes.jobs_api import jobs_api
 
 app.register_blueprint(solve_api)
 app.register_blueprint(libraries_api)
+app.register_blueprint(jobs_api)
 
 def _ensure_builtin_library():
     libraries = load_libraries_index()
@@ -4,7 +4,7 @@ import os
 import datetime
 import uuid
 from contextlib import contextmanager
-from typing import Dict, Any, List
+from typing import Any, Callable, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +17,9 @@ def _paths() -> Dict[str, str]:
     solutions_path = os.path.join(instance_dir, 'solutions.json')  # legacy monolith
     solutions_dir = os.path.join(instance_dir, 'solutions')
     monolith_path = os.path.join(instance_dir, 'polyomino.json')
+    cnf_cache_dir = os.path.join(instance_dir, 'cnf_cache')
+    result_cache_dir = os.path.join(instance_dir, 'result_cache')
+    jobs_dir = os.path.join(instance_dir, 'jobs')
     return {
         'instance': instance_dir,
         'libraries_index': libraries_index,
@@ -24,9 +27,17 @@ def _paths() -> Dict[str, str]:
         'solutions': solutions_path,
         'solutions_dir': solutions_dir,
         'monolith': monolith_path,
+        'cnf_cache': cnf_cache_dir,
+        'result_cache': result_cache_dir,
+        'jobs_dir': jobs_dir,
     }
 
 
+def storage_path(name: str) -> str:
+    """Absolute path of a named storage location (see ``_paths``)."""
+    return _paths()[name]
+
+
 def ensure_dirs() -> None:
     ps = _paths()
     for p in [ps['instance'], ps['libraries_dir'], ps['solutions_dir']]:
@@ -234,6 +245,69 @@ def list_solution_summaries() -> List[Dict[str, Any]]:
     return summaries
 
 
+# ── Background jobs ─────────────────────────────────────────────────────────
+
+def _job_file_path(job_id: str) -> str:
+    return os.path.join(_paths()['jobs_dir'], f"{job_id}.json")
+
+
+def save_job(job: Dict[str, Any]) -> bool:
+    os.makedirs(_paths()['jobs_dir'], exist_ok=True)
+    return _save_json(_job_file_path(job['id']), job)
+
+
+def load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    job = _load_json(_job_file_path(job_id))
+    return job if isinstance(job, dict) else None
+
+
+def update_job(job_id: str, update: Callable[[Dict[str, Any]], bool]) -> Optional[Dict[str, Any]]:
+    """
+    Read-modify-write a job record under its lock.
+
+    *update* mutates the record in place and returns whether to write it
+    back, so concurrent updaters (the worker running the job, a cancel
+    request) never overwrite each other's fields.  Returns the record as
+    updated, or ``None`` if the job does not exist.
+    """
+    filepath = _job_file_path(job_id)
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with _file_lock(filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                job = json.load(f)
+            if update(job):
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(job, f, ensure_ascii=False)
+        return job
+    except (json.JSONDecodeError, OSError) as exc:
+        logger.warning("Failed to update job %s: %s", job_id, exc)
+        return None
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    jdir = _paths()['jobs_dir']
+    if not os.path.exists(jdir):
+        return []
+    jobs = []
+    for fn in os.listdir(jdir):
+        if fn.endswith('.json'):
+            job = _load_json(os.path.join(jdir, fn))
+            if isinstance(job, dict):
+                jobs.append(job)
+    return jobs
+
+
+def remove_job(job_id: str) -> None:
+    try:
+        fp = _job_file_path(job_id)
+        if os.path.exists(fp):
+            os.remove(fp)
+    except OSError as exc:
+        logger.warning("Failed to remove job file for %s: %s", job_id, exc)
+
+
 # ── Migration from monolith polyomino.json ──────────────────────────────────
 
 def migrate_from_monolith() -> bool:
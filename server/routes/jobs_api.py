@@ -0,0 +1,303 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+from flask import Blueprint, request, jsonify
+
+from backend.BoardSymmetry import BoardSymmetry
+from backend.SolveLimits import STOP_CANCELLED, CancellationToken, SolveLimits
+from server.json_storage import (
+    current_iso_time,
+    load_job,
+    list_jobs,
+    remove_job,
+    save_job,
+    storage_path,
+    update_job,
+)
+from server.routes.solve_api import (
+    _build_puzzle,
+    _cnf_cache,
+    _make_solver,
+    _parse_solve_request,
+    _persist_solutions,
+    _positive_number,
+    _serialize_solution,
+)
+from server.services.job_queue import (
+    ACTIVE_STATUSES,
+    JOB_CANCELLED,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_STOPPED,
+    JobQueue,
+)
+
+logger = logging.getLogger(__name__)
+
+jobs_api = Blueprint('jobs_api', __name__)
+
+# Size of each Flask process's job pool.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+# Wall-clock cap on a job in seconds (0: none).  SOLVE_TIME_LIMIT does not
+# apply to jobs; a request's own "time_limit" still does.
+JOB_TIME_LIMIT = float(os.environ.get('JOB_TIME_LIMIT', 0))
+# Active jobs without a heartbeat for this long are resubmitted.
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 30))
+# How often a running job checks for cancellation and refreshes its
+# heartbeat, and the most time between two saves of its solutions.
+JOB_POLL_INTERVAL = 1.0
+
+_queues = {}  # instance dir -> JobQueue
+
+
+def _job_queue():
+    """Return the process-wide ``JobQueue`` for the current instance dir."""
+    instance = storage_path('instance')
+    queue = _queues.get(instance)
+    if queue is None:
+        queue = _queues[instance] = JobQueue(
+            run_job, instance, max_workers=JOB_WORKERS, stale_after=JOB_STALE_SECONDS)
+        queue.recover()
+    return queue
+
+
+def _job_params(data):
+    """Solve params for a job payload; ``ValueError`` when invalid."""
+    params = _parse_solve_request(data)
+    time_limit = _positive_number(data, 'time_limit', float)
+    if JOB_TIME_LIMIT > 0:
+        time_limit = JOB_TIME_LIMIT if time_limit is None else min(time_limit, JOB_TIME_LIMIT)
+    params['time_limit'] = time_limit
+    return params
+
+
+def _set(**fields):
+    """An ``update_job`` callback that sets *fields*."""
+    def update(job):
+        job.update(fields, updated_at=current_iso_time())
+        return True
+    return update
+
+
+# ── Worker ──────────────────────────────────────────────────────────────────
+
+def run_job(instance_dir, job_id, attempt):
+    """
+    Pool worker: run job *job_id* (resuming from its saved solutions).
+
+    Solutions are saved to the job record at least every
+    ``JOB_POLL_INTERVAL`` seconds, while a watcher thread refreshes the
+    heartbeat and turns a ``cancel_requested`` flag into a cancelled token.
+    """
+    os.environ['INSTANCE_DIR'] = instance_dir
+
+    def start(job):
+        if job.get('attempt') != attempt or job.get('status') not in ACTIVE_STATUSES:
+            return False
+        if job.get('cancel_requested'):
+            job.update(status=JOB_CANCELLED, stop_reason=STOP_CANCELLED)
+        else:
+            job['status'] = JOB_RUNNING
+            job.setdefault('started_at', current_iso_time())
+        job['heartbeat'] = time.time()
+        job['updated_at'] = current_iso_time()
+        return True
+
+    job = update_job(job_id, start)
+    if job is None or job.get('attempt') != attempt or job.get('status') != JOB_RUNNING:
+        return
+    try:
+        _run(job)
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        update_job(job_id, _set(status=JOB_FAILED, error=str(e)))
+
+
+def _run(job):
+    job_id = job['id']
+    params = _job_params(job['request'])
+    token = CancellationToken()
+    limits = SolveLimits(
+        time_limit=params['time_limit'],
+        conflict_budget=params['conflict_budget'],
+        propagation_budget=params['propagation_budget'],
+        token=token,
+    )
+
+    cnf_cache = _cnf_cache()
+    built = _build_puzzle(params, cnf_cache)
+    if built is None:
+        update_job(job_id, _set(status=JOB_FAILED, error='No valid pieces selected for solving the puzzle.'))
+        return
+    puzzle, piece_lib, lib_for_solver, aliases = built
+    symmetry = BoardSymmetry(puzzle) if params['break_symmetries'] else None
+
+    solutions = job.get('solutions') or []
+    indices = job.get('indices') or []
+    variants = (job.get('variants') or []) if symmetry else None
+    max_solutions = params['max_solutions']
+
+    finished = threading.Event()
+
+    def watch():
+        def beat(record):
+            record['heartbeat'] = time.time()
+            if record.get('cancel_requested'):
+                token.cancel()
+            return True
+        while not finished.wait(JOB_POLL_INTERVAL):
+            update_job(job_id, beat)
+
+    def save(**fields):
+        update_job(job_id, _set(
+            solutions=solutions, indices=indices, variants=variants, num_solutions=len(solutions),
+            heartbeat=time.time(), **fields))
+
+    threading.Thread(target=watch, daemon=True).start()
+    last_save = time.monotonic()
+    solver = _make_solver(params)
+    try:
+        if not 0 < max_solutions <= len(solutions):
+            iterator = solver.iter_solutions(
+                puzzle, threads=params['threads'], cnf_cache=cnf_cache, encoding=params['encoding'],
+                blocked_solutions=list(indices), symmetry=symmetry, limits=limits)
+            try:
+                for sol in iterator:
+                    solutions.append(_serialize_solution(sol, piece_lib, lib_for_solver, aliases))
+                    indices.append([cand.index for cand in sol])
+                    if symmetry is not None:
+                        variants.append(symmetry.orbit_size(sol))
+                    if 0 < max_solutions <= len(solutions):
+                        break
+                    if time.monotonic() - last_save >= JOB_POLL_INTERVAL:
+                        save()
+                        last_save = time.monotonic()
+            finally:
+                iterator.close()
+    finally:
+        finished.set()
+
+    fields = {'stop_reason': limits.stop_reason}
+    if solver.infeasibility is not None:
+        fields['infeasible'] = solver.infeasibility.to_dict()
+    if limits.stop_reason is None:
+        fields['status'] = JOB_COMPLETED
+    elif limits.stop_reason == STOP_CANCELLED:
+        fields['status'] = JOB_CANCELLED
+    else:
+        fields['status'] = JOB_STOPPED
+    if params['persist'] and solutions:
+        try:
+            fields['saved_id'] = _persist_solutions(params, solutions).get('id')
+        except Exception as e:
+            logger.exception("Failed to persist solutions of job %s", job_id)
+            fields['save_error'] = str(e)
+    fields['finished_at'] = current_iso_time()
+    save(**fields)
+
+
+# ── Routes ──────────────────────────────────────────────────────────────────
+
+def _job_summary(job, offset=None):
+    """API view of a job; with *offset*, also its solutions from that index on."""
+    summary = {
+        key: job.get(key)
+        for key in ('id', 'status', 'created_at', 'started_at', 'finished_at', 'updated_at',
+                    'num_solutions', 'stop_reason', 'infeasible', 'error', 'saved_id', 'board')
+    }
+    if offset is not None:
+        summary['offset'] = offset
+        summary['solutions'] = (job.get('solutions') or [])[offset:]
+        if job.get('variants') is not None:
+            summary['variants'] = job['variants'][offset:]
+    return summary
+
+
+@jobs_api.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a solve (same payload as ``/api/solve``) to run in the background."""
+    try:
+        data = request.json or {}
+        params = _job_params(data)
+        now = current_iso_time()
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': JOB_QUEUED,
+            'created_at': now,
+            'updated_at': now,
+            'heartbeat': time.time(),
+            'attempt': 0,
+            'request': data,
+            'board': {'width': params['width'], 'height': params['height'], 'obstacles': params['obstacles']},
+            'num_solutions': 0,
+            'solutions': [],
+            'indices': [],
+            'variants': None,
+        }
+        if not save_job(job):
+            return jsonify({'success': False, 'message': 'Could not store the job.'}), 500
+        _job_queue().submit(job['id'])
+        return jsonify({'success': True, 'job_id': job['id'], 'status': JOB_QUEUED}), 202
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Failed to submit job")
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@jobs_api.route('/api/jobs', methods=['GET'])
+def list_all_jobs():
+    try:
+        jobs = sorted(list_jobs(), key=lambda j: j.get('created_at') or '', reverse=True)
+        return jsonify({'success': True, 'jobs': [_job_summary(j) for j in jobs]})
+    except Exception as e:
+        logger.exception("Failed to list jobs")
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@jobs_api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Status and solutions of a job.  ``?offset=N`` skips the first N
+    solutions, so a poller only fetches what is new.
+    """
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'offset must be an integer.'}), 400
+    job = load_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'Job {job_id} not found'}), 404
+    queue = _job_queue()
+    if queue.is_stale(job):
+        queue.submit(job_id)
+    return jsonify({'success': True, 'job': _job_summary(job, offset)})
+
+
+@jobs_api.route('/api/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Cancel an active job (it keeps its solutions so far), or remove a finished one."""
+    cancelled = []
+
+    def cancel(job):
+        if job.get('status') not in ACTIVE_STATUSES:
+            return False
+        cancelled.append(job['id'])
+        job['cancel_requested'] = True
+        if job['status'] == JOB_QUEUED:
+            job.update(status=JOB_CANCELLED, stop_reason=STOP_CANCELLED, finished_at=current_iso_time())
+        job['updated_at'] = current_iso_time()
+        return True
+
+    job = update_job(job_id, cancel)
+    if job is None:
+        return jsonify({'success': False, 'message': f'Job {job_id} not found'}), 404
+    if cancelled:
+        return jsonify({'success': True, 'job': _job_summary(job)})
+    remove_job(job_id)
+    return jsonify({'success': True, 'removed': True})
@@ -4,7 +4,7 @@ import uuid
 from flask import Blueprint, request, jsonify
 
 from backend.pieceLibrary import test_piece_library
-from backend.utils import VALID_COLORS
+from backend.utils import VALID_COLORS, piece_count
 from server.services.solver_service import JSONPieceAdapter, group_equivalent_pieces, normalized_orientation
 from server.json_storage import (
     current_iso_time,
@@ -61,20 +61,24 @@ def _delete_library(library_id):
     remove_library_file(library_id)
 
 
-def _add_piece(library_id, name, color, cells):
+def _add_piece(library_id, name, color, cells, count=1):
     pieces = read_library_pieces(library_id)
     if any(p.get('library_id') == library_id and p.get('name') == name for p in pieces):
         return None
     # Canonicalize cells at write-time: always store as list of [i, j] lists
     canonical_cells = [[c[0], c[1]] for c in cells]
-    pieces.append({
+    piece = {
         'library_id': library_id,
         'name': name,
         'color': color,
         'cells': canonical_cells,
-    })
+    }
+    # Only multi-copy pieces carry a count, so existing files stay unchanged.
+    if count != 1:
+        piece['count'] = count
+    pieces.append(piece)
     write_library_pieces(library_id, pieces)
-    return {'id': name, 'color': color, 'offsets': canonical_cells}
+    return {'id': name, 'color': color, 'offsets': canonical_cells, 'count': count}
 
 
 def _delete_piece(library_id, name):
@@ -118,6 +122,7 @@ def get_library_pieces(library_id):
                     'id': key,
                     'color': piece.color,
                     'offsets': piece.get_offsets(),
+                    'count': piece_count(piece),
                 }
             return jsonify(pieces_dict)
 
@@ -136,6 +141,7 @@ def get_library_pieces(library_id):
                 'id': name,
                 'color': color,
                 'offsets': offsets,
+                'count': piece.get('count') or 1,
             }
         return jsonify(pieces_dict)
     except Exception as e:
@@ -160,6 +166,7 @@ def get_library_canonical_pieces(library_id):
             canonical.append({
                 'color': color,
                 'offsets': offsets,
+                'count': piece_count(pobj),
             })
         return jsonify({'pieces': canonical})
     except Exception as e:
@@ -239,14 +246,17 @@ def create_piece(library_id):
         name = data_req.get('name', '').strip()
         color = data_req.get('color', '').strip()
         cells = data_req.get('cells', [])
+        count = data_req.get('count', 1)
         if not name:
             return jsonify({"success": False, "message": "Piece name is required"}), 400
         if not color:
             return jsonify({"success": False, "message": "Piece color is required"}), 400
         if not cells or not isinstance(cells, list) or len(cells) == 0:
             return jsonify({"success": False, "message": "Piece must have at least one cell"}), 400
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            return jsonify({"success": False, "message": "Piece count must be a positive integer"}), 400
 
-        created = _add_piece(library_id, name, color, cells)
+        created = _add_piece(library_id, name, color, cells, count)
         if created is None:
             return jsonify({"success": False, "message": f"Piece '{name}' already exists in this library"}), 400
         return jsonify({
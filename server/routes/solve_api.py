@@ -1,13 +1,26 @@
 import datetime
+import json
 import logging
+import os
+import uuid
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 
 from backend.board import Board
 from backend.TilingPuzzle import TilingPuzzle
 from backend.PySatSolver import PySatSolver
+from backend.PortfolioSolver import DEFAULT_PORTFOLIO, PortfolioSolver
+from backend.DecomposedSolver import DecomposedSolver
+from backend.CandidatePruning import PruningSolver
+from backend.CNFCache import CNFCache
+from backend.BoardSymmetry import BoardSymmetry
+from backend.CardinalityEncoding import DEFAULT_ENCODING, CardinalityEncoding
+from backend.SolveLimits import SolveLimits
 from backend.pieceLibrary import test_piece_library
+from backend.utils import piece_count
 from server.services.solver_service import JSONPieceAdapter, group_equivalent_pieces
+from server.services.result_cache import SolveResult, SolveResultCache, library_version, result_cache_key
+from server.services.cancellation import CancellationRegistry
 from server.json_storage import (
     read_library_pieces,
     add_solution_record,
@@ -15,6 +28,7 @@ from server.json_storage import (
     find_solution_by_id,
     load_libraries_index,
     current_iso_time,
+    storage_path,
 )
 
 logger = logging.getLogger(__name__)
@@ -25,6 +39,58 @@ solve_api = Blueprint('solve_api', __name__)
 
 MAX_BOARD_DIMENSION = 100  # Reasonable upper limit for board width/height
 
+# Size budget of the on-disk compiled-CNF cache; 0 disables it.
+CNF_CACHE_MAX_BYTES = int(os.environ.get('CNF_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+_cnf_caches = {}  # cache directory -> CNFCache (one per INSTANCE_DIR)
+
+# In-process memo of /api/solve results (entries; 0 disables it).  Setting
+# RESULT_CACHE_DISK=1 also shares results between workers via INSTANCE_DIR.
+RESULT_CACHE_ENTRIES = int(os.environ.get('RESULT_CACHE_ENTRIES', 128))
+RESULT_CACHE_DISK = os.environ.get('RESULT_CACHE_DISK', '').lower() in ('1', 'true', 'yes')
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+_result_caches = {}  # instance dir -> SolveResultCache
+
+# Wall-clock cap on every solve, in seconds (0 disables it).  Requests may
+# ask for less with "time_limit" but never for more.
+SOLVE_TIME_LIMIT = float(os.environ.get('SOLVE_TIME_LIMIT', 60))
+
+_cancellation = CancellationRegistry()
+
+# Threads that start the regions of a decomposed board concurrently.
+DECOMPOSE_WORKERS = int(os.environ.get('DECOMPOSE_WORKERS', 1))
+
+# Engines raced when a request sets "portfolio": comma-separated names.
+PORTFOLIO_ENGINES = [
+    name.strip() for name in os.environ.get('PORTFOLIO_ENGINES', ','.join(DEFAULT_PORTFOLIO)).split(',')
+    if name.strip()
+]
+
+
+def _cnf_cache():
+    """Return the process-wide ``CNFCache`` for the current instance dir, or ``None``."""
+    if CNF_CACHE_MAX_BYTES <= 0:
+        return None
+    directory = storage_path('cnf_cache')
+    cache = _cnf_caches.get(directory)
+    if cache is None:
+        cache = _cnf_caches[directory] = CNFCache(directory, max_bytes=CNF_CACHE_MAX_BYTES)
+    return cache
+
+
+def _result_cache():
+    """Return the process-wide ``SolveResultCache`` for the current instance dir, or ``None``."""
+    if RESULT_CACHE_ENTRIES <= 0:
+        return None
+    instance = storage_path('instance')
+    cache = _result_caches.get(instance)
+    if cache is None:
+        directory = storage_path('result_cache') if RESULT_CACHE_DISK else None
+        cache = _result_caches[instance] = SolveResultCache(
+            memory_entries=RESULT_CACHE_ENTRIES, directory=directory, max_bytes=RESULT_CACHE_MAX_BYTES)
+    return cache
+
 
 # ── Helper functions (decomposed from solve_puzzle) ─────────────────────────
 
@@ -56,14 +122,25 @@ def _parse_solve_request(data):
         or f"Solution {current_iso_time()}"
     )
     dedupe_equivalent = bool(data.get('dedupe_equivalent', True))
+    break_symmetries = bool(data.get('break_symmetries', False))
+    portfolio = bool(data.get('portfolio', False))
+    decompose = bool(data.get('decompose', True))
+    prune = bool(data.get('prune', False))
     allow_reflections = data.get('allow_reflections', True)
     allow_rotations = data.get('allow_rotations', True)
+    # Raises ValueError (→ 400) for unknown names.
+    encoding = CardinalityEncoding(data.get('encoding') or DEFAULT_ENCODING).name
 
     try:
         threads = int(data.get('threads')) if data.get('threads') is not None else None
     except (ValueError, TypeError):
         threads = None
 
+    time_limit = _positive_number(data, 'time_limit', float)
+    if SOLVE_TIME_LIMIT > 0:
+        time_limit = SOLVE_TIME_LIMIT if time_limit is None else min(time_limit, SOLVE_TIME_LIMIT)
+    request_id = str(data.get('request_id') or uuid.uuid4().hex)
+
     return {
         'width': width,
         'height': height,
@@ -74,12 +151,50 @@ def _parse_solve_request(data):
         'persist': persist,
         'save_name': save_name,
         'dedupe_equivalent': dedupe_equivalent,
+        'break_symmetries': break_symmetries,
+        'portfolio': portfolio,
+        'decompose': decompose,
+        'prune': prune,
         'allow_reflections': allow_reflections,
         'allow_rotations': allow_rotations,
+        'encoding': encoding,
         'threads': threads,
+        'time_limit': time_limit,
+        'conflict_budget': _positive_number(data, 'conflict_budget', int),
+        'propagation_budget': _positive_number(data, 'propagation_budget', int),
+        'request_id': request_id,
     }
 
 
+def _positive_number(data, key, cast):
+    """Optional positive number from the payload; ``ValueError`` when invalid."""
+    value = data.get(key)
+    if value is None:
+        return None
+    try:
+        number = cast(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"{key} must be a positive number.")
+    if isinstance(value, bool) or number <= 0:
+        raise ValueError(f"{key} must be a positive number.")
+    return number
+
+
+def _make_limits(params):
+    """``SolveLimits`` for a request, with its token registered under ``request_id``."""
+    token = _cancellation.register(params['request_id'])
+    return SolveLimits(
+        time_limit=params['time_limit'],
+        conflict_budget=params['conflict_budget'],
+        propagation_budget=params['propagation_budget'],
+        token=token,
+    )
+
+
+def _release_limits(params, limits):
+    _cancellation.unregister(params['request_id'], limits.token)
+
+
 def _build_piece_library(library_id, selected_pieces, allow_reflections, allow_rotations):
     """Build the piece library dict from the library_id and selected piece keys."""
     piece_lib = {}
@@ -106,21 +221,26 @@ def _build_piece_library(library_id, selected_pieces, allow_reflections, allow_r
 
 def _prepare_solver_library(piece_lib, selected_pieces, dedupe_equivalent,
                              library_id, allow_reflections, allow_rotations):
-    """Optionally dedupe equivalent pieces and prepare the library for the solver."""
+    """
+    Optionally dedupe equivalent pieces and prepare the library for the solver.
+
+    Returns ``(lib_for_solver, aliases)`` where *aliases* maps each solver
+    piece id to the display ids of its copies, one entry per copy: deduped
+    shapes list their original pieces (in selection order) and a piece with
+    ``count`` copies repeats its own id.
+    """
     lib_for_solver = piece_lib
     canonical_of = {pid: pid for pid in piece_lib.keys()}
 
     if dedupe_equivalent:
         lib_for_solver, canonical_of = group_equivalent_pieces(piece_lib)
 
-    # Build reverse mapping: canonical_id → original display id
-    rep_of = {}
-    for pid in selected_pieces:
-        canon = canonical_of.get(pid, pid)
-        if canon not in rep_of:
-            rep_of[canon] = pid
-    for pid, canon in canonical_of.items():
-        rep_of.setdefault(canon, pid)
+    # Build reverse mapping: canonical_id → original display ids
+    aliases = {}
+    ordered = [pid for pid in selected_pieces if pid in canonical_of]
+    ordered += [pid for pid in canonical_of if pid not in ordered]
+    for pid in ordered:
+        aliases.setdefault(canonical_of[pid], []).extend([pid] * piece_count(piece_lib[pid]))
 
     # Wrap built-in pieces in JSONPieceAdapter when orientation flags are non-default
     if library_id == 'builtin' and (allow_reflections is False or allow_rotations is False):
@@ -129,34 +249,181 @@ def _prepare_solver_library(piece_lib, selected_pieces, dedupe_equivalent,
                 'name': pid,
                 'color': getattr(p, 'color', None),
                 'cells': [[i, j] for (i, j) in (p.get_offsets() if hasattr(p, 'get_offsets') else [])],
+                'count': piece_count(p),
                 'allow_reflections': allow_reflections,
                 'allow_rotations': allow_rotations,
             })
             for pid, p in lib_for_solver.items()
         }
 
-    return lib_for_solver, rep_of
+    return lib_for_solver, aliases
+
+
+def _serialize_solution(sol, piece_lib, lib_for_solver, aliases):
+    """
+    Convert one solver solution into JSON-serializable placement data.
+
+    Placements of a piece with several copies take successive display ids
+    from *aliases*, so deduped pieces keep their own id and color.
+    """
+    sdata = []
+    used = {}
+    for cand in sol:
+        canon_id = cand.piece_id
+        ids = aliases.get(canon_id) or [canon_id]
+        n = used.get(canon_id, 0)
+        used[canon_id] = n + 1
+        orig_id = ids[min(n, len(ids) - 1)]
+        src_piece = piece_lib.get(orig_id) or lib_for_solver.get(canon_id)
+        color = getattr(src_piece, 'color', None) or 'red'
+        sdata.append({
+            'id': orig_id,
+            'color': color,
+            'cells': cand.cells,
+            'orientation': cand.orientation,
+            'position': cand.position,
+        })
+    return sdata
+
+
+def _serialize_solutions(solutions, piece_lib, lib_for_solver, aliases):
+    """Convert solver output into JSON-serializable solution data."""
+    return [_serialize_solution(sol, piece_lib, lib_for_solver, aliases) for sol in solutions]
 
 
-def _serialize_solutions(solutions, piece_lib, lib_for_solver, rep_of):
-    """Convert solver output into JSON-serializable solution data."""
-    serialized = []
-    for sol in solutions:
-        sdata = []
-        for cand in sol:
-            canon_id = cand.piece_id
-            orig_id = rep_of.get(canon_id, canon_id)
-            src_piece = piece_lib.get(orig_id) or lib_for_solver.get(canon_id)
-            color = getattr(src_piece, 'color', None) or 'red'
-            sdata.append({
-                'id': orig_id,
-                'color': color,
-                'cells': cand.cells,
-                'orientation': cand.orientation,
-                'position': cand.position,
-            })
-        serialized.append(sdata)
-    return serialized
+def _build_puzzle(params, cnf_cache=None):
+    """
+    Build the board, piece libraries and ``TilingPuzzle`` for parsed params.
+
+    The puzzle is compact; when *cnf_cache* already holds this puzzle's
+    fingerprint, its candidate table is reused instead of regenerated.
+
+    Returns ``(puzzle, piece_lib, lib_for_solver, aliases)``, or ``None`` when
+    no valid piece was selected.
+    """
+    board = Board(params['width'], params['height'])
+    if params['obstacles']:
+        board.add_obstacles(params['obstacles'])
+
+    piece_lib = _build_piece_library(
+        params['library_id'],
+        params['selected_pieces'],
+        params['allow_reflections'],
+        params['allow_rotations'],
+    )
+    if not piece_lib:
+        return None
+
+    lib_for_solver, aliases = _prepare_solver_library(
+        piece_lib,
+        params['selected_pieces'],
+        params['dedupe_equivalent'],
+        params['library_id'],
+        params['allow_reflections'],
+        params['allow_rotations'],
+    )
+
+    puzzle = cnf_cache.load_puzzle(board, lib_for_solver, encoding=params['encoding']) if cnf_cache else None
+    if puzzle is None:
+        puzzle = TilingPuzzle(board, lib_for_solver, compact=True)
+    return puzzle, piece_lib, lib_for_solver, aliases
+
+
+def _make_solver(params):
+    """
+    The solver for a request: a racing ``PortfolioSolver``, a
+    ``DecomposedSolver`` that solves disconnected board regions separately,
+    or a plain ``PySatSolver`` -- behind a ``PruningSolver`` when the
+    request asks for candidate pruning.
+    """
+    if params['portfolio']:
+        factory = lambda: PortfolioSolver(PORTFOLIO_ENGINES)
+    elif params['decompose']:
+        factory = lambda: DecomposedSolver(PySatSolver, max_workers=DECOMPOSE_WORKERS)
+    else:
+        factory = PySatSolver
+    return PruningSolver(factory) if params['prune'] else factory()
+
+
+def _persist_solutions(params, serialized):
+    """Save serialized solutions; returns the stored record."""
+    libraries = load_libraries_index()
+    lib = next((l for l in libraries if l.get('id') == params['library_id']), None)
+    library_name = lib.get('name') if lib else params['library_id']
+    return add_solution_record(
+        params['save_name'],
+        {'width': params['width'], 'height': params['height'], 'obstacles': params['obstacles']},
+        params['library_id'],
+        library_name,
+        params['selected_pieces'],
+        serialized,
+    )
+
+
+def _library_version(library_id):
+    """Content version of a library, so edits invalidate cached results."""
+    if library_id == 'builtin':
+        return 'builtin'
+    return library_version(read_library_pieces(library_id))
+
+
+def _solve_cached(params, limits=None):
+    """
+    Solve through the result cache.
+
+    A cached enumeration answers the request when it is complete or long
+    enough.  Otherwise the solve resumes from it: known solutions are passed
+    to the SAT engine as blocking clauses and only the missing ones are
+    searched for.  Returns ``(serialized, variants, solver)`` where
+    *variants* gives, per solution, how many symmetric tilings it stands for
+    (``None`` unless ``break_symmetries`` is set) and *solver* is the solver
+    that ran (``None`` when the cache answered), or ``None`` when no valid
+    piece was selected.  When *limits* stop the search early, the solutions
+    found so far are returned and cached as an incomplete enumeration.
+    """
+    max_solutions = params['max_solutions']
+    result_cache = _result_cache()
+    key = cached = None
+    if result_cache is not None:
+        key = result_cache_key(params, _library_version(params['library_id']))
+        cached = result_cache.get(key)
+        if cached is not None and cached.covers(max_solutions):
+            return cached.take(max_solutions) + (None,)
+
+    cnf_cache = _cnf_cache()
+    built = _build_puzzle(params, cnf_cache)
+    if built is None:
+        return None
+    puzzle, piece_lib, lib_for_solver, aliases = built
+
+    symmetry = BoardSymmetry(puzzle) if params['break_symmetries'] else None
+    result = SolveResult(
+        list(cached.serialized) if cached else [],
+        list(cached.indices) if cached else [],
+        True,
+        list(cached.variants) if cached and symmetry else ([] if symmetry else None),
+    )
+    solver = _make_solver(params)
+    solutions = solver.iter_solutions(
+        puzzle, threads=params['threads'], cnf_cache=cnf_cache, encoding=params['encoding'],
+        blocked_solutions=list(result.indices), symmetry=symmetry, limits=limits)
+    try:
+        for sol in solutions:
+            result.serialized.append(_serialize_solution(sol, piece_lib, lib_for_solver, aliases))
+            result.indices.append([cand.index for cand in sol])
+            if symmetry is not None:
+                result.variants.append(symmetry.orbit_size(sol))
+            if 0 < max_solutions <= len(result.serialized):
+                result.complete = False
+                break
+    finally:
+        solutions.close()
+    if limits is not None and limits.stop_reason is not None:
+        result.complete = False
+
+    if result_cache is not None:
+        result_cache.put(key, result)
+    return result.take(max_solutions) + (solver,)
 
 
 # ── Routes ──────────────────────────────────────────────────────────────────
@@ -167,58 +434,51 @@ def solve_puzzle():
         data = request.json
         params = _parse_solve_request(data)
 
-        board = Board(params['width'], params['height'])
-        if params['obstacles']:
-            board.add_obstacles(params['obstacles'])
-
-        piece_lib = _build_piece_library(
-            params['library_id'],
-            params['selected_pieces'],
-            params['allow_reflections'],
-            params['allow_rotations'],
-        )
-        if not piece_lib:
+        limits = _make_limits(params)
+        try:
+            solved = _solve_cached(params, limits)
+        finally:
+            _release_limits(params, limits)
+        if solved is None:
             return jsonify({'success': False, 'message': 'No valid pieces selected for solving the puzzle.'})
-
-        lib_for_solver, rep_of = _prepare_solver_library(
-            piece_lib,
-            params['selected_pieces'],
-            params['dedupe_equivalent'],
-            params['library_id'],
-            params['allow_reflections'],
-            params['allow_rotations'],
-        )
-
-        puzzle = TilingPuzzle(board, lib_for_solver)
-        solver = PySatSolver()
-        solutions = solver.solve(puzzle, max_solutions=params['max_solutions'], threads=params['threads'])
-
-        if not solutions:
+        serialized, variants, solver = solved
+        stop_reason = limits.stop_reason
+
+        if not serialized:
+            if stop_reason is not None:
+                return jsonify({
+                    'success': False,
+                    'message': f'Search stopped ({stop_reason}) before any solution was found.',
+                    'stop_reason': stop_reason,
+                })
+            infeasibility = getattr(solver, 'infeasibility', None)
+            if infeasibility is not None:
+                return jsonify({
+                    'success': False,
+                    'message': f'No solution: {infeasibility.message}',
+                    'infeasible': infeasibility.to_dict(),
+                })
             return jsonify({'success': False, 'message': 'No solution found for the given configuration.'})
-        if isinstance(params['max_solutions'], int) and params['max_solutions'] == 1:
-            solutions = [solutions]
-
-        serialized = _serialize_solutions(solutions, piece_lib, lib_for_solver, rep_of)
 
         response_payload = {
             'success': True,
             'solutions': serialized,
             'board': {'width': params['width'], 'height': params['height'], 'obstacles': params['obstacles']},
+            'cached': solver is None,
         }
+        if stop_reason is not None:
+            # Partial result: the solutions found before a limit was hit.
+            response_payload['stop_reason'] = stop_reason
+        if variants is not None:
+            response_payload['variants'] = variants
+        if isinstance(solver, PortfolioSolver):
+            response_payload['portfolio'] = {'winner': solver.winner, 'timings': solver.timings}
+        if isinstance(solver, PruningSolver) and solver.prune_stats is not None:
+            response_payload['pruning'] = solver.prune_stats
 
         if params['persist']:
             try:
-                libraries = load_libraries_index()
-                lib = next((l for l in libraries if l.get('id') == params['library_id']), None)
-                library_name = lib.get('name') if lib else params['library_id']
-                rec = add_solution_record(
-                    params['save_name'],
-                    {'width': params['width'], 'height': params['height'], 'obstacles': params['obstacles']},
-                    params['library_id'],
-                    library_name,
-                    params['selected_pieces'],
-                    serialized,
-                )
+                rec = _persist_solutions(params, serialized)
                 response_payload['saved'] = True
                 response_payload['saved_id'] = rec.get('id')
             except Exception as e:
@@ -234,6 +494,104 @@ def solve_puzzle():
         return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
 
 
+@solve_api.route('/api/solve/stream', methods=['POST'])
+def solve_puzzle_stream():
+    """
+    Stream solutions as NDJSON while the SAT engine enumerates them.
+
+    Emits one JSON object per line: a ``start`` event with the board and
+    the ``request_id`` to cancel with, one ``solution`` event per tiling as
+    soon as it is found, then a final ``done`` event (with
+    ``saved``/``saved_id`` when persisting and ``stop_reason`` when a limit
+    ended the search) or an ``error`` event.
+    """
+    try:
+        params = _parse_solve_request(request.json)
+        cnf_cache = _cnf_cache()
+        built = _build_puzzle(params, cnf_cache)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Unexpected error in solve_puzzle_stream")
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+    if built is None:
+        return jsonify({'success': False, 'message': 'No valid pieces selected for solving the puzzle.'})
+    puzzle, piece_lib, lib_for_solver, aliases = built
+
+    def _line(event):
+        return json.dumps(event) + '\n'
+
+    def generate():
+        max_solutions = params['max_solutions']
+        unlimited = max_solutions <= 0
+        serialized = []
+        symmetry = BoardSymmetry(puzzle) if params['break_symmetries'] else None
+        solver = _make_solver(params)
+        limits = _make_limits(params)
+        solutions = solver.iter_solutions(
+            puzzle, threads=params['threads'], cnf_cache=cnf_cache, encoding=params['encoding'],
+            symmetry=symmetry, limits=limits)
+        try:
+            yield _line({
+                'type': 'start',
+                'board': {'width': params['width'], 'height': params['height'], 'obstacles': params['obstacles']},
+                'request_id': params['request_id'],
+            })
+            for sol in solutions:
+                sdata = _serialize_solution(sol, piece_lib, lib_for_solver, aliases)
+                serialized.append(sdata)
+                event = {'type': 'solution', 'index': len(serialized) - 1, 'solution': sdata}
+                if symmetry is not None:
+                    event['variants'] = symmetry.orbit_size(sol)
+                yield _line(event)
+                if not unlimited and len(serialized) >= max_solutions:
+                    break
+
+            done = {'type': 'done', 'success': bool(serialized), 'count': len(serialized)}
+            if isinstance(solver, PortfolioSolver):
+                done['portfolio'] = {'winner': solver.winner, 'timings': solver.timings}
+            if isinstance(solver, PruningSolver) and solver.prune_stats is not None:
+                done['pruning'] = solver.prune_stats
+            if limits.stop_reason is not None:
+                done['stop_reason'] = limits.stop_reason
+            if not serialized:
+                if limits.stop_reason is not None:
+                    done['message'] = f'Search stopped ({limits.stop_reason}) before any solution was found.'
+                elif solver.infeasibility is not None:
+                    done['message'] = f'No solution: {solver.infeasibility.message}'
+                    done['infeasible'] = solver.infeasibility.to_dict()
+                else:
+                    done['message'] = 'No solution found for the given configuration.'
+            elif params['persist']:
+                try:
+                    rec = _persist_solutions(params, serialized)
+                    done['saved'] = True
+                    done['saved_id'] = rec.get('id')
+                except Exception as e:
+                    logger.exception("Failed to persist solution")
+                    done['saved'] = False
+                    done['save_error'] = str(e)
+            yield _line(done)
+        except Exception as e:
+            logger.exception("Unexpected error while streaming solutions")
+            yield _line({'type': 'error', 'message': f'Error: {str(e)}'})
+        finally:
+            # Stops the SAT search if the client disconnects mid-enumeration.
+            solutions.close()
+            _release_limits(params, limits)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@solve_api.route('/api/solve/<request_id>/cancel', methods=['POST'])
+def cancel_solve(request_id):
+    """Ask a running solve to stop; it returns what it found so far."""
+    cancelled = _cancellation.cancel(request_id)
+    if not cancelled:
+        return jsonify({'success': False, 'message': f'No running solve with id {request_id}'}), 404
+    return jsonify({'success': True, 'cancelled': True})
+
+
 @solve_api.route('/api/solutions', methods=['GET'])
 def list_solutions():
     try:
@@ -0,0 +1,40 @@
+import threading
+
+from backend.SolveLimits import CancellationToken
+
+
+class CancellationRegistry:
+    """
+    Cancellation tokens of the solves running in this process, by request id.
+
+    A solve registers a token under its request id for as long as it runs;
+    ``cancel`` flips that token so the solver stops at its next check and
+    returns what it found so far.  Tokens are per process: with several
+    gunicorn workers a cancel only reaches solves running in the worker
+    that receives it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def register(self, request_id):
+        """Create and return the token for *request_id*."""
+        token = CancellationToken()
+        with self._lock:
+            self._tokens[request_id] = token
+        return token
+
+    def unregister(self, request_id, token):
+        with self._lock:
+            if self._tokens.get(request_id) is token:
+                del self._tokens[request_id]
+
+    def cancel(self, request_id):
+        """Cancel the solve running under *request_id*; False if none is."""
+        with self._lock:
+            token = self._tokens.get(request_id)
+        if token is None:
+            return False
+        token.cancel()
+        return True
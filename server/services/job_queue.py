@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from server.json_storage import list_jobs, update_job
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle.  Queued and running jobs are "active"; the rest are final.
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_STOPPED = 'stopped'      # a time limit or budget ended the search
+JOB_CANCELLED = 'cancelled'
+JOB_FAILED = 'failed'
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class JobQueue:
+    """
+    Runs background jobs in a bounded process pool.
+
+    Jobs live in the job store (``server.json_storage``); the pool only gets
+    ``(instance_dir, job_id, attempt)`` and *runner* loads, runs and updates
+    the record itself, refreshing its ``heartbeat`` while it works.  Each
+    (re)submission bumps the record's ``attempt``, and a runner whose
+    attempt is no longer current does nothing.
+
+    ``recover`` resubmits active jobs whose heartbeat is older than
+    *stale_after* seconds: jobs whose worker process or Flask worker died,
+    or that sat in another process's queue too long.  Runners resume from
+    the progress stored in the record.
+    """
+
+    def __init__(self, runner, instance_dir, max_workers=2, stale_after=30.0):
+        self.runner = runner
+        self.instance_dir = instance_dir
+        self.max_workers = max_workers
+        self.stale_after = stale_after
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def submit(self, job_id):
+        """Queue *job_id* under a new attempt; returns False if it is no longer active."""
+        def claim(job):
+            if job.get('status') not in ACTIVE_STATUSES:
+                return False
+            job['attempt'] = job.get('attempt', 0) + 1
+            job['heartbeat'] = time.time()
+            return True
+
+        job = update_job(job_id, claim)
+        if job is None or job.get('status') not in ACTIVE_STATUSES:
+            return False
+        self._pool().submit(self.runner, self.instance_dir, job_id, job['attempt'])
+        return True
+
+    def is_stale(self, job):
+        return (job.get('status') in ACTIVE_STATUSES
+                and time.time() - job.get('heartbeat', 0) > self.stale_after)
+
+    def recover(self):
+        """Resubmit stale active jobs; returns their ids."""
+        recovered = []
+        for job in list_jobs():
+            if self.is_stale(job) and self.submit(job['id']):
+                logger.info("Resubmitting stale job %s", job['id'])
+                recovered.append(job['id'])
+        return recovered
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
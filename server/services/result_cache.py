@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from backend.utils import atomic_write_bytes, evict_lru_files
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = '.result.z'
+
+# Request fields that determine the solution set (max_solutions, threads,
+# persist and save_name only change how much of it is returned or stored).
+_KEY_FIELDS = (
+    'width', 'height', 'selected_pieces', 'library_id',
+    'dedupe_equivalent', 'break_symmetries', 'allow_reflections', 'allow_rotations',
+)
+
+
+def result_cache_key(params, library_version):
+    """Hash of the normalized solve request plus the library content version."""
+    payload = {field: params.get(field) for field in _KEY_FIELDS}
+    payload['obstacles'] = sorted({(i, j) for i, j in params.get('obstacles') or []})
+    payload['library_version'] = library_version
+    blob = json.dumps(payload, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest()
+
+
+def library_version(pieces):
+    """Content version of a stored library's piece list."""
+    blob = json.dumps(pieces, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+class SolveResult:
+    """
+    A (possibly partial) enumeration of one puzzle's solutions.
+
+    ``serialized`` holds the response payload per solution, ``indices`` the
+    matching candidate numbers (used to block known solutions when the
+    enumeration is extended) and ``complete`` whether the enumeration was
+    exhausted, i.e. no further solutions exist.  ``variants`` is set for
+    symmetry-broken enumerations: the number of symmetric tilings each
+    solution stands for.
+    """
+
+    def __init__(self, serialized, indices, complete, variants=None):
+        self.serialized = serialized
+        self.indices = indices
+        self.complete = complete
+        self.variants = variants
+
+    def covers(self, max_solutions):
+        """Whether this result can answer a request for *max_solutions*."""
+        if self.complete:
+            return True
+        return 0 < max_solutions <= len(self.serialized)
+
+    def take(self, max_solutions):
+        """``(serialized, variants)`` for the first *max_solutions* (all if <= 0)."""
+        if max_solutions <= 0:
+            return self.serialized, self.variants
+        variants = self.variants[:max_solutions] if self.variants is not None else None
+        return self.serialized[:max_solutions], variants
+
+    def to_bytes(self):
+        data = {'serialized': self.serialized, 'indices': self.indices, 'complete': self.complete,
+                'variants': self.variants}
+        return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, blob):
+        data = json.loads(zlib.decompress(blob).decode('utf-8'))
+        return cls(data['serialized'], data['indices'], bool(data['complete']), data.get('variants'))
+
+
+class SolveResultCache:
+    """
+    Two-tier memo of solve results.
+
+    The in-process tier is an LRU of at most *memory_entries* results.  When
+    *directory* is given, results are also written there (atomically, LRU by
+    total size up to *max_bytes*), so gunicorn workers share them.
+    """
+
+    def __init__(self, memory_entries=128, directory=None, max_bytes=32 * 1024 * 1024):
+        self.memory_entries = memory_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached ``SolveResult`` for *key*, or ``None``."""
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                return result
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = SolveResult.from_bytes(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zlib.error) as exc:
+            logger.warning("Discarding unreadable result cache entry %s: %s", path, exc)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        """Store *result* under *key*, replacing any shorter enumeration."""
+        existing = self.get(key)
+        if existing is not None and not result.complete and len(existing.serialized) >= len(result.serialized):
+            return
+        self._remember(key, result)
+        if not self.directory:
+            return
+        data = result.to_bytes()
+        if len(data) > self.max_bytes:
+            return
+        try:
+            atomic_write_bytes(self._path(key), data)
+        except OSError as exc:
+            logger.warning("Failed to write result cache entry %s: %s", key, exc)
+            return
+        evict_lru_files(self.directory, _SUFFIX, self.max_bytes)
@@ -1,4 +1,6 @@
-from backend.utils import normalize, compute_orientations
+import copy
+
+from backend.utils import normalize, compute_orientations, piece_count
 
 
 class JSONPieceAdapter:
@@ -13,6 +15,7 @@ class JSONPieceAdapter:
         self.cells = piece_dict.get('cells') or []
         self.allow_reflections = piece_dict.get('allow_reflections', True)
         self.allow_rotations = piece_dict.get('allow_rotations', True)
+        self.count = piece_dict.get('count') or 1
 
     def get_offsets(self):
         return tuple(tuple(coord) for coord in self.cells)
@@ -51,6 +54,11 @@ def group_equivalent_pieces(piece_lib: dict):
     """
     Group pieces that have the same shape (identical set of orientations).
 
+    Each group becomes one representative whose ``count`` is the total count
+    of its members, so the solver still sees the real multiset of pieces
+    (e.g. four identical squares become one square with ``count=4``).  The
+    library's own piece objects are never modified.
+
     Returns:
         (grouped_lib, id_map) where grouped_lib contains one representative
         per shape, and id_map maps every original piece_id to its canonical id.
@@ -61,7 +69,11 @@ def group_equivalent_pieces(piece_lib: dict):
     for pid, pobj in piece_lib.items():
         sig = _shape_signature(pobj)
         if sig in seen:
-            id_map[pid] = seen[sig]
+            canon = seen[sig]
+            id_map[pid] = canon
+            if grouped[canon] is piece_lib[canon]:
+                grouped[canon] = copy.copy(grouped[canon])
+            grouped[canon].count = piece_count(grouped[canon]) + piece_count(pobj)
             continue
         seen[sig] = pid
         grouped[pid] = pobj
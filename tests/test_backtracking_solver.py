@@ -0,0 +1,80 @@
+import unittest
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PySatSolver import PySatSolver
+from backend.BacktrackingSolver import BacktrackingSolver, DancingLinks
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.pieceLibrary import test_piece_library
+
+
+def _solution_key(solution):
+    return tuple(sorted((c.piece_id, c.position, c.orientation) for c in solution))
+
+
+class TestDancingLinks(unittest.TestCase):
+    def test_knuth_example(self):
+        # The classic 7-column example from Knuth's "Dancing Links" paper.
+        rows = [
+            [3, 5, 6],
+            [1, 4, 7],
+            [2, 3, 6],
+            [1, 4],
+            [2, 7],
+            [4, 5, 7],
+        ]
+        covers = list(DancingLinks(7, 0, rows).iter_exact_covers())
+        self.assertEqual(covers, [[0, 3, 4]])
+
+    def test_secondary_columns_are_optional(self):
+        # Column 2 is secondary: rows may leave it uncovered but not double it.
+        rows = [[1, 2], [1], [1, 2]]
+        covers = sorted(DancingLinks(1, 1, rows).iter_exact_covers())
+        self.assertEqual(covers, [[0], [1], [2]])
+
+
+class TestBacktrackingSolver(unittest.TestCase):
+    def _assert_same_solutions(self, puzzle):
+        sat = PySatSolver().solve(puzzle, max_solutions=0)
+        dlx = BacktrackingSolver().solve(puzzle, max_solutions=0)
+        self.assertEqual(sorted(map(_solution_key, sat)), sorted(map(_solution_key, dlx)))
+        return dlx
+
+    def test_matches_pysat_at_most_one(self):
+        for obstacles in ([], [(0, 0)], [(1, 1), (2, 3)]):
+            board = Board(4, 3)
+            board.add_obstacles(obstacles)
+            puzzle = TilingPuzzle(board, test_piece_library)
+            self._assert_same_solutions(puzzle)
+
+    def test_matches_pysat_exactly_one(self):
+        # 17 free cells == total area of test_piece_library
+        board = Board(5, 4)
+        board.add_obstacles([(0, 0), (0, 4), (3, 4)])
+        puzzle = TilingPuzzle(board, test_piece_library, PieceUsagePolicy.EXACTLY_ONE)
+        solutions = self._assert_same_solutions(puzzle)
+        for solution in solutions:
+            self.assertEqual({c.piece_id for c in solution}, set(test_piece_library))
+
+    def test_single_solution_and_unsat(self):
+        board = Board(2, 1)
+        puzzle = TilingPuzzle(board, {'T': Piece([(0, 0), (0, 1), (0, 2)])})
+        self.assertIsNone(BacktrackingSolver().solve(puzzle))
+
+        puzzle = TilingPuzzle(Board(2, 2), {'I': Piece([(0, 0), (0, 1)]), 'D': Piece([(0, 0), (1, 0)])})
+        solution = BacktrackingSolver().solve(puzzle)
+        covered = sorted(cell for cand in solution for cell in cand.cells)
+        self.assertEqual(covered, [(0, 0), (0, 1), (1, 0), (1, 1)])
+
+    def test_iter_solutions_is_lazy(self):
+        pieces = {str(k): Piece([(0, 0)]) for k in range(6)}
+        puzzle = TilingPuzzle(Board(3, 2), pieces)
+        iterator = BacktrackingSolver().iter_solutions(puzzle)
+        first = next(iterator)
+        self.assertEqual(len(first), 6)
+        self.assertEqual(len(BacktrackingSolver().solve(puzzle, max_solutions=3)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.PySatSolver import PySatSolver
+from backend.BacktrackingSolver import BacktrackingSolver
+from backend.CandidatePruning import CHECK_PRUNING, PruningSolver, prune_candidates
+from backend.pieceLibrary import test_piece_library
+from tests.test_solve_api import SolveApiTestCase
+
+DOMINO = [(0, 0), (0, 1)]
+TETRO_T = [(0, 0), (0, 1), (0, 2), (1, 1)]
+
+
+def _keys(solutions):
+    return sorted(tuple(cand.index for cand in solution) for solution in solutions)
+
+
+class TestPruneCandidates(unittest.TestCase):
+    def test_pockets_and_stats(self):
+        puzzle = TilingPuzzle(Board(4, 3), test_piece_library, compact=True)
+        pruned = prune_candidates(puzzle)
+        self.assertIsNone(pruned.infeasibility)
+        self.assertGreater(pruned.stats['variables_removed'], 0)
+        self.assertEqual(pruned.stats['variables_after'], len(pruned.puzzle.candidates))
+
+        solver = PySatSolver()
+        solver.build_cnf(puzzle)
+        self.assertEqual(pruned.stats['clauses_before'], solver.cnf_stats['clauses'])
+        solver.build_cnf(pruned.puzzle)
+        self.assertEqual(pruned.stats['clauses_after'], solver.cnf_stats['clauses'])
+        self.assertEqual(pruned.stats['clauses_removed'],
+                         pruned.stats['clauses_before'] - pruned.stats['clauses_after'])
+
+    def test_forcing_solves_corridor(self):
+        # In a 1x6 corridor each end cell has a single domino, and forcing it
+        # leaves a shorter corridor.
+        puzzle = TilingPuzzle(Board(6, 1), {'D': Piece(DOMINO, count=3)})
+        pruned = prune_candidates(puzzle)
+        self.assertEqual(pruned.stats['forced'], 3)
+        self.assertEqual(pruned.kept, [])
+        self.assertEqual(_keys(PruningSolver().solve(puzzle, max_solutions=0)),
+                         _keys(PySatSolver().solve(puzzle, max_solutions=0)))
+
+    def test_infeasible(self):
+        # Passes the pre-solve checks, but the only T filling the top-left
+        # corner leaves the cell next to it uncoverable.
+        puzzle = TilingPuzzle(Board(2, 4), {'T': Piece(TETRO_T, count=2)},
+                              piece_usage_policy=PieceUsagePolicy.EXACTLY_ONE)
+        pruned = prune_candidates(puzzle)
+        self.assertIsNone(pruned.puzzle)
+        self.assertEqual(pruned.infeasibility.check, CHECK_PRUNING)
+        solver = PruningSolver()
+        self.assertIsNone(solver.solve(puzzle))
+        self.assertEqual(solver.infeasibility.check, CHECK_PRUNING)
+
+
+class TestPruningSolver(unittest.TestCase):
+    def test_matches_unpruned_solve(self):
+        walled = Board(9, 3)
+        walled.add_obstacles([(i, 4) for i in range(3)])
+        library = {'D': Piece(DOMINO, count=6), 'L': Piece([(0, 0), (0, 1), (1, 0)], count=4)}
+        cases = [
+            (Board(4, 3), test_piece_library, PieceUsagePolicy.AT_MOST_ONE),
+            (walled, library, PieceUsagePolicy.AT_MOST_ONE),
+            (walled, library, PieceUsagePolicy.EXACTLY_ONE),
+        ]
+        for board, pieces, policy in cases:
+            for compact in (False, True):
+                puzzle = TilingPuzzle(board, pieces, piece_usage_policy=policy, compact=compact)
+                expected = _keys(PySatSolver().solve(puzzle, max_solutions=0) or [])
+                for factory in (PySatSolver, BacktrackingSolver):
+                    found = PruningSolver(factory).solve(puzzle, max_solutions=0) or []
+                    self.assertEqual(_keys(found), expected)
+                    for solution in found:
+                        indices = [cand.index for cand in solution]
+                        self.assertEqual(indices, sorted(indices))
+
+    def test_blocked_solutions_and_symmetry(self):
+        puzzle = TilingPuzzle(Board(4, 3), test_piece_library, compact=True)
+        first = PruningSolver().solve(puzzle, max_solutions=3)
+        blocked = [[cand.index for cand in solution] for solution in first]
+        rest = PruningSolver().solve(puzzle, max_solutions=0, blocked_solutions=blocked)
+        self.assertTrue(set(_keys(first)).isdisjoint(_keys(rest)))
+        self.assertEqual(len(first) + len(rest), len(PySatSolver().solve(puzzle, max_solutions=0)))
+
+        self.assertEqual(len(PruningSolver().solve(puzzle, max_solutions=0, symmetry=True)),
+                         len(PySatSolver().solve(puzzle, max_solutions=0, symmetry=True)))
+
+
+class TestSolveApiPrune(SolveApiTestCase):
+    def test_prune_reports_stats(self):
+        resp = self.solve(max_solutions=0, prune=True).get_json()
+        self.assertTrue(resp['success'])
+        self.assertGreater(resp['pruning']['variables_removed'], 0)
+        _, events = self.stream(max_solutions=0)
+        unpruned = [e['solution'] for e in events if e['type'] == 'solution']
+        key = lambda sol: sorted((p['id'], tuple(map(tuple, p['cells']))) for p in sol)
+        self.assertEqual(sorted(map(key, resp['solutions'])), sorted(map(key, unpruned)))
+
+        _, events = self.stream(max_solutions=0, prune=True)
+        self.assertEqual(events[-1]['pruning'], resp['pruning'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,8 @@ from backend.piece import Piece
 from backend.CandidatePlacement import CandidatePlacement
 from backend.TilingPuzzle import TilingPuzzle
 from backend.PySatSolver import PySatSolver
+from backend.pieceLibrary import test_piece_library
+from backend.utils import iter_bits
 
 
 class TestCandidatePlacement(unittest.TestCase):
@@ -74,6 +76,17 @@ class TestSolveBasics(unittest.TestCase):
                     covered.add(cell)
             self.assertEqual(covered, {(0, 0)})
 
+    def test_iter_solutions_streams(self):
+        board = Board(3, 1)
+        pieces = {k: Piece([(0, 0)]) for k in 'ABC'}
+        puzzle = TilingPuzzle(board, pieces)
+        iterator = PySatSolver().iter_solutions(puzzle)
+        seen = [next(iterator), next(iterator)]
+        iterator.close()
+        self.assertEqual(len(seen), 2)
+        # 3! assignments of three single cells
+        self.assertEqual(len(list(PySatSolver().iter_solutions(puzzle))), 6)
+
     def test_threads_argument_path(self):
         # Ensure code path with threads kwarg doesn't crash
         board = Board(1, 2)
@@ -87,6 +100,67 @@ class TestSolveBasics(unittest.TestCase):
         self.assertIsInstance(sols, list)
 
 
+class TestCompactPuzzle(unittest.TestCase):
+    def _key(self, cand):
+        return (cand.piece_id, cand.orientation, cand.position, cand.cells)
+
+    def test_compact_candidates_match_regular(self):
+        board = Board(5, 4)
+        board.add_obstacles([(0, 0), (2, 3)])
+        regular = TilingPuzzle(board, test_piece_library)
+        compact = TilingPuzzle(board, test_piece_library, compact=True)
+        self.assertEqual(len(compact.candidates), len(regular.candidates))
+        self.assertEqual([self._key(c) for c in compact.candidates],
+                         [self._key(c) for c in regular.candidates])
+        for k, cand in enumerate(regular.candidates):
+            self.assertEqual(compact.cells_of_mask(compact.candidate_mask(k)), sorted(cand.cells))
+            self.assertEqual(compact.candidate_mask(k) & compact.obstacle_mask, 0)
+
+    def test_conflicts_and_coverage(self):
+        board = Board(2, 1)
+        pieces = {'A': Piece([(0, 0)]), 'B': Piece([(0, 0), (0, 1)])}
+        for compact in (False, True):
+            puzzle = TilingPuzzle(board, pieces, compact=compact)
+            # A@(0,0), A@(0,1), B@(0,0)
+            self.assertFalse(puzzle.conflicts(0, 1))
+            self.assertTrue(puzzle.conflicts(0, 2))
+            self.assertEqual(puzzle.uncoverable_cells(), [])
+
+    def test_compact_solve_matches_regular(self):
+        board = Board(4, 3)
+        board.add_obstacles([(0, 0)])
+        regular = PySatSolver().solve(TilingPuzzle(board, test_piece_library), max_solutions=0)
+        compact = PySatSolver().solve(TilingPuzzle(board, test_piece_library, compact=True), max_solutions=0)
+        as_keys = lambda sols: sorted(tuple(sorted(self._key(c) for c in s)) for s in sols)
+        self.assertEqual(as_keys(regular), as_keys(compact))
+
+    def test_iter_bits(self):
+        self.assertEqual(list(iter_bits(0)), [])
+        self.assertEqual(list(iter_bits(0b101001)), [0, 3, 5])
+
+
+class TestVectorizedGeneration(unittest.TestCase):
+    def test_matches_scalar_generation(self):
+        import random
+        from unittest import mock
+        import backend.TilingPuzzle as tiling_module
+
+        rng = random.Random(7)
+        for compact in (False, True):
+            for density in (0.0, 0.1, 0.3):
+                board = Board(7, 6)
+                board.add_obstacles([(i, j) for i in range(6) for j in range(7) if rng.random() < density])
+                vectorized = TilingPuzzle(board, test_piece_library, compact=compact)
+                with mock.patch.object(tiling_module, 'np', None):
+                    scalar = TilingPuzzle(board, test_piece_library, compact=compact)
+                keys = lambda p: [(c.piece_id, c.orientation, c.position) for c in p.candidates]
+                self.assertEqual(keys(vectorized), keys(scalar))
+
+    def test_piece_larger_than_board(self):
+        puzzle = TilingPuzzle(Board(3, 2), {'I': Piece([(0, 0), (1, 0), (2, 0)])})
+        self.assertEqual(len(puzzle.candidates), 2)
+
+
 if __name__ == '__main__':
     unittest.main()
 
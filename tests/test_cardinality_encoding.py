@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import unittest
+
+from pysat.card import EncType
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PySatSolver import PySatSolver
+from backend.CardinalityEncoding import ENCODINGS, CardinalityEncoding
+from backend.CNFCache import CNFCache
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.pieceLibrary import test_piece_library
+from tests.test_solve_api import SolveApiTestCase
+
+
+def _key(solution):
+    return tuple(sorted((c.piece_id, c.cells) for c in solution))
+
+
+class TestCardinalityEncoding(unittest.TestCase):
+    def test_auto_choice(self):
+        auto = CardinalityEncoding('auto')
+        self.assertEqual(auto.choose(4, 1), EncType.pairwise)
+        self.assertEqual(auto.choose(40, 1), EncType.seqcounter)
+        self.assertEqual(auto.choose(40, 2), EncType.seqcounter)
+        self.assertEqual(auto.choose(2000, 10), EncType.kmtotalizer)
+        self.assertEqual(auto.usage_by_name(), {'pairwise': 1, 'seqcounter': 2, 'kmtotalizer': 1})
+
+    def test_fixed_choice_and_fallback(self):
+        bitwise = CardinalityEncoding('bitwise')
+        self.assertEqual(bitwise.choose(40, 1), EncType.bitwise)
+        # bitwise cannot express bounds above one.
+        self.assertEqual(bitwise.choose(40, 3), EncType.seqcounter)
+        with self.assertRaises(ValueError):
+            CardinalityEncoding('nope')
+
+    def test_every_encoding_gives_same_solutions(self):
+        pieces = dict(test_piece_library)
+        pieces['D'] = Piece([(0, 0), (0, 1)], count=2)
+        for policy in PieceUsagePolicy:
+            puzzle = TilingPuzzle(Board(4, 3), pieces, policy)
+            expected = {_key(s) for s in PySatSolver().solve(puzzle, max_solutions=0, encoding='seqcounter')}
+            for name in ('auto',) + tuple(ENCODINGS):
+                with self.subTest(policy=policy, encoding=name):
+                    found = PySatSolver().solve(puzzle, max_solutions=0, encoding=name)
+                    self.assertEqual({_key(s) for s in found}, expected)
+
+    def test_stats_reported(self):
+        puzzle = TilingPuzzle(Board(4, 3), test_piece_library)
+        pairwise = PySatSolver()
+        pairwise.build_cnf(puzzle, 'pairwise')
+        seq = PySatSolver()
+        seq.build_cnf(puzzle, 'seqcounter')
+        self.assertEqual(pairwise.cnf_stats['auxiliary_variables'], 0)
+        self.assertGreater(seq.cnf_stats['auxiliary_variables'], 0)
+        self.assertEqual(seq.cnf_stats['candidate_variables'], len(puzzle.candidates))
+        self.assertEqual(seq.cnf_stats['encodings'], {'seqcounter': seq.cnf_stats['encodings']['seqcounter']})
+
+    def test_cache_keyed_by_encoding(self):
+        directory = tempfile.mkdtemp()
+        try:
+            cache = CNFCache(directory)
+            puzzle = TilingPuzzle(Board(4, 3), test_piece_library)
+            self.assertNotEqual(cache.key_for(puzzle, 'pairwise'), cache.key_for(puzzle, 'seqcounter'))
+            solver = PySatSolver()
+            solver.solve(puzzle, cnf_cache=cache, encoding='pairwise')
+            solver.solve(puzzle, cnf_cache=cache, encoding='seqcounter')
+            self.assertGreater(solver.cnf_stats['auxiliary_variables'], 0)
+            solver.solve(puzzle, cnf_cache=cache, encoding='pairwise')
+            self.assertEqual(solver.cnf_stats['auxiliary_variables'], 0)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestSolveApiEncoding(SolveApiTestCase):
+    def test_encoding_parameter(self):
+        resp = self.solve(max_solutions=0, encoding='ladder')
+        self.assertTrue(resp.get_json()['success'])
+        self.assertEqual(self.solve(encoding='nope').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
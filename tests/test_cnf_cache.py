@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PySatSolver import PySatSolver
+from backend.CNFCache import CNFCache, CompiledCNF, puzzle_fingerprint
+from backend.pieceLibrary import test_piece_library
+from server.services.solver_service import JSONPieceAdapter
+
+
+def _keys(solutions):
+    return sorted(tuple(sorted((c.piece_id, c.orientation, c.position) for c in s)) for s in solutions)
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_sensitive_to_inputs(self):
+        board = Board(4, 3)
+        base = puzzle_fingerprint(board, test_piece_library)
+        self.assertEqual(base, puzzle_fingerprint(Board(4, 3), dict(test_piece_library)))
+
+        blocked = Board(4, 3)
+        blocked.add_obstacles([(0, 0)])
+        self.assertNotEqual(base, puzzle_fingerprint(blocked, test_piece_library))
+        self.assertNotEqual(base, puzzle_fingerprint(Board(3, 4), test_piece_library))
+
+        no_flip = {
+            k: JSONPieceAdapter({'name': k, 'cells': list(p.get_offsets()), 'allow_reflections': False})
+            for k, p in test_piece_library.items()
+        }
+        self.assertNotEqual(base, puzzle_fingerprint(board, no_flip))
+
+    def test_ignores_color(self):
+        board = Board(2, 2)
+        red = {'A': Piece([(0, 0), (0, 1)], color='red')}
+        blue = {'A': Piece([(0, 0), (0, 1)], color='blue')}
+        self.assertEqual(puzzle_fingerprint(board, red), puzzle_fingerprint(board, blue))
+
+
+class TestCNFCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_binary_round_trip(self):
+        for compact in (False, True):
+            puzzle = TilingPuzzle(Board(4, 3), test_piece_library, compact=compact)
+            cnf, _ = PySatSolver().build_cnf(puzzle)
+            compiled = CompiledCNF.from_puzzle(puzzle, cnf)
+            restored = CompiledCNF.from_bytes(compiled.to_bytes())
+            self.assertEqual(restored.clauses, cnf.clauses)
+            self.assertEqual(restored.nv, cnf.nv)
+            rebuilt = restored.to_puzzle(puzzle.board, test_piece_library)
+            self.assertEqual([(c.piece_id, c.orientation, c.position) for c in rebuilt.candidates],
+                             [(c.piece_id, c.orientation, c.position) for c in puzzle.candidates])
+
+    def test_hit_skips_generation_and_matches(self):
+        board = Board(4, 3)
+        board.add_obstacles([(0, 0)])
+        cache = CNFCache(self.directory)
+        self.assertIsNone(cache.load_puzzle(board, test_piece_library))
+
+        fresh = TilingPuzzle(board, test_piece_library, compact=True)
+        expected = PySatSolver().solve(fresh, max_solutions=0, cnf_cache=cache)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        # A new cache object has an empty memory tier, so this reads the disk.
+        cache = CNFCache(self.directory)
+        cached = cache.load_puzzle(board, test_piece_library)
+        self.assertIsNotNone(cached)
+        self.assertEqual(_keys(PySatSolver().solve(cached, max_solutions=0, cnf_cache=cache)), _keys(expected))
+
+    def test_evicts_least_recently_used(self):
+        cache = CNFCache(self.directory)
+        keys = []
+        for width in (3, 4, 5):
+            puzzle = TilingPuzzle(Board(width, 3), test_piece_library)
+            cnf, _ = PySatSolver().build_cnf(puzzle)
+            key = cache.key_for(puzzle)
+            cache.put(key, CompiledCNF.from_puzzle(puzzle, cnf))
+            os.utime(os.path.join(self.directory, key + '.cnf.z'), (width, width))
+            keys.append(key)
+
+        sizes = {name: os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory)}
+        newest_two = sizes[keys[1] + '.cnf.z'] + sizes[keys[2] + '.cnf.z']
+        cache.max_bytes = newest_two
+        cache._evict()
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(k + '.cnf.z' for k in keys[1:]))
+
+    def test_corrupt_entry_is_discarded(self):
+        cache = CNFCache(self.directory)
+        path = os.path.join(self.directory, 'deadbeef.cnf.z')
+        with open(path, 'wb') as f:
+            f.write(b'garbage')
+        self.assertIsNone(cache.get('deadbeef'))
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
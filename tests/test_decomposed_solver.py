@@ -0,0 +1,97 @@
+import unittest
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.PySatSolver import PySatSolver
+from backend.BacktrackingSolver import BacktrackingSolver
+from backend.DecomposedSolver import DecomposedSolver
+from backend.SolveLimits import SolveLimits, STOP_CANCELLED
+from backend.pieceLibrary import test_piece_library
+from tests.test_solve_api import SolveApiTestCase
+
+LIBRARY = {
+    'D': Piece([(0, 0), (0, 1)], count=6),
+    'L': Piece([(0, 0), (0, 1), (1, 0)], count=4),
+}
+
+
+def _walled_board():
+    """A 3x9 board cut by a wall into two 3x4 regions."""
+    board = Board(9, 3)
+    board.add_obstacles([(i, 4) for i in range(3)])
+    return board
+
+
+def _keys(solutions):
+    return {tuple(sorted(cand.index for cand in solution)) for solution in solutions}
+
+
+class TestDecomposedSolver(unittest.TestCase):
+    def test_matches_monolithic_solve(self):
+        for compact in (False, True):
+            puzzle = TilingPuzzle(_walled_board(), LIBRARY, compact=compact)
+            expected = PySatSolver().solve(puzzle, max_solutions=0)
+            solver = DecomposedSolver()
+            found = solver.solve(puzzle, max_solutions=0)
+            self.assertEqual(len(found), len(expected))
+            self.assertEqual(_keys(found), _keys(expected))
+            self.assertGreater(solver.allocations, 1)
+            for solution in found:
+                indices = [cand.index for cand in solution]
+                self.assertEqual(indices, sorted(indices))
+
+    def test_exactly_one_and_inner_solver(self):
+        board = _walled_board()
+        library = {'D': Piece([(0, 0), (0, 1)], count=3), 'L': Piece([(0, 0), (0, 1), (1, 0)], count=6)}
+        puzzle = TilingPuzzle(board, library, piece_usage_policy=PieceUsagePolicy.EXACTLY_ONE, compact=True)
+        expected = _keys(PySatSolver().solve(puzzle, max_solutions=0))
+        self.assertTrue(expected)
+        for factory in (PySatSolver, BacktrackingSolver):
+            found = DecomposedSolver(factory).solve(puzzle, max_solutions=0)
+            self.assertEqual(_keys(found), expected)
+
+    def test_parallel_regions(self):
+        puzzle = TilingPuzzle(_walled_board(), LIBRARY, compact=True)
+        found = DecomposedSolver(max_workers=2).solve(puzzle, max_solutions=0)
+        self.assertEqual(_keys(found), _keys(PySatSolver().solve(puzzle, max_solutions=0)))
+
+    def test_blocked_solutions_and_limits(self):
+        puzzle = TilingPuzzle(_walled_board(), LIBRARY, compact=True)
+        first = DecomposedSolver().solve(puzzle, max_solutions=5)
+        blocked = [[cand.index for cand in solution] for solution in first]
+        rest = DecomposedSolver().solve(puzzle, max_solutions=0, blocked_solutions=blocked)
+        self.assertTrue(_keys(first).isdisjoint(_keys(rest)))
+        self.assertEqual(len(first) + len(rest), len(PySatSolver().solve(puzzle, max_solutions=0)))
+
+        limits = SolveLimits()
+        limits.token.cancel()
+        self.assertEqual(DecomposedSolver().solve(puzzle, max_solutions=0, limits=limits), [])
+        self.assertEqual(limits.stop_reason, STOP_CANCELLED)
+
+    def test_single_region_and_infeasible(self):
+        puzzle = TilingPuzzle(Board(4, 3), test_piece_library)
+        self.assertEqual(_keys(DecomposedSolver().solve(puzzle, max_solutions=0)),
+                         _keys(PySatSolver().solve(puzzle, max_solutions=0)))
+
+        board = _walled_board()
+        solver = DecomposedSolver()
+        self.assertIsNone(solver.solve(TilingPuzzle(board, {'D': Piece([(0, 0), (0, 1)], count=2)})))
+        self.assertIsNotNone(solver.infeasibility)
+
+
+class TestSolveApiDecompose(SolveApiTestCase):
+    def test_decompose_matches_monolithic(self):
+        body = dict(width=7, height=2, obstacles=[[0, 2], [1, 2]], max_solutions=0)
+        decomposed = self.solve(**body).get_json()
+        self.assertTrue(decomposed['success'])
+        # The stream bypasses the result cache, which the first call filled.
+        _, events = self.stream(decompose=False, **body)
+        monolithic = [e['solution'] for e in events if e['type'] == 'solution']
+        key = lambda sol: sorted((p['id'], tuple(map(tuple, p['cells']))) for p in sol)
+        self.assertEqual(sorted(map(key, decomposed['solutions'])), sorted(map(key, monolithic)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import time
+import unittest
+
+from server.json_storage import load_job, save_job, update_job
+from server.routes import jobs_api
+from tests.test_solve_api import SolveApiTestCase
+
+
+class JobsApiTestCase(SolveApiTestCase):
+    def tearDown(self):
+        for queue in jobs_api._queues.values():
+            queue.shutdown()
+        jobs_api._queues.clear()
+        super().tearDown()
+
+    def submit(self, **payload):
+        body = {'width': 4, 'height': 3, 'pieces': [], 'library_id': 'builtin'}
+        body.update(payload)
+        return self.client.post('/api/jobs', json=body)
+
+    def wait_for(self, job_id, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.client.get(f'/api/jobs/{job_id}').get_json()['job']
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(0.1)
+        self.fail(f'job {job_id} did not finish')
+
+
+class TestJobsApi(JobsApiTestCase):
+    def test_job_matches_solve_endpoint(self):
+        resp = self.submit(max_solutions=0)
+        self.assertEqual(resp.status_code, 202)
+        job = self.wait_for(resp.get_json()['job_id'])
+        self.assertEqual(job['status'], 'completed')
+        self.assertIsNone(job['stop_reason'])
+        expected = self.solve(max_solutions=0).get_json()['solutions']
+        self.assertEqual(job['num_solutions'], len(expected))
+        self.assertEqual(job['solutions'], expected)
+
+        tail = self.client.get(f"/api/jobs/{job['id']}?offset=5").get_json()['job']
+        self.assertEqual(tail['solutions'], expected[5:])
+
+    def test_budget_stops_job(self):
+        job = self.wait_for(self.submit(max_solutions=0, conflict_budget=1).get_json()['job_id'])
+        self.assertEqual(job['status'], 'stopped')
+        self.assertEqual(job['stop_reason'], 'conflict_budget')
+
+    def test_cancel_queued_job_then_remove(self):
+        save_job({'id': 'queued-job', 'status': 'queued', 'attempt': 1, 'heartbeat': time.time(),
+                  'request': {'width': 4, 'height': 3}, 'solutions': [], 'indices': []})
+        resp = self.client.delete('/api/jobs/queued-job').get_json()
+        self.assertEqual(resp['job']['status'], 'cancelled')
+        # The stale submission no longer runs it.
+        jobs_api.run_job(self.instance_dir, 'queued-job', 1)
+        self.assertEqual(load_job('queued-job')['status'], 'cancelled')
+
+        self.assertTrue(self.client.delete('/api/jobs/queued-job').get_json()['removed'])
+        self.assertEqual(self.client.get('/api/jobs/queued-job').status_code, 404)
+
+    def test_cancel_flag_stops_running_job(self):
+        save_job({'id': 'job', 'status': 'queued', 'attempt': 1, 'heartbeat': time.time(),
+                  'request': {'width': 4, 'height': 3, 'max_solutions': 0}, 'solutions': [], 'indices': []})
+        update_job('job', lambda job: job.update(cancel_requested=True) or True)
+        jobs_api.run_job(self.instance_dir, 'job', 1)
+        job = load_job('job')
+        self.assertEqual(job['status'], 'cancelled')
+        self.assertEqual(job['stop_reason'], 'cancelled')
+
+    def test_stale_job_resumes(self):
+        save_job({'id': 'job', 'status': 'queued', 'attempt': 1, 'heartbeat': time.time(),
+                  'request': {'width': 4, 'height': 3, 'library_id': 'builtin', 'max_solutions': 3},
+                  'solutions': [], 'indices': []})
+        jobs_api.run_job(self.instance_dir, 'job', 1)
+        first = load_job('job')['solutions']
+        self.assertEqual(len(first), 3)
+
+        # As if the worker died mid-enumeration of every solution.
+        def crash(job):
+            job['request']['max_solutions'] = 0
+            job.update(status='running', heartbeat=0)
+            return True
+        update_job('job', crash)
+        job = self.wait_for('job')
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['num_solutions'], 8)
+        self.assertEqual(job['solutions'][:3], first)
+
+    def test_invalid_and_unknown_jobs(self):
+        self.assertEqual(self.submit(width='wide').status_code, 400)
+        self.assertEqual(self.client.get('/api/jobs/missing').status_code, 404)
+        self.assertEqual(self.client.delete('/api/jobs/missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
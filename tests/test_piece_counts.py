@@ -0,0 +1,124 @@
+import unittest
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PySatSolver import PySatSolver
+from backend.BacktrackingSolver import BacktrackingSolver
+from backend.CNFCache import puzzle_fingerprint
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from server.services.solver_service import JSONPieceAdapter, group_equivalent_pieces
+from tests.test_solve_api import SolveApiTestCase
+
+DOMINO = [(0, 0), (0, 1)]
+
+
+def _cell_partition(solution):
+    return frozenset(frozenset(c.cells) for c in solution)
+
+
+class TestPieceCounts(unittest.TestCase):
+    def test_count_matches_duplicate_entries(self):
+        board = Board(4, 2)
+        separate = {name: Piece(DOMINO) for name in 'ABCD'}
+        counted = {'A': Piece(DOMINO, count=4)}
+        for policy in PieceUsagePolicy:
+            sep = TilingPuzzle(board, separate, policy)
+            cnt = TilingPuzzle(board, counted, policy)
+            self.assertEqual(len(cnt.candidates) * 4, len(sep.candidates))
+
+            sep_solutions = PySatSolver().solve(sep, max_solutions=0)
+            cnt_solutions = PySatSolver().solve(cnt, max_solutions=0)
+            # Copies are interchangeable: no permutations, same tilings.
+            self.assertEqual(len(cnt_solutions), len({_cell_partition(s) for s in cnt_solutions}))
+            self.assertEqual({_cell_partition(s) for s in cnt_solutions},
+                             {_cell_partition(s) for s in sep_solutions})
+
+    def test_at_most_count_bound(self):
+        board = Board(3, 2)
+        self.assertIsNone(PySatSolver().solve(TilingPuzzle(board, {'D': Piece(DOMINO, count=2)})))
+        solution = PySatSolver().solve(TilingPuzzle(board, {'D': Piece(DOMINO, count=3)}))
+        self.assertEqual(len(solution), 3)
+
+    def test_exactly_count_bound(self):
+        pieces = {'D': Piece(DOMINO, count=2), 'S': Piece([(0, 0)], count=2)}
+        puzzle = TilingPuzzle(Board(3, 2), pieces, PieceUsagePolicy.EXACTLY_ONE)
+        for solution in PySatSolver().solve(puzzle, max_solutions=0):
+            self.assertEqual(sorted(c.piece_id for c in solution), ['D', 'D', 'S', 'S'])
+        # More copies than placements can never be satisfied.
+        too_many = TilingPuzzle(Board(2, 1), {'S': Piece([(0, 0)], count=3)}, PieceUsagePolicy.EXACTLY_ONE)
+        self.assertIsNone(PySatSolver().solve(too_many))
+
+    def test_backtracking_matches_pysat(self):
+        pieces = {'D': Piece(DOMINO, count=3), 'L': Piece([(0, 0), (0, 1), (1, 0)], count=2)}
+        for policy in PieceUsagePolicy:
+            for compact in (False, True):
+                puzzle = TilingPuzzle(Board(4, 3), pieces, policy, compact=compact)
+                sat = PySatSolver().solve(puzzle, max_solutions=0)
+                dlx = BacktrackingSolver().solve(puzzle, max_solutions=0)
+                key = lambda s: tuple(sorted((c.piece_id, c.cells) for c in s))
+                self.assertEqual(len(dlx), len({key(s) for s in dlx}))
+                self.assertEqual({key(s) for s in sat}, {key(s) for s in dlx})
+
+    def test_invalid_count(self):
+        with self.assertRaises(ValueError):
+            Piece(DOMINO, count=0)
+
+    def test_fingerprint_includes_count(self):
+        board = Board(3, 2)
+        self.assertNotEqual(puzzle_fingerprint(board, {'D': Piece(DOMINO)}),
+                            puzzle_fingerprint(board, {'D': Piece(DOMINO, count=2)}))
+
+
+class TestGroupEquivalentPieces(unittest.TestCase):
+    def test_groups_sum_counts(self):
+        lib = {
+            'a': Piece(DOMINO),
+            'b': Piece([(0, 0), (1, 0)], count=2),
+            'c': JSONPieceAdapter({'name': 'c', 'cells': [[0, 0]]}),
+        }
+        grouped, id_map = group_equivalent_pieces(lib)
+        self.assertEqual(list(grouped), ['a', 'c'])
+        self.assertEqual(grouped['a'].count, 3)
+        self.assertEqual(grouped['c'].count, 1)
+        self.assertEqual(id_map, {'a': 'a', 'b': 'a', 'c': 'c'})
+        # The library's own pieces are left untouched.
+        self.assertEqual(lib['a'].count, 1)
+
+
+class TestSolveApiPieceCounts(SolveApiTestCase):
+    def _library(self, *pieces):
+        lib_id = self.client.post('/api/libraries', json={'name': 'counts'}).get_json()['library']['id']
+        for piece in pieces:
+            resp = self.client.post(f'/api/libraries/{lib_id}/pieces', json={'color': 'red', **piece})
+            self.assertTrue(resp.get_json()['success'])
+        return lib_id
+
+    def test_counted_piece_round_trip(self):
+        lib_id = self._library({'name': 'D', 'cells': [[0, 0], [0, 1]], 'count': 2})
+        pieces = self.client.get(f'/api/libraries/{lib_id}/pieces').get_json()
+        self.assertEqual(pieces['D']['count'], 2)
+
+        resp = self.solve(width=2, height=2, library_id=lib_id, pieces=['D'], max_solutions=0).get_json()
+        self.assertTrue(resp['success'])
+        self.assertEqual(len(resp['solutions']), 2)
+        self.assertEqual([p['id'] for p in resp['solutions'][0]], ['D', 'D'])
+
+        bad = self.client.post(f'/api/libraries/{lib_id}/pieces',
+                               json={'name': 'X', 'color': 'red', 'cells': [[0, 0]], 'count': 0})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_dedupe_keeps_every_copy(self):
+        lib_id = self._library({'name': 'A', 'cells': [[0, 0], [0, 1]]},
+                               {'name': 'B', 'cells': [[0, 0], [1, 0]]})
+        body = {'width': 2, 'height': 2, 'library_id': lib_id, 'pieces': ['A', 'B'], 'max_solutions': 0}
+        deduped = self.solve(dedupe_equivalent=True, **body).get_json()
+        self.assertEqual(len(deduped['solutions']), 2)
+        for solution in deduped['solutions']:
+            self.assertEqual(sorted(p['id'] for p in solution), ['A', 'B'])
+        plain = self.solve(dedupe_equivalent=False, **body).get_json()
+        self.assertEqual(len(plain['solutions']), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
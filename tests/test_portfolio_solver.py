@@ -0,0 +1,61 @@
+import unittest
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PySatSolver import PySatSolver
+from backend.PortfolioSolver import PortfolioSolver
+from backend.pieceLibrary import test_piece_library
+from tests.test_solve_api import SolveApiTestCase
+
+
+def _key(solution):
+    return tuple(sorted((c.piece_id, c.cells) for c in solution))
+
+
+class TestPortfolioSolver(unittest.TestCase):
+    def test_enumerates_same_solutions(self):
+        puzzle = TilingPuzzle(Board(4, 3), test_piece_library)
+        portfolio = PortfolioSolver(['glucose4', 'minisat22'])
+        found = portfolio.solve(puzzle, max_solutions=0)
+        expected = PySatSolver().solve(puzzle, max_solutions=0)
+        self.assertEqual(len(found), len(expected))
+        self.assertEqual({_key(s) for s in found}, {_key(s) for s in expected})
+        self.assertIn(portfolio.winner, ('glucose4', 'minisat22'))
+        self.assertEqual([t['engine'] for t in portfolio.timings], ['glucose4', 'minisat22'])
+        for timing in portfolio.timings:
+            self.assertIn(timing['status'], ('sat', 'cancelled'))
+            self.assertGreaterEqual(timing['seconds'], 0)
+
+    def test_unsat_and_failing_engine(self):
+        # Passes the pre-solve checks, so the engines have to prove it unsatisfiable.
+        puzzle = TilingPuzzle(Board(3, 2), {'I': Piece([(0, 0), (0, 1), (0, 2)]),
+                                            'L': Piece([(0, 0), (1, 0), (1, 1)])})
+        portfolio = PortfolioSolver(['no-such-engine', {'name': 'minisat22', 'label': 'minisat'}])
+        self.assertIsNone(portfolio.solve(puzzle))
+        statuses = {t['engine']: t['status'] for t in portfolio.timings}
+        self.assertEqual(statuses, {'no-such-engine': 'error', 'minisat': 'unsat'})
+        self.assertEqual(portfolio.winner, 'minisat')
+
+    def test_every_engine_failing_raises(self):
+        puzzle = TilingPuzzle(Board(4, 3), test_piece_library)
+        with self.assertRaises(RuntimeError):
+            PortfolioSolver(['no-such-engine']).solve(puzzle)
+
+    def test_invalid_portfolio(self):
+        with self.assertRaises(ValueError):
+            PortfolioSolver([])
+        with self.assertRaises(ValueError):
+            PortfolioSolver(['glucose4', 'glucose4'])
+
+
+class TestSolveApiPortfolio(SolveApiTestCase):
+    def test_portfolio_reports_timings(self):
+        resp = self.solve(max_solutions=2, portfolio=True).get_json()
+        self.assertTrue(resp['success'])
+        self.assertEqual(len(resp['solutions']), 2)
+        self.assertIn(resp['portfolio']['winner'], [t['engine'] for t in resp['portfolio']['timings']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from backend.board import Board
+from backend.piece import Piece
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.PySatSolver import PySatSolver
+from backend.BacktrackingSolver import BacktrackingSolver
+from backend.Presolve import (
+    CHECK_AREA, CHECK_COLORING, CHECK_COMPONENT, CHECK_COVERAGE, CHECK_PARITY, find_infeasibility,
+)
+from backend.pieceLibrary import test_piece_library
+from tests.test_solve_api import SolveApiTestCase
+
+DOMINO = [(0, 0), (0, 1)]
+TETRO_T = [(0, 0), (0, 1), (0, 2), (1, 1)]
+
+
+def _board(width, height, obstacles=()):
+    board = Board(width, height)
+    board.add_obstacles(list(obstacles))
+    return board
+
+
+class TestFindInfeasibility(unittest.TestCase):
+    def assertFails(self, puzzle, check):
+        found = find_infeasibility(puzzle)
+        self.assertIsNotNone(found)
+        self.assertEqual(found.check, check)
+        for solver in (PySatSolver(), BacktrackingSolver()):
+            self.assertIsNone(solver.solve(puzzle))
+            self.assertEqual(solver.infeasibility.check, check)
+
+    def test_solvable_puzzles_pass(self):
+        for compact in (False, True):
+            puzzle = TilingPuzzle(_board(4, 3), test_piece_library, compact=compact)
+            self.assertIsNone(find_infeasibility(puzzle))
+
+    def test_coverage(self):
+        puzzle = TilingPuzzle(_board(3, 3, [(0, 1), (1, 0)]), {'D': Piece(DOMINO)})
+        self.assertFails(puzzle, CHECK_COVERAGE)
+
+    def test_area_exactly_one(self):
+        puzzle = TilingPuzzle(_board(4, 2), {'D': Piece(DOMINO), 'E': Piece(DOMINO)},
+                              piece_usage_policy=PieceUsagePolicy.EXACTLY_ONE)
+        self.assertFails(puzzle, CHECK_AREA)
+
+    def test_area_at_most_one(self):
+        puzzle = TilingPuzzle(_board(4, 2), {'D': Piece(DOMINO, count=3)})
+        self.assertFails(puzzle, CHECK_AREA)
+
+    def test_subset_sum(self):
+        # 7 free cells out of pieces of 3 and 5 cells (8 in total).
+        puzzle = TilingPuzzle(_board(4, 2, [(1, 3)]), {
+            'I': Piece([(0, 0), (0, 1), (0, 2)]),
+            'P': Piece([(0, 0), (0, 1), (0, 2), (1, 0), (1, 1)]),
+        })
+        self.assertFails(puzzle, CHECK_AREA)
+
+    def test_parity(self):
+        puzzle = TilingPuzzle(_board(3, 3), {'D': Piece(DOMINO, count=5)})
+        self.assertFails(puzzle, CHECK_PARITY)
+
+    def test_component(self):
+        # A wall splits a 2x9 board into 10 and 6 cells: four squares cover
+        # the 16 cells overall, but cannot fill the 10-cell region.
+        square = [(0, 0), (0, 1), (1, 0), (1, 1)]
+        puzzle = TilingPuzzle(_board(9, 2, [(0, 5), (1, 5)]), {'O': Piece(square, count=4)})
+        self.assertFails(puzzle, CHECK_COMPONENT)
+
+    def test_coloring(self):
+        # Five T-tetrominoes cover 20 cells, but each covers two more cells
+        # of one colour than the other, and five such +-2 never sum to 0.
+        puzzle = TilingPuzzle(_board(5, 4), {'T': Piece(TETRO_T, count=5)},
+                              piece_usage_policy=PieceUsagePolicy.EXACTLY_ONE)
+        self.assertFails(puzzle, CHECK_COLORING)
+
+
+class TestSolveApiInfeasible(SolveApiTestCase):
+    def test_reports_reason(self):
+        # The built-in pieces cover 17 cells.
+        resp = self.solve(width=5, height=4).get_json()
+        self.assertFalse(resp['success'])
+        self.assertEqual(resp['infeasible']['check'], CHECK_AREA)
+        self.assertIn(resp['infeasible']['message'], resp['message'])
+
+        _, events = self.stream(width=5, height=4)
+        self.assertEqual(events[-1]['infeasible']['check'], CHECK_AREA)
+
+
+if __name__ == '__main__':
+    unittest.main()
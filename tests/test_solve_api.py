@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from server.app import create_app
+
+
+class SolveApiTestCase(unittest.TestCase):
+    """Runs the Flask app against a throwaway INSTANCE_DIR."""
+
+    def setUp(self):
+        self.instance_dir = tempfile.mkdtemp()
+        self._old_instance = os.environ.get('INSTANCE_DIR')
+        os.environ['INSTANCE_DIR'] = self.instance_dir
+        self.client = create_app().test_client()
+
+    def tearDown(self):
+        if self._old_instance is None:
+            os.environ.pop('INSTANCE_DIR', None)
+        else:
+            os.environ['INSTANCE_DIR'] = self._old_instance
+        shutil.rmtree(self.instance_dir, ignore_errors=True)
+
+    def solve(self, **payload):
+        body = {'width': 4, 'height': 3, 'pieces': [], 'library_id': 'builtin'}
+        body.update(payload)
+        return self.client.post('/api/solve', json=body)
+
+    def stream(self, **payload):
+        body = {'width': 4, 'height': 3, 'pieces': [], 'library_id': 'builtin'}
+        body.update(payload)
+        resp = self.client.post('/api/solve/stream', json=body)
+        events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines() if line]
+        return resp, events
+
+
+class TestSolveStream(SolveApiTestCase):
+    def test_stream_emits_solutions_then_done(self):
+        resp, events = self.stream(max_solutions=3)
+        self.assertEqual(resp.mimetype, 'application/x-ndjson')
+        self.assertEqual(events[0]['type'], 'start')
+        solutions = [e for e in events if e['type'] == 'solution']
+        self.assertEqual([e['index'] for e in solutions], [0, 1, 2])
+        self.assertEqual(events[-1], {'type': 'done', 'success': True, 'count': 3})
+
+    def test_stream_matches_batch_endpoint(self):
+        batch = self.solve(max_solutions=0).get_json()
+        _, events = self.stream(max_solutions=0)
+        streamed = [e['solution'] for e in events if e['type'] == 'solution']
+        self.assertEqual(streamed, batch['solutions'])
+
+    def test_stream_unsat_and_validation(self):
+        _, events = self.stream(width=1, height=1, pieces=['O'])
+        self.assertFalse(events[-1]['success'])
+        resp = self.client.post('/api/solve/stream', json={'width': 0, 'height': 3})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_stream_persist(self):
+        _, events = self.stream(max_solutions=2, persist=True, save_name='streamed')
+        done = events[-1]
+        self.assertTrue(done['saved'])
+        record = self.client.get(f"/api/solutions/{done['saved_id']}").get_json()['record']
+        self.assertEqual(record['num_solutions'], 2)
+
+
+class TestSolveResultCache(SolveApiTestCase):
+    def _key(self, solution):
+        return tuple(sorted((p['id'], tuple(map(tuple, p['cells']))) for p in solution))
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.solve(max_solutions=2).get_json()
+        second = self.solve(max_solutions=2, obstacles=[]).get_json()
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['solutions'], first['solutions'])
+        # A smaller request is a prefix of the cached enumeration.
+        third = self.solve(max_solutions=1).get_json()
+        self.assertTrue(third['cached'])
+        self.assertEqual(third['solutions'], first['solutions'][:1])
+
+    def test_larger_request_extends_enumeration(self):
+        first = self.solve(max_solutions=2).get_json()
+        extended = self.solve(max_solutions=5).get_json()
+        self.assertFalse(extended['cached'])
+        self.assertEqual(extended['solutions'][:2], first['solutions'])
+        keys = [self._key(sol) for sol in extended['solutions']]
+        self.assertEqual(len(set(keys)), 5)
+
+        everything = self.solve(max_solutions=0).get_json()
+        again = self.solve(max_solutions=50).get_json()
+        self.assertTrue(again['cached'])
+        self.assertEqual(len(again['solutions']), len(everything['solutions']))
+        self.assertEqual(len({self._key(sol) for sol in everything['solutions']}), len(everything['solutions']))
+
+    def test_library_edit_invalidates(self):
+        lib_id = self.client.post('/api/libraries', json={'name': 'mine'}).get_json()['library']['id']
+        self.client.post(f'/api/libraries/{lib_id}/pieces',
+                         json={'name': 'A', 'color': 'red', 'cells': [[0, 0]]})
+        body = {'width': 2, 'height': 1, 'library_id': lib_id, 'pieces': ['A'], 'max_solutions': 0}
+        self.assertFalse(self.solve(**body).get_json()['success'])
+
+        self.client.delete(f'/api/libraries/{lib_id}/pieces/A')
+        self.client.post(f'/api/libraries/{lib_id}/pieces',
+                         json={'name': 'A', 'color': 'red', 'cells': [[0, 0], [0, 1]]})
+        resp = self.solve(**body).get_json()
+        self.assertFalse(resp['cached'])
+        self.assertEqual(len(resp['solutions']), 1)
+        self.assertTrue(self.solve(**body).get_json()['cached'])
+
+class TestSolveResultCacheDiskTier(unittest.TestCase):
+    def test_results_shared_through_directory(self):
+        from server.services.result_cache import SolveResult, SolveResultCache
+
+        directory = tempfile.mkdtemp()
+        try:
+            writer = SolveResultCache(memory_entries=1, directory=directory)
+            writer.put('k', SolveResult([[{'id': 'A'}]], [[0]], False))
+            reader = SolveResultCache(memory_entries=1, directory=directory)
+            result = reader.get('k')
+            self.assertEqual(result.serialized, [[{'id': 'A'}]])
+            self.assertFalse(result.covers(2))
+            self.assertTrue(result.covers(1))
+
+            # A shorter partial enumeration never replaces a longer one.
+            writer.put('k', SolveResult([], [], False))
+            self.assertEqual(len(SolveResultCache(directory=directory).get('k').serialized), 1)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
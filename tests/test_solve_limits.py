@@ -0,0 +1,102 @@
+import threading
+import unittest
+
+from backend.board import Board
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PySatSolver import PySatSolver
+from backend.BacktrackingSolver import BacktrackingSolver
+from backend.SolveLimits import (
+    SolveLimits, STOP_CANCELLED, STOP_CONFLICT_BUDGET, STOP_PROPAGATION_BUDGET, STOP_TIMEOUT,
+)
+from backend.pieceLibrary import test_piece_library
+from server.services.cancellation import CancellationRegistry
+from tests.test_solve_api import SolveApiTestCase
+
+
+def _puzzle():
+    return TilingPuzzle(Board(4, 3), test_piece_library)
+
+
+class TestSolveLimits(unittest.TestCase):
+    def test_unlimited_search_has_no_stop_reason(self):
+        limits = SolveLimits(time_limit=60)
+        solutions = PySatSolver().solve(_puzzle(), max_solutions=0, limits=limits)
+        self.assertEqual(len(solutions), 8)
+        self.assertIsNone(limits.stop_reason)
+
+    def test_cancelled_before_start(self):
+        for solver in (PySatSolver(), BacktrackingSolver()):
+            limits = SolveLimits()
+            limits.token.cancel()
+            self.assertEqual(solver.solve(_puzzle(), max_solutions=0, limits=limits), [])
+            self.assertEqual(limits.stop_reason, STOP_CANCELLED)
+
+    def test_expired_time_limit(self):
+        for solver in (PySatSolver(), BacktrackingSolver()):
+            limits = SolveLimits(time_limit=0)
+            self.assertEqual(solver.solve(_puzzle(), max_solutions=0, limits=limits), [])
+            self.assertEqual(limits.stop_reason, STOP_TIMEOUT)
+
+    def test_budgets_return_partial_results(self):
+        for budget, reason in (({'conflict_budget': 1}, STOP_CONFLICT_BUDGET),
+                               ({'propagation_budget': 50}, STOP_PROPAGATION_BUDGET)):
+            limits = SolveLimits(**budget)
+            solutions = PySatSolver().solve(_puzzle(), max_solutions=0, limits=limits)
+            self.assertLess(len(solutions), 8)
+            self.assertEqual(limits.stop_reason, reason)
+
+    def test_cancel_mid_enumeration(self):
+        limits = SolveLimits()
+        found = []
+        for solution in PySatSolver().iter_solutions(_puzzle(), limits=limits):
+            found.append(solution)
+            limits.token.cancel()
+        self.assertEqual(len(found), 1)
+        self.assertEqual(limits.stop_reason, STOP_CANCELLED)
+
+
+class TestCancellationRegistry(unittest.TestCase):
+    def test_cancel_reaches_registered_token(self):
+        registry = CancellationRegistry()
+        token = registry.register('abc')
+        self.assertFalse(registry.cancel('other'))
+        self.assertTrue(registry.cancel('abc'))
+        self.assertTrue(token.cancelled)
+        registry.unregister('abc', token)
+        self.assertFalse(registry.cancel('abc'))
+
+    def test_cancel_from_another_thread(self):
+        registry = CancellationRegistry()
+        token = registry.register('abc')
+        threading.Timer(0.01, registry.cancel, args=('abc',)).start()
+        self.assertTrue(token.wait(5))
+
+
+class TestSolveApiLimits(SolveApiTestCase):
+    def test_budget_stops_with_partial_result(self):
+        resp = self.solve(max_solutions=0, conflict_budget=1).get_json()
+        self.assertTrue(resp['success'])
+        self.assertEqual(resp['stop_reason'], STOP_CONFLICT_BUDGET)
+        self.assertLess(len(resp['solutions']), 8)
+
+    def test_complete_search_has_no_stop_reason(self):
+        resp = self.solve(max_solutions=0, time_limit=30).get_json()
+        self.assertEqual(len(resp['solutions']), 8)
+        self.assertNotIn('stop_reason', resp)
+
+    def test_stream_reports_request_id_and_stop_reason(self):
+        _, events = self.stream(max_solutions=0, propagation_budget=50, request_id='run-1')
+        self.assertEqual(events[0]['request_id'], 'run-1')
+        self.assertEqual(events[-1]['stop_reason'], STOP_PROPAGATION_BUDGET)
+
+    def test_invalid_limits(self):
+        for payload in ({'time_limit': -1}, {'time_limit': 'soon'}, {'conflict_budget': 0}):
+            self.assertEqual(self.solve(**payload).status_code, 400)
+
+    def test_cancel_unknown_request(self):
+        resp = self.client.post('/api/solve/nope/cancel')
+        self.assertEqual(resp.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from backend.board import Board
+from backend.TilingPuzzle import TilingPuzzle
+from backend.PySatSolver import PySatSolver
+from backend.BoardSymmetry import BoardSymmetry
+from backend.PieceUsagePolicy import PieceUsagePolicy
+from backend.pieceLibrary import test_piece_library
+from tests.test_solve_api import SolveApiTestCase
+
+
+def _board(width, height, obstacles=()):
+    board = Board(width, height)
+    board.add_obstacles(obstacles)
+    return board
+
+
+class TestBoardSymmetry(unittest.TestCase):
+    def _check_reduction(self, board, compact=False, policy=PieceUsagePolicy.AT_MOST_ONE):
+        puzzle = TilingPuzzle(board, test_piece_library, policy, compact=compact)
+        symmetry = BoardSymmetry(puzzle)
+        full = PySatSolver().solve(puzzle, max_solutions=0)
+        reduced = PySatSolver().solve(puzzle, max_solutions=0, symmetry=symmetry)
+
+        classes = {symmetry.canonical_key(s) for s in full}
+        self.assertEqual(len(reduced), len(classes))
+        self.assertEqual({symmetry.canonical_key(s) for s in reduced}, classes)
+        self.assertEqual(sum(symmetry.orbit_size(s) for s in reduced), len(full))
+        return symmetry, full, reduced
+
+    def test_rectangle_group(self):
+        symmetry, full, reduced = self._check_reduction(Board(4, 3))
+        self.assertEqual(symmetry.order, 4)
+        self.assertLess(len(reduced), len(full))
+
+    def test_square_group(self):
+        symmetry, _, _ = self._check_reduction(Board(4, 4), compact=True)
+        self.assertEqual(symmetry.order, 8)
+
+    def test_obstacles_restrict_group(self):
+        symmetric = BoardSymmetry(TilingPuzzle(_board(3, 3, [(1, 1)]), test_piece_library))
+        self.assertEqual(symmetric.order, 8)
+        lopsided = BoardSymmetry(TilingPuzzle(_board(4, 3, [(0, 0)]), test_piece_library))
+        self.assertEqual(lopsided.order, 1)
+        self.assertEqual(lopsided.forbidden_candidates(), [])
+        self._check_reduction(_board(3, 3, [(1, 1)]))
+
+    def test_symmetry_true_builds_group(self):
+        puzzle = TilingPuzzle(Board(4, 3), test_piece_library)
+        explicit = PySatSolver().solve(puzzle, max_solutions=0, symmetry=BoardSymmetry(puzzle))
+        implicit = PySatSolver().solve(puzzle, max_solutions=0, symmetry=True)
+        self.assertEqual(len(explicit), len(implicit))
+
+
+class TestSolveApiSymmetry(SolveApiTestCase):
+    def test_break_symmetries_reports_variants(self):
+        full = self.solve(max_solutions=0).get_json()
+        reduced = self.solve(max_solutions=0, break_symmetries=True).get_json()
+        self.assertTrue(reduced['success'])
+        self.assertLess(len(reduced['solutions']), len(full['solutions']))
+        self.assertEqual(len(reduced['variants']), len(reduced['solutions']))
+        self.assertEqual(sum(reduced['variants']), len(full['solutions']))
+
+
+if __name__ == '__main__':
+    unittest.main()